@@ -20,6 +20,18 @@ const float toleranceDeg = 1.0;
 
 long targetSteps = 0;
 
+// --- Gerak non-blocking: D/S/C hanya set target, loop() yang menjalankan ---
+// Command baru saat motor masih jalan langsung mengganti target (D/C) atau
+// menambah target (S/K); feedback [S]/[D]/[C] hanya untuk command terakhir,
+// dikirim saat motor berhenti. X = berhenti (deselerasi) dan batalkan,
+// [X] membawa posisi akhir.
+// S selama C belum sampai ditambahkan ke target home: homing tetap jalan,
+// titik home (homeSteps) jadi nol saat motor berhenti, jadi posisi akhir =
+// offset S dari home. D dan X membatalkan homing.
+const char* pendingLabel = NULL;
+bool pendingHome = false;
+long homeSteps = 0;
+
 // --- Deteksi motor & sensor ---
 int lastRawAngle = 0;
 int lastCommandRaw = 0;
@@ -28,6 +40,20 @@ bool motorPrevActive = false;
 bool waitingKDone = false;
 unsigned long lastSensorCheck = 0;
 
+// --- Streaming posisi saat motor jalan: T<hz> (T0 = mati, maks 200 Hz) ---
+// [P] membawa rawAngle encoder (+ step count dan millis di mode biner).
+// Sampel dilewati kalau buffer TX penuh, supaya stepper.run() tidak tertahan
+const long maxStreamHz = 200;
+unsigned long streamPeriodUs = 0;
+unsigned long lastStreamUs = 0;
+
+// --- Mode feedback biner (B1 = biner, B0 = ASCII) ---
+// Frame 13 byte: sync, label, raw(u16), steps(i32), millis(u32), crc8
+// (little-endian, CRC8 poly 0x07 atas byte label..millis)
+const uint8_t FRAME_SYNC = 0xA5;
+const uint8_t FRAME_LEN  = 13;
+bool binaryMode = false;
+
 void setup() {
   Serial.begin(115200);
   Wire.begin();
@@ -52,13 +78,15 @@ void loop() {
   }
 
   motorPrevActive = motorActive;
-  motorActive = (stepper.distanceToGo() != 0);
+  // isRunning: lewat target dengan kecepatan (retarget dekat) masih dihitung jalan
+  motorActive = stepper.isRunning();
   stepper.run();
 
-  if (!motorActive && motorPrevActive && waitingKDone) {
-    sendFeedback("K");
-    waitingKDone = false;
-    lastCommandRaw = encoder.rawAngle();
+  if (!motorActive && motorPrevActive) {
+    finishMove();
+  }
+  else if (motorActive && streamPeriodUs) {
+    streamPosition();
   }
 
   checkSensor();
@@ -87,10 +115,7 @@ void processCommand(String cmd) {
     }
 
     targetSteps += deltaSteps;
-    stepper.moveTo(targetSteps);
-    stepper.runToPosition();
-    sendFeedback("S");
-    lastCommandRaw = encoder.rawAngle();
+    startMove("S");
   }
   else if (cmd.startsWith("D")) {
     long targetDeg = cmd.substring(1).toInt();
@@ -114,12 +139,10 @@ void processCommand(String cmd) {
       return;
     }
 
+    // relatif ke posisi sekarang (bisa di tengah gerak sebelumnya)
     long deltaSteps = deltaDeg * stepsPerDegree;
-    targetSteps += deltaSteps;
-    stepper.moveTo(targetSteps);
-    stepper.runToPosition();
-    sendFeedback("D");
-    lastCommandRaw = encoder.rawAngle();
+    targetSteps = stepper.currentPosition() + deltaSteps;
+    startMove("D");
   }
   else if (cmd == "C") {
     int rawAngle = encoder.rawAngle();
@@ -130,25 +153,106 @@ void processCommand(String cmd) {
     while (deltaDeg < -180) deltaDeg += 360;
 
     long deltaSteps = deltaDeg * stepsPerDegree;
-    targetSteps += deltaSteps;
-    stepper.moveTo(targetSteps);
-    stepper.runToPosition();
-
-    stepper.setCurrentPosition(0);
-    targetSteps = 0;
-    sendFeedback("C");
-    lastCommandRaw = encoder.rawAngle();
+    if (deltaSteps == 0 && !stepper.isRunning()) {
+      stepper.setCurrentPosition(0);
+      targetSteps = 0;
+      pendingLabel = NULL;
+      sendFeedback("C");
+      lastCommandRaw = encoder.rawAngle();
+      return;
+    }
+    targetSteps = stepper.currentPosition() + deltaSteps;
+    homeSteps = targetSteps;
+    // posisi di-nol-kan saat sampai (finishMove), kecuali dibatalkan
+    pendingHome = true;
+    startMove("C");
+  }
+  else if (cmd == "X") {
+    // berhenti secepatnya dengan deselerasi; [X] dikirim di titik berhenti
+    stepper.stop();
+    targetSteps = stepper.targetPosition();
+    startMove("X");
+  }
+  else if (cmd.startsWith("T")) {
+    long hz = cmd.substring(1).toInt();
+    if (hz < 0) hz = 0;
+    if (hz > maxStreamHz) hz = maxStreamHz;
+    streamPeriodUs = hz ? 1000000UL / hz : 0;
+    sendFeedback("T");
   }
   else if (cmd == "Q") {
     // --- tambahan query posisi ---
     sendFeedback("Q");
     lastCommandRaw = encoder.rawAngle();
   }
+  else if (cmd == "B1" || cmd == "B0") {
+    // ack dikirim dalam mode yang baru
+    binaryMode = (cmd == "B1");
+    sendFeedback("B");
+  }
+}
+
+// --------------------
+void startMove(const char* label) {
+  stepper.moveTo(targetSteps);
+  // S relatif ke target: homing yang belum selesai tetap berlaku
+  if (strcmp(label, "C") != 0 && strcmp(label, "S") != 0) pendingHome = false;
+  if (!stepper.isRunning()) {
+    // sudah di target: selesai sekarang, tidak menunggu loop()
+    applyHome();
+    pendingLabel = NULL;
+    sendFeedback(label);
+    lastCommandRaw = encoder.rawAngle();
+    return;
+  }
+  // command sebelumnya yang belum selesai tidak mendapat feedback sendiri
+  pendingLabel = label;
+  waitingKDone = false;
+}
+
+void applyHome() {
+  if (pendingHome) {
+    // titik home = 0 (motor di home + S yang datang selama homing)
+    stepper.setCurrentPosition(stepper.currentPosition() - homeSteps);
+    targetSteps -= homeSteps;
+    pendingHome = false;
+  }
+}
+
+void finishMove() {
+  applyHome();
+  if (pendingLabel != NULL) {
+    sendFeedback(pendingLabel);
+    pendingLabel = NULL;
+  }
+  if (waitingKDone) {
+    sendFeedback("K");
+    waitingKDone = false;
+  }
+  lastCommandRaw = encoder.rawAngle();
+}
+
+// --------------------
+void streamPosition() {
+  unsigned long now = micros();
+  if (now - lastStreamUs < streamPeriodUs) return;
+  // satu baris ASCII "[P],4095,359.91\r\n" = 17 byte, frame biner 13 byte
+  if (Serial.availableForWrite() < (binaryMode ? FRAME_LEN : 17)) return;
+  lastStreamUs = now;
+  sendFeedback("P");
 }
 
 // --------------------
 void sendFeedback(const char* label) {
-  int rawAngle = encoder.rawAngle();
+  sendFeedback(label, encoder.rawAngle());
+}
+
+void sendFeedback(const char* label, int rawAngle) {
+  if (binaryMode) {
+    sendFrame(labelCode(label), rawAngle);
+    return;
+  }
+
   float angleDeg = (rawAngle * 360.0) / 4096.0;
 
   Serial.print("[");
@@ -177,13 +281,55 @@ void checkSensor() {
   // hanya print sensor jika perubahan > 2 raw dan > toleransi deg
   if (deltaRaw > 2 && deltaDeg > toleranceDeg) {
     if (!motorActive) {
-      float angleDeg = (raw * 360.0) / 4096.0;
-      Serial.print("[SENSOR],");
-      Serial.print(raw);
-      Serial.print(",");
-      Serial.println(angleDeg, 2);
+      sendFeedback("SENSOR", raw);
     }
   }
 
   lastRawAngle = raw;
 }
+
+// --------------------
+uint8_t labelCode(const char* label) {
+  if (strcmp(label, "SENSOR") == 0) return 1;
+  if (strcmp(label, "K") == 0)      return 2;
+  if (strcmp(label, "S") == 0)      return 3;
+  if (strcmp(label, "S-SKIP") == 0) return 4;
+  if (strcmp(label, "D") == 0)      return 5;
+  if (strcmp(label, "D-SKIP") == 0) return 6;
+  if (strcmp(label, "C") == 0)      return 7;
+  if (strcmp(label, "Q") == 0)      return 8;
+  if (strcmp(label, "B") == 0)      return 9;
+  if (strcmp(label, "X") == 0)      return 10;
+  if (strcmp(label, "P") == 0)      return 11;
+  if (strcmp(label, "T") == 0)      return 12;
+  return 0;
+}
+
+uint8_t crc8(const uint8_t* data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendFrame(uint8_t code, int rawAngle) {
+  uint8_t frame[FRAME_LEN];
+  uint16_t raw = rawAngle & 0x0FFF;
+  long steps = stepper.currentPosition();
+  unsigned long ms = millis();
+
+  frame[0] = FRAME_SYNC;
+  frame[1] = code;
+  frame[2] = raw & 0xFF;
+  frame[3] = raw >> 8;
+  for (uint8_t i = 0; i < 4; i++) {
+    frame[4 + i] = (steps >> (8 * i)) & 0xFF;
+    frame[8 + i] = (ms >> (8 * i)) & 0xFF;
+  }
+  frame[12] = crc8(frame + 1, FRAME_LEN - 2);
+  Serial.write(frame, FRAME_LEN);
+}
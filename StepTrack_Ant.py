@@ -1,8 +1,7 @@
-import socket
-import threading
 import tkinter as tk
-import math
-import time
+from log_view import LogView
+from needle_view import Needle, FRAME_MS, IDLE_MS
+from telemetry_client import TelemetryClient
 
 HOST = "127.0.0.1"
 PORT = 5000
@@ -25,6 +24,8 @@ needle = canvas.create_line(center_x, center_y, center_x, center_y-radius, width
 log_text = tk.Text(root, width=60, height=25)
 log_text.pack(side="right", padx=10, pady=10)
 
+log_view = LogView(root, log_text).start()
+
 bearing_value = tk.StringVar(value="Bearing: 0.00°")
 label = tk.Label(root, textvariable=bearing_value, font=("Arial", 14))
 label.pack(side="bottom", pady=10)
@@ -41,13 +42,12 @@ def send_command():
     cmd = command_entry.get().strip()
     if cmd:
         try:
-            client_socket.sendall((cmd + "\n").encode())
-            log_text.insert(tk.END, f"[UI] Sent command: {cmd}\n")
-            log_text.see(tk.END)
+            if not client.send(cmd):
+                raise ConnectionError("not connected")
+            log_view.write(f"[UI] Sent command: {cmd}")
             command_entry.delete(0, tk.END)
         except Exception as e:
-            log_text.insert(tk.END, f"[UI-ERROR] {e}\n")
-            log_text.see(tk.END)
+            log_view.write(f"[UI-ERROR] {e}")
 
 send_btn = tk.Button(entry_frame, text="Send", command=send_command)
 send_btn.pack(side="left", padx=5)
@@ -55,73 +55,45 @@ send_btn.pack(side="left", padx=5)
 # --- Update jarum ---
 current_bearing = 0.0
 target_bearing = 0.0
-bearing_lock = threading.Lock()
+last_seq = 0
 
 def update_needle_interpolated():
-    global current_bearing, target_bearing
-    with bearing_lock:
-        delta = target_bearing - current_bearing
-        # wrap-around handling
-        if delta > 180:
-            delta -= 360
-        elif delta < -180:
-            delta += 360
-
-        # interpolasi halus
-        step = delta * 0.2  # 0.2 = smoothing factor
-        if abs(step) < 0.01:
-            step = delta
-        current_bearing += step
-
-        # wrap current_bearing ke 0-360
-        if current_bearing >= 360:
-            current_bearing -= 360
-        elif current_bearing < 0:
-            current_bearing += 360
-
-        angle_rad = math.radians(current_bearing - 90)
-        x = center_x + radius * math.cos(angle_rad)
-        y = center_y + radius * math.sin(angle_rad)
-        canvas.coords(needle, center_x, center_y, x, y)
-        bearing_value.set(f"Bearing: {current_bearing:.2f}°")
-
-    root.after(20, update_needle_interpolated)  # update setiap 20ms
-
-root.after(20, update_needle_interpolated)
-
-# --- Socket client ---
-client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-def socket_thread():
-    global target_bearing, client_socket
-    try:
-        client_socket.connect((HOST, PORT))
-        log_text.insert(tk.END, f"[UI] Connected to {HOST}:{PORT}\n")
-        log_text.see(tk.END)
-
-        while True:
-            data = client_socket.recv(1024).decode("utf-8").strip()
-            if not data:
-                continue
-
-            log_text.insert(tk.END, data + "\n")
-            log_text.see(tk.END)
-
-            # parsing bearing dari data Arduino
-            try:
-                parts = data.split("|")
-                for part in parts:
-                    if "Bearing" in part:
-                        b_str = part.split()[1]
-                        b = float(b_str)
-                        with bearing_lock:
-                            target_bearing = b
-            except:
-                pass
-
-    except Exception as e:
-        log_text.insert(tk.END, f"[UI-SOCKET-ERROR] {e}\n")
-        log_text.see(tk.END)
-
-threading.Thread(target=socket_thread, daemon=True).start()
+    global current_bearing, target_bearing, last_seq
+    # ambil nilai terbaru dari client tanpa lock
+    seq, rec = client.latest.get()
+    if seq != last_seq:
+        last_seq = seq
+        target_bearing = rec.deg
+
+    delta = target_bearing - current_bearing
+    # wrap-around handling
+    if delta > 180:
+        delta -= 360
+    elif delta < -180:
+        delta += 360
+
+    # interpolasi halus
+    step = delta * 0.2  # 0.2 = smoothing factor
+    if abs(step) < 0.01:
+        step = delta
+    current_bearing += step
+
+    # wrap current_bearing ke 0-360
+    if current_bearing >= 360:
+        current_bearing -= 360
+    elif current_bearing < 0:
+        current_bearing += 360
+
+    changed = needle_view.show(current_bearing)
+    root.after(FRAME_MS if (changed or step != 0) else IDLE_MS, update_needle_interpolated)
+
+needle_view = Needle(canvas, needle, center_x, center_y, radius, bearing_value, "Bearing: {:.2f}°")
+root.after(FRAME_MS, update_needle_interpolated)
+
+# --- Socket client (framed, reconnect otomatis) ---
+def on_records(records):
+    # [P] 10-200 Hz tidak masuk log teks (needle tetap dari client.latest)
+    log_view.write_many([r for r in records if r.label != "P"])
+
+client = TelemetryClient(HOST, PORT, on_records=on_records, on_status=log_view.write).start()
 root.mainloop()
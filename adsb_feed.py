@@ -0,0 +1,650 @@
+import argparse
+import json
+import socket
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+from bearing_fusion import BearingFusion, fused_send
+from cable_wrap import CableWrap, parse_limits
+from lead_tracker import LeadTracker, SlewModel
+from target_select import POLICIES, TargetIndex, TargetSelector, parse_sector
+
+# --- Ingest ADS-B: SBS-1 (BaseStation, TCP 30003), VRS AircraftList.json, replay ---
+# Semua pesan masuk ke satu tabel kolumnar (AircraftTable, array NumPy per
+# kolom). Bearing/range/elevasi dari site antena dihitung untuk semua pesawat
+# sekaligus (geodetic -> ECEF -> ENU, WGS84), bukan per pesawat di Python.
+# Bearing target terpilih dikirim sebagai D<deg motor> yang di-rate-limit
+# (BearingCommander), lewat hub ControlTMC2209 atau langsung ke port serial.
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+FT = 0.3048
+
+
+def geodetic_to_ecef(lat, lon, alt):
+    lat = np.radians(lat)
+    lon = np.radians(lon)
+    sin_lat = np.sin(lat)
+    cos_lat = np.cos(lat)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat * sin_lat)
+    x = (n + alt) * cos_lat * np.cos(lon)
+    y = (n + alt) * cos_lat * np.sin(lon)
+    z = (n * (1 - WGS84_E2) + alt) * sin_lat
+    return x, y, z
+
+
+class Site:
+    def __init__(self, lat, lon, alt=0.0):
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.ecef = geodetic_to_ecef(lat, lon, alt)
+        la, lo = np.radians(lat), np.radians(lon)
+        # baris matriks ECEF -> ENU
+        self.east = (-np.sin(lo), np.cos(lo), 0.0)
+        self.north = (-np.sin(la) * np.cos(lo), -np.sin(la) * np.sin(lo), np.cos(la))
+        self.up = (np.cos(la) * np.cos(lo), np.cos(la) * np.sin(lo), np.sin(la))
+
+    def look(self, lat, lon, alt):
+        # -> bearing (deg true, 0..360), slant range (m), elevasi (deg); semua array
+        x, y, z = geodetic_to_ecef(lat, lon, alt)
+        dx = x - self.ecef[0]
+        dy = y - self.ecef[1]
+        dz = z - self.ecef[2]
+        e = self.east[0] * dx + self.east[1] * dy
+        n = self.north[0] * dx + self.north[1] * dy + self.north[2] * dz
+        u = self.up[0] * dx + self.up[1] * dy + self.up[2] * dz
+        horiz = np.hypot(e, n)
+        bearing = np.degrees(np.arctan2(e, n)) % 360.0
+        elevation = np.degrees(np.arctan2(u, horiz))
+        return bearing, np.sqrt(horiz * horiz + u * u), elevation
+
+
+def parse_site(text):
+    parts = [float(p) for p in text.split(",")]
+    if len(parts) not in (2, 3):
+        raise ValueError("site must be LAT,LON[,ALT_M]")
+    return Site(*parts)
+
+
+# --- Tabel pesawat kolumnar ---
+# update: (icao, callsign, alt_ft, speed_kt, track, lat, lon, vrate, signal, t); None = tidak ada
+# signal: level sinyal receiver (VRS "Sig"); SBS-1 tidak membawanya
+FIELDS = ("alt", "speed", "track", "lat", "lon", "vrate", "signal")
+
+
+def last_per_row(idx, values):
+    # -> (idx unik, nilai terakhir untuk tiap idx) dari list paralel
+    idx = np.asarray(idx)
+    values = np.asarray(values, dtype=float)
+    if len(idx) < 2:
+        return idx, values
+    uniq, first = np.unique(idx[::-1], return_index=True)
+    return uniq, values[len(idx) - 1 - first]
+
+
+class AircraftTable:
+    def __init__(self, capacity=1024):
+        self.lock = threading.Lock()
+        self.rows = {}          # icao -> row
+        self.free = []
+        self.size = 0           # high-water mark baris terpakai
+        self._alloc(capacity)
+        # index seleksi target, dibangun di compute() (satu kali per batch);
+        # index_rows = baris tabel yang diindex = baris snapshot berikutnya
+        self.index = TargetIndex()
+        self.index_rows = None
+
+        # statistik
+        self.messages = 0
+        self.expired = 0
+
+    def _alloc(self, capacity):
+        old = getattr(self, "capacity", 0)
+        self.capacity = capacity
+
+        def grow(name, fill, dtype=float):
+            arr = np.full(capacity, fill, dtype=dtype)
+            if old:
+                arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+
+        grow("icao", 0, np.uint32)
+        grow("active", False, bool)
+        for name in FIELDS + ("t_pos", "t_seen", "bearing", "range", "elevation"):
+            grow(name, np.nan)
+        self.callsign = (self.callsign if old else []) + [""] * (capacity - old)
+
+    def _row(self, icao):
+        row = self.rows.get(icao)
+        if row is not None:
+            return row
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self._alloc(self.capacity * 2)
+            row = self.size
+            self.size += 1
+        self.rows[icao] = row
+        self.icao[row] = icao
+        self.active[row] = True
+        for name in FIELDS + ("t_pos", "bearing", "range", "elevation"):
+            getattr(self, name)[row] = np.nan
+        self.callsign[row] = ""
+        return row
+
+    def update_many(self, updates):
+        if not updates:
+            return
+        with self.lock:
+            rows = [self._row(u[0]) for u in updates]
+            cols = {name: ([], []) for name in FIELDS + ("t_pos", "t_seen")}
+            for row, (icao, call, alt, speed, track, lat, lon, vrate, signal, t) in zip(rows, updates):
+                if call:
+                    self.callsign[row] = call
+                for name, value in (("alt", alt), ("speed", speed), ("track", track), ("vrate", vrate),
+                                    ("signal", signal)):
+                    if value is not None:
+                        cols[name][0].append(row)
+                        cols[name][1].append(value)
+                if lat is not None and lon is not None:
+                    for name, value in (("lat", lat), ("lon", lon), ("t_pos", t)):
+                        cols[name][0].append(row)
+                        cols[name][1].append(value)
+                cols["t_seen"][0].append(row)
+                cols["t_seen"][1].append(t)
+            # satu fancy-assign per kolom. Index ganda di fancy-assign tidak
+            # dijamin urutannya oleh NumPy -> ambil baris terakhir per pesawat dulu
+            for name, (idx, values) in cols.items():
+                if idx:
+                    idx, values = last_per_row(idx, values)
+                    getattr(self, name)[idx] = values
+            self.messages += len(updates)
+
+    def expire(self, now, max_age=60.0):
+        with self.lock:
+            n = self.size
+            stale = self.active[:n] & (now - self.t_seen[:n] > max_age)
+            for row in np.flatnonzero(stale):
+                del self.rows[int(self.icao[row])]
+                self.free.append(int(row))
+            self.active[:n][stale] = False
+            self.expired += int(stale.sum())
+            if stale.any():
+                self.index_rows = None      # index basi sampai compute() berikutnya
+
+    def compute(self, site):
+        # bearing/range/elevasi untuk semua pesawat berposisi, satu pass
+        with self.lock:
+            n = self.size
+            ok = self.active[:n] & ~np.isnan(self.lat[:n])
+            alt_m = np.where(np.isnan(self.alt[:n]), 0.0, self.alt[:n] * FT)
+            bearing, rng, elev = site.look(self.lat[:n], self.lon[:n], alt_m)
+            self.bearing[:n] = np.where(ok, bearing, np.nan)
+            self.range[:n] = np.where(ok, rng, np.nan)
+            self.elevation[:n] = np.where(ok, elev, np.nan)
+            rows = np.flatnonzero(self.active[:n])
+            self.index_rows = rows
+            self.index.build(self.bearing[rows], self.range[rows], self.signal[rows])
+
+    def snapshot(self):
+        # salinan baris aktif (untuk seleksi target / tampilan). Setelah
+        # compute(): baris yang sama dengan index, jadi snap["index"] langsung
+        # dipakai TargetSelector. Pesawat baru ikut di compute() berikutnya
+        # (bearing-nya memang belum ada); baris yang dipakai ulang punya
+        # bearing NaN sampai compute() dan tidak lolos filter
+        with self.lock:
+            if self.index_rows is not None:
+                rows = self.index_rows
+            else:
+                rows = np.flatnonzero(self.active[:self.size])
+            out = {name: getattr(self, name)[rows].copy()
+                   for name in ("icao",) + FIELDS + ("t_pos", "t_seen", "bearing", "range", "elevation")}
+            out["callsign"] = [self.callsign[r] for r in rows]
+            if self.index_rows is not None:
+                out["index"] = self.index
+            return out
+
+    def __len__(self):
+        return len(self.rows)
+
+
+# --- Parser pesan ---
+def _num(text):
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def sbs_time(date_text, time_text):
+    # "2024/01/31", "12:00:00.000" (field generated); None kalau tidak ada
+    try:
+        return datetime.strptime(f"{date_text} {time_text}", "%Y/%m/%d %H:%M:%S.%f").timestamp()
+    except ValueError:
+        return None
+
+
+def parse_sbs(lines, now):
+    # MSG,type,sess,aircraft,HEX,flight,date,time,date,time,call,alt,gs,trk,lat,lon,vr,...
+    updates = []
+    for line in lines:
+        f = line.split(",")
+        if len(f) < 17 or f[0] != "MSG":
+            continue
+        try:
+            icao = int(f[4], 16)
+        except ValueError:
+            continue
+        updates.append((icao, f[10].strip(), _num(f[11]), _num(f[12]), _num(f[13]),
+                        _num(f[14]), _num(f[15]), _num(f[16]), None, now))
+    return updates
+
+
+def parse_vrs(doc, now):
+    # AircraftList.json: {"acList": [{"Icao": "4CA2D6", "Lat":.., "Long":.., "Alt":.., ...}]}
+    updates = []
+    for ac in doc.get("acList", ()):
+        try:
+            icao = int(ac["Icao"], 16)
+        except (KeyError, ValueError, TypeError):
+            continue
+        updates.append((icao, (ac.get("Call") or "").strip(), ac.get("Alt", ac.get("GAlt")),
+                        ac.get("Spd"), ac.get("Trak"), ac.get("Lat"), ac.get("Long"),
+                        ac.get("Vsi"), ac.get("Sig"), now))
+    return updates
+
+
+# --- Sumber data ---
+class SbsClient:
+    def __init__(self, host, port, table, min_backoff=0.5, max_backoff=10.0):
+        self.host = host
+        self.port = port
+        self.table = table
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), timeout=5.0) as sock:
+                    sock.settimeout(1.0)
+                    self.connected = True
+                    backoff = self.min_backoff
+                    print(f"[ADSB] connected to {self.host}:{self.port}", flush=True)
+                    self._read(sock)
+            except OSError as e:
+                print(f"[ADSB] {self.host}:{self.port}: {e}", flush=True)
+            self.connected = False
+            self._stop.wait(backoff)
+            backoff = min(self.max_backoff, backoff * 2)
+
+    def _read(self, sock):
+        tail = b""
+        while not self._stop.is_set():
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            data = tail + data
+            cut = data.rfind(b"\n") + 1
+            tail = data[cut:]
+            # satu batch per recv -> satu update_many
+            lines = data[:cut].decode("ascii", "replace").splitlines()
+            self.table.update_many(parse_sbs(lines, time.time()))
+
+
+class VrsPoller:
+    def __init__(self, url, table, interval=1.0):
+        self.url = url
+        self.table = table
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with urllib.request.urlopen(self.url, timeout=5.0) as resp:
+                    doc = json.load(resp)
+                self.table.update_many(parse_vrs(doc, time.time()))
+            except (OSError, ValueError) as e:
+                print(f"[ADSB] VRS {self.url}: {e}", flush=True)
+            self._stop.wait(self.interval)
+
+
+def replay(path, table, speed=1.0, stop=None):
+    # file capture: SBS (satu pesan per baris) atau VRS JSON (satu dokumen,
+    # atau satu dokumen per baris). speed 0 = secepatnya; jeda diambil dari
+    # timestamp SBS (generated) atau "stm" VRS (ms).
+    with open(path) as f:
+        first = f.read(1)
+        f.seek(0)
+        if first in "{[":
+            text = f.read()
+            try:
+                docs = [json.loads(text)]
+            except ValueError:
+                docs = [json.loads(line) for line in text.splitlines() if line.strip()]
+            docs = [d for doc in docs for d in (doc if isinstance(doc, list) else [doc])]
+            items = (((doc.get("stm") or 0) / 1000.0 or None, doc) for doc in docs)
+            parse = lambda doc, now: parse_vrs(doc, now)
+        else:
+            items = ((sbs_time(*line.split(",")[6:8]) if line.count(",") >= 8 else None, line)
+                     for line in f)
+            parse = lambda line, now: parse_sbs([line], now)
+
+        t0_feed = None
+        t0_wall = time.time()
+        batch = []
+        for t_feed, item in items:
+            if stop is not None and stop.is_set():
+                break
+            if speed and t_feed is not None:
+                if t0_feed is None:
+                    t0_feed = t_feed
+                delay = (t_feed - t0_feed) / speed - (time.time() - t0_wall)
+                if delay > 0:
+                    table.update_many(batch)
+                    batch = []
+                    time.sleep(delay)
+            batch.extend(parse(item, time.time()))
+            if len(batch) >= 1000:
+                table.update_many(batch)
+                batch = []
+        table.update_many(batch)
+
+
+# --- Output: bearing antena -> D<deg motor>, rate-limited ---
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class BearingCommander:
+    # D memakai sudut encoder motor 0..360 (jalur terpendek +-180 motor), jadi
+    # lompatan antena > 180 * gear_ratio dikirim sebagai S<steps> supaya
+    # antena tidak berakhir di sektor gear yang salah. Dengan wrap (CableWrap)
+    # posisi dan command dipilih planner cable wrap: putaran antena legal yang
+    # tercepat, pindah lilitan lebih dulu kalau target akan menabrak batas.
+    def __init__(self, send, gear_ratio, steps_per_rev=3200, min_interval=1.0,
+                 min_change=0.5, reply_timeout=15.0, motor_deg=0.0, on_move=None, fusion=None,
+                 preempt=False, wrap=None):
+        self.send = send
+        # fusion (BearingFusion): posisi dari encoder + profil gerak, bukan
+        # hanya akumulasi command yang dikirim
+        self.fusion = fusion
+        # on_move(antenna_delta, detik): durasi terukur tiap D/S sampai feedback
+        self.on_move = on_move
+        self.gear_ratio = gear_ratio
+        self.steps_per_rev = steps_per_rev
+        self.min_interval = min_interval
+        self.min_change = min_change
+        self.reply_timeout = reply_timeout
+        self.motor_deg = motor_deg      # estimasi posisi motor absolut (multi-turn)
+        self.lock = threading.Lock()
+        self.last_sent = -1e9
+        self.in_flight = None           # t kirim, sampai feedback [D]/[S]
+        self.in_flight_delta = 0.0
+        # preempt: D/S baru tidak menunggu feedback, langsung mengganti gerak
+        # yang sedang jalan (firmware non-blocking). Durasi gerak yang
+        # tumpang tindih tidak dipakai untuk kalibrasi on_move
+        self.preempt = preempt
+        self.overlapped = False
+        self.wrap = wrap
+        self.sent = 0
+
+    def antenna_bearing(self):
+        if self.fusion is not None:
+            return self.fusion.antenna()[0]
+        return (self.motor_deg * self.gear_ratio) % 360.0
+
+    def motor_position(self):
+        # (sudut motor sekarang, setelah command terkirim selesai), multi-turn
+        if self.fusion is not None:
+            return self.fusion.estimate()[0], self.fusion.expected()
+        return self.motor_deg, self.motor_deg
+
+    def update(self, bearing, now=None, rate=0.0):
+        # rate: perubahan bearing target (deg/s), untuk planner cable wrap
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            busy = self.in_flight is not None and now - self.in_flight < self.reply_timeout
+            if busy and not self.preempt:
+                return None
+            if now - self.last_sent < self.min_interval:
+                return None
+            if self.fusion is not None:
+                self.motor_deg = self.fusion.expected()
+            delta = wrap180(bearing - (self.motor_deg * self.gear_ratio) % 360.0)
+            if abs(delta) < self.min_change:
+                return None
+            motor_delta = delta / self.gear_ratio
+            if self.wrap is not None:
+                planned = self.wrap.plan(bearing, rate)
+                if planned is None:
+                    return None
+                cmd, antenna = planned
+                delta = antenna - self.wrap.antenna()
+                self.motor_deg += delta / self.gear_ratio
+            elif abs(motor_delta) < 180.0:
+                target = int(round((self.motor_deg + motor_delta) % 360.0)) % 360
+                cmd = f"D{target}"
+                self.motor_deg += wrap180(target - self.motor_deg % 360.0)
+            else:
+                steps = int(round(motor_delta * self.steps_per_rev / 360.0))
+                cmd = f"S{steps}"
+                self.motor_deg += steps * 360.0 / self.steps_per_rev
+            self.in_flight_delta = delta
+            self.last_sent = now
+            self.overlapped |= busy
+            self.in_flight = now
+        if self.send(cmd):
+            self.sent += 1
+            return cmd
+        with self.lock:
+            self.in_flight = None
+        return None
+
+    def on_records(self, records):
+        for rec in records:
+            if rec.label in ("D", "D-SKIP", "S", "S-SKIP", "C"):
+                with self.lock:
+                    started = None if self.overlapped else self.in_flight
+                    delta = 0.0 if rec.label.endswith("SKIP") else self.in_flight_delta
+                    self.in_flight = None
+                    self.overlapped = False
+                    if rec.label == "C":
+                        self.motor_deg = 0.0
+                if started is not None and rec.label != "C" and self.on_move is not None:
+                    self.on_move(delta, time.monotonic() - started)
+
+
+def open_output(args, on_records, reset_wait=2.0):
+    # -> send(cmd): langsung ke port serial, atau lewat hub ControlTMC2209
+    if args.port:
+        import serial
+        from feedback_parser import FeedbackParser
+        from serial_transport import SerialTransport
+        port = serial.Serial(args.port, 115200)
+        # membuka port me-reset Arduino: command ditahan di antrian transport
+        # sampai "[ARDUINO] READY !" (atau reset_wait), seperti steptrack_core
+        transport = SerialTransport(port)
+        parser = FeedbackParser()
+        ready = threading.Event()
+
+        def reader():
+            while True:
+                records = parser.read_from(port)
+                if not ready.is_set() and any(r.text and "READY" in r.text for r in records):
+                    ready.set()
+                on_records(records)
+        threading.Thread(target=reader, daemon=True).start()
+        ready.wait(reset_wait)
+        transport.start()
+        return transport.send
+    from telemetry_client import TelemetryClient
+    host, _, port = args.hub.rpartition(":")
+    client = TelemetryClient(host or "127.0.0.1", int(port), on_records=on_records,
+                             on_status=lambda msg: print(f"[ADSB] hub: {msg}", flush=True)).start()
+    return client.send
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ADS-B ingest and antenna pointing")
+    ap.add_argument("--site", required=True, help="antenna site LAT,LON[,ALT_M]")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--sbs", help="SBS-1 BaseStation feed HOST:PORT (e.g. 127.0.0.1:30003)")
+    src.add_argument("--vrs", help="VRS AircraftList.json URL")
+    src.add_argument("--replay", help="capture file (SBS lines or VRS JSON)")
+    ap.add_argument("--replay-speed", type=float, default=1.0, help="0 = as fast as possible")
+    ap.add_argument("--hub", default="127.0.0.1:5000", help="ControlTMC2209 hub HOST:PORT")
+    ap.add_argument("--port", help="talk to the Arduino directly instead of the hub")
+    ap.add_argument("--reset-wait", type=float, default=2.0, help="Arduino reset wait after opening --port (s)")
+    ap.add_argument("--dry-run", action="store_true", help="print commands, send nothing")
+    ap.add_argument("--icao", help="track only this aircraft (hex)")
+    ap.add_argument("--policy", choices=POLICIES, default="nearest", help="target selection policy")
+    ap.add_argument("--sector", help="only consider azimuths START-END (deg, clockwise), e.g. 300-60")
+    ap.add_argument("--max-range", type=float, help="only consider aircraft within N km")
+    ap.add_argument("--min-elevation", type=float, default=0.0)
+    ap.add_argument("--margin", type=float, help="hysteresis: score lead a challenger needs "
+                                                   "(km / signal / deg, policy default)")
+    ap.add_argument("--hold", type=float, default=2.0, help="hysteresis: seconds a challenger must lead")
+    ap.add_argument("--interval", type=float, default=0.5, help="pointing update period (s)")
+    ap.add_argument("--min-command-interval", type=float, default=1.0)
+    ap.add_argument("--preempt", action="store_true",
+                    help="send a new D/S without waiting for the previous move to finish")
+    ap.add_argument("--lead", action="store_true",
+                    help="predictive pointing: aim where the target will be when the move completes")
+    ap.add_argument("--deadband", type=float, default=1.5, help="lead mode: tracking error (deg) before a move")
+    ap.add_argument("--feed-latency", type=float, default=0.0,
+                    help="extra feed delay (s) not covered by message timestamps")
+    ap.add_argument("--max-age", type=float, default=60.0, help="drop aircraft not seen for N s")
+    ap.add_argument("--gear", default="76/228", help="motor/antenna teeth")
+    ap.add_argument("--wrap", default="-270,270",
+                    help="cable-wrap limits LO,HI (antenna deg from cable neutral), 'off' = none")
+    ap.add_argument("--wrap-state", help="file that keeps the antenna turn count between runs")
+    args = ap.parse_args()
+
+    site = parse_site(args.site)
+    motor_teeth, antenna_teeth = (float(x) for x in args.gear.split("/"))
+    table = AircraftTable()
+
+    commander = None
+    slew = SlewModel(motor_teeth / antenna_teeth)
+    fusion = BearingFusion(motor_teeth / antenna_teeth, slew=slew)
+
+    def on_records(records):
+        fusion.on_records(records)
+        if commander is not None:
+            commander.on_records(records)
+            if commander.wrap is not None:
+                commander.wrap.on_records(records)
+
+    if args.dry_run:
+        send = lambda cmd: True
+    else:
+        send = open_output(args, on_records, args.reset_wait)
+    # dry run tidak menerima feedback, jadi tidak menunggu [D]/[S]
+    commander = BearingCommander(fused_send(fusion, send), motor_teeth / antenna_teeth,
+                                 min_interval=args.min_command_interval,
+                                 reply_timeout=0.0 if args.dry_run else 15.0, fusion=fusion,
+                                 preempt=args.preempt)
+    limits = parse_limits(args.wrap)
+    if limits:
+        commander.wrap = CableWrap(motor_teeth / antenna_teeth, limits=limits,
+                                   position=commander.motor_position, state_path=args.wrap_state)
+
+    stop = threading.Event()
+    if args.sbs:
+        host, _, port = args.sbs.rpartition(":")
+        SbsClient(host, int(port), table).start()
+    elif args.vrs:
+        VrsPoller(args.vrs, table).start()
+    else:
+        threading.Thread(target=replay, args=(args.replay, table, args.replay_speed, stop),
+                         daemon=True).start()
+
+    lead = None
+    if args.lead:
+        lead = LeadTracker(slew, dwell=args.min_command_interval, deadband=args.deadband)
+        commander.on_move = slew.observe
+    tracked = None
+    last_t_pos = None
+
+    selector = TargetSelector(args.policy, sector=parse_sector(args.sector) if args.sector else None,
+                              max_range_km=args.max_range, min_elevation=args.min_elevation,
+                              margin=args.margin, hold=args.hold,
+                              icao=int(args.icao, 16) if args.icao else None)
+    try:
+        while True:
+            time.sleep(args.interval)
+            table.expire(time.time(), args.max_age)
+            table.compute(site)
+            snap = table.snapshot()
+            i = selector.select(snap, antenna_bearing=commander.antenna_bearing())
+            if i is None:
+                continue
+            bearing = float(snap["bearing"][i])
+            if lead is None:
+                cmd = commander.update(bearing)
+            else:
+                if snap["icao"][i] != tracked:
+                    tracked = snap["icao"][i]
+                    last_t_pos = None
+                    lead.reset()
+                t_pos = float(snap["t_pos"][i])
+                if t_pos != last_t_pos:
+                    # posisi baru saja -> satu sampel bearing pada waktu posisinya
+                    last_t_pos = t_pos
+                    lead.observe(t_pos - args.feed_latency, bearing)
+                now = time.time()
+                antenna = commander.antenna_bearing()
+                error = lead.error(now, antenna)
+                cmd = None
+                if error is not None and error > lead.deadband:
+                    aim, _ = lead.aim(now, antenna)
+                    cmd = commander.update(aim, rate=lead.predictor.rate(now))
+            if cmd:
+                print(f"[ADSB] {snap['icao'][i]:06X} {snap['callsign'][i] or '-':8s} "
+                      f"brg {snap['bearing'][i]:6.1f}° rng {snap['range'][i] / 1000:6.1f} km "
+                      f"el {snap['elevation'][i]:5.1f}° ({len(table)} aircraft) -> {cmd}", flush=True)
+    except KeyboardInterrupt:
+        print("\n[ADSB] stopped")
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,592 @@
+import argparse
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from feedback_parser import encode_frame
+
+# --- Emulator firmware AntTrack.ino (tanpa rig) ---
+# Meniru command K/S/D/C/X/T/Q/B, aturan S-SKIP/D-SKIP, laporan [SENSOR]/[P],
+# gerak AccelStepper (max speed + akselerasi) dan encoder AS5600 dengan noise.
+# Bisa dipakai lewat pty Linux (python anttrack_emulator.py) atau langsung
+# sebagai objek mirip pyserial (EmulatedSerial) di proses yang sama.
+
+STEPS_PER_REV = 200 * 16
+STEPS_PER_DEGREE = STEPS_PER_REV / 360.0
+TOLERANCE_DEG = 1.0
+MAX_SPEED = 15000.0       # steps/s
+ACCELERATION = 30000.0    # steps/s^2
+SENSOR_INTERVAL = 0.05    # checkSensor() tiap 50 ms
+MAX_STREAM_HZ = 200       # batas T<hz>
+TX_BUFFER = 64            # buffer TX HardwareSerial (byte)
+
+
+def to_int(text):
+    # String.toInt() Arduino: atol(), berhenti di karakter non-digit pertama
+    text = text.lstrip()
+    i = 0
+    if text[:1] in ("+", "-"):
+        i = 1
+    while i < len(text) and text[i].isdigit():
+        i += 1
+    try:
+        return int(text[:i])
+    except ValueError:
+        return 0
+
+
+def wrap180(deg):
+    while deg > 180:
+        deg -= 360
+    while deg < -180:
+        deg += 360
+    return deg
+
+
+class StepperModel:
+    # pendekatan kontinu dari AccelStepper: trapesium kecepatan
+    def __init__(self, max_speed=MAX_SPEED, acceleration=ACCELERATION):
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.phys = 0.0      # posisi fisik poros (step, float)
+        self.slipped = 0.0   # step yang hilang (missed steps) sejak start
+        self.offset = 0.0    # setCurrentPosition() hanya menggeser hitungan
+        self.speed = 0.0
+        self.target = 0
+
+    def current_position(self):
+        return int(round(self.phys - self.offset))
+
+    def slip(self, steps):
+        # step hilang: poros tertinggal dari hitungan (count jalan, poros tidak)
+        self.slipped += steps
+
+    def shaft(self):
+        # posisi poros sebenarnya (step) = yang dibaca encoder
+        return self.phys - self.slipped
+
+    def set_current_position(self, pos):
+        self.offset = self.phys - pos
+        self.target = pos
+        self.speed = 0.0
+
+    def move_to(self, target):
+        self.target = int(target)
+
+    def distance_to_go(self):
+        return self.target - self.current_position()
+
+    def running(self):
+        # AccelStepper::isRunning()
+        return self.speed != 0.0 or self.distance_to_go() != 0
+
+    def stop(self):
+        # AccelStepper::stop(): target = titik berhenti dengan deselerasi penuh
+        stop_dist = self.speed * self.speed / (2.0 * self.acceleration)
+        self.target = int(round(self.current_position() + math.copysign(stop_dist, self.speed)))
+        return self.target
+
+    def advance(self, dt):
+        while dt > 0:
+            h = min(dt, 0.0005)
+            dt -= h
+            dist = self.target - (self.phys - self.offset)
+            if abs(dist) < 0.5 and abs(self.speed) < self.acceleration * 0.001:
+                self.phys = self.target + self.offset
+                self.speed = 0.0
+                continue
+            direction = 1.0 if dist > 0 else -1.0
+            stop_dist = self.speed * self.speed / (2.0 * self.acceleration)
+            if self.speed * direction < 0 or abs(dist) <= stop_dist:
+                # rem (arah salah atau sudah masuk jarak berhenti)
+                dv = self.acceleration * h
+                if abs(self.speed) <= dv:
+                    self.speed = 0.0
+                else:
+                    self.speed -= math.copysign(dv, self.speed)
+            else:
+                self.speed += direction * self.acceleration * h
+                if abs(self.speed) > self.max_speed:
+                    self.speed = direction * self.max_speed
+            step = self.speed * h
+            crossing = (dist > 0 and step > dist) or (dist < 0 and step < dist)
+            if crossing and self.speed * self.speed <= 32.0 * self.acceleration:
+                # sampai di target (sisa jarak rem < 16 step); target baru yang
+                # lebih dekat dari jarak rem = lewat dulu lalu balik, seperti AccelStepper
+                self.phys = self.target + self.offset
+                self.speed = 0.0
+            else:
+                self.phys += step
+
+
+class _Line:
+    # model kabel serial: setiap chunk siap setelah waktu transmisi byte-nya
+    def __init__(self, baud):
+        self.byte_time = 10.0 / baud if baud else 0.0
+        self.chunks = deque()
+        self.free_at = 0.0
+
+    def put(self, data, now):
+        t = max(now, self.free_at) + len(data) * self.byte_time
+        self.free_at = t
+        self.chunks.append((t, data))
+
+    def backlog(self, now):
+        # byte yang masih antri di kabel (pengganti Serial.availableForWrite)
+        if not self.byte_time:
+            return 0
+        return max(0.0, self.free_at - now) / self.byte_time
+
+    def take_ready(self, now):
+        out = []
+        while self.chunks and self.chunks[0][0] <= now:
+            out.append(self.chunks.popleft()[1])
+        return b"".join(out)
+
+
+class AntTrackEmulator:
+    def __init__(self, noise_raw=0.5, initial_raw=0, time_scale=1.0, baud=115200,
+                 max_speed=MAX_SPEED, acceleration=ACCELERATION, seed=None, output=None,
+                 slip_prob=0.0, slip_steps=64, blocking=False):
+        self.stepper = StepperModel(max_speed, acceleration)
+        self.noise_raw = noise_raw
+        # missed steps: tiap gerak selesai, dengan peluang slip_prob poros
+        # tertinggal slip_steps (kelipatan 4 full step, seperti stall sungguhan)
+        self.slip_prob = slip_prob
+        self.slip_steps = slip_steps
+        # blocking=True: firmware lama (D/S/C dengan runToPosition, tanpa X)
+        self.blocking = blocking
+        self.initial_raw = initial_raw
+        self.time_scale = time_scale
+        self.output = output
+        self.rng = random.Random(seed)
+        self._rx = _Line(baud)
+        self._tx = _Line(baud)
+        self._rx_buf = bytearray()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._t0 = time.monotonic()
+        self._sim_last = 0.0
+
+        # state firmware
+        self.target_steps = 0
+        self.last_raw_angle = 0
+        self.last_command_raw = 0
+        self.motor_active = False
+        self.motor_prev_active = False
+        self.waiting_k_done = False
+        self.pending_label = None
+        self.pending_home = False
+        self.home_steps = 0
+        self.last_sensor_check = 0.0
+        self.binary_mode = False
+        self.stream_period = 0.0
+        self.last_stream = 0.0
+
+        # statistik
+        self.commands = 0
+        self.feedbacks = 0
+        self.slips = 0
+        self.stream_skipped = 0
+
+    # --- Waktu simulasi ---
+    def now(self):
+        return (time.monotonic() - self._t0) * self.time_scale
+
+    def millis(self):
+        return int(self.now() * 1000.0) & 0xFFFFFFFF
+
+    def _advance(self):
+        t = self.now()
+        if t > self._sim_last:
+            self.stepper.advance(t - self._sim_last)
+            self._sim_last = t
+
+    # --- AS5600 ---
+    def raw_angle(self):
+        phys_deg = self.stepper.shaft() / STEPS_PER_DEGREE
+        raw = self.initial_raw + phys_deg * 4096.0 / 360.0
+        if self.noise_raw:
+            raw += self.rng.gauss(0.0, self.noise_raw)
+        return int(round(raw)) % 4096
+
+    # --- Serial ---
+    def feed(self, data):
+        with self._lock:
+            self._rx.put(bytes(data), time.monotonic())
+
+    def _emit(self, data):
+        self._tx.put(data, time.monotonic())
+
+    def _pump(self, rx=True):
+        real = time.monotonic()
+        with self._lock:
+            data = self._tx.take_ready(real)
+            if rx:
+                self._rx_buf += self._rx.take_ready(real)
+        if data and self.output is not None:
+            self.output(data)
+
+    def _read_commands(self):
+        while True:
+            nl = self._rx_buf.find(b"\n")
+            if nl < 0:
+                return
+            cmd = self._rx_buf[:nl].decode("ascii", "replace")
+            del self._rx_buf[:nl + 1]
+            self.process_command(cmd)
+
+    # --- loop() ---
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self.last_raw_angle = self.raw_angle()
+            self.last_command_raw = self.last_raw_angle
+            self._emit(b"[ARDUINO] READY !\r\n")
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            self.loop_once()
+            time.sleep(0.0005)
+
+    def loop_once(self):
+        self._pump()
+        self._read_commands()
+
+        self._advance()
+        self.motor_prev_active = self.motor_active
+        self.motor_active = self.stepper.running()
+        if not self.motor_active and self.motor_prev_active:
+            self._maybe_slip()
+            self.finish_move()
+        elif self.motor_active and self.stream_period:
+            self.stream_position()
+
+        self.check_sensor()
+
+    def run_to_position(self):
+        # blocking seperti runToPosition(): serial input tidak dibaca
+        while self._running and self.stepper.distance_to_go() != 0:
+            self._advance()
+            self._pump(rx=False)
+            time.sleep(0.0005)
+        self._maybe_slip()
+
+    def start_move(self, label):
+        self.stepper.move_to(self.target_steps)
+        # S relatif ke target: homing yang belum selesai tetap berlaku
+        if label not in ("C", "S"):
+            self.pending_home = False
+        if not self.stepper.running():
+            self.apply_home()
+            self.pending_label = None
+            self.send_feedback(label)
+            self.last_command_raw = self.raw_angle()
+            return
+        # command sebelumnya yang belum selesai tidak mendapat feedback sendiri
+        self.pending_label = label
+        self.waiting_k_done = False
+
+    def apply_home(self):
+        if self.pending_home:
+            # titik home = 0 (motor di home + S yang datang selama homing)
+            self.stepper.set_current_position(self.stepper.current_position() - self.home_steps)
+            self.target_steps -= self.home_steps
+            self.pending_home = False
+
+    def finish_move(self):
+        self.apply_home()
+        if self.pending_label is not None:
+            self.send_feedback(self.pending_label)
+            self.pending_label = None
+        if self.waiting_k_done:
+            self.send_feedback("K")
+            self.waiting_k_done = False
+        self.last_command_raw = self.raw_angle()
+
+    def _maybe_slip(self):
+        if self.slip_prob and self.rng.random() < self.slip_prob:
+            self.stepper.slip(self.rng.choice((-1, 1)) * self.slip_steps)
+            self.slips += 1
+
+    # --------------------
+    def process_command(self, cmd):
+        cmd = cmd.strip()
+        self.commands += 1
+
+        if cmd.startswith("K"):
+            deg = to_int(cmd[1:])
+            steps = int(deg * STEPS_PER_DEGREE)
+            self.target_steps += steps
+            self.stepper.move_to(self.target_steps)
+            self.send_feedback("K")
+            self.waiting_k_done = True
+
+        elif cmd.startswith("S"):
+            delta_steps = to_int(cmd[1:])
+            delta_deg = delta_steps / STEPS_PER_DEGREE
+            if abs(delta_deg) < TOLERANCE_DEG:
+                self.send_feedback("S-SKIP")
+                self.last_command_raw = self.raw_angle()
+                return
+            self.target_steps += delta_steps
+            if not self.blocking:
+                self.start_move("S")
+                return
+            self.stepper.move_to(self.target_steps)
+            self.run_to_position()
+            self.send_feedback("S")
+            self.last_command_raw = self.raw_angle()
+
+        elif cmd.startswith("D"):
+            target_deg = to_int(cmd[1:])
+            if target_deg < 0 or target_deg > 360:
+                self.send_feedback("D-SKIP")
+                self.last_command_raw = self.raw_angle()
+                return
+            current_deg = self.raw_angle() * 360.0 / 4096.0
+            delta_deg = wrap180(target_deg - current_deg)
+            if abs(delta_deg) < TOLERANCE_DEG:
+                self.send_feedback("D-SKIP")
+                self.last_command_raw = self.raw_angle()
+                return
+            if not self.blocking:
+                # relatif ke posisi sekarang (bisa di tengah gerak sebelumnya)
+                self.target_steps = self.stepper.current_position() + int(delta_deg * STEPS_PER_DEGREE)
+                self.start_move("D")
+                return
+            self.target_steps += int(delta_deg * STEPS_PER_DEGREE)
+            self.stepper.move_to(self.target_steps)
+            self.run_to_position()
+            self.send_feedback("D")
+            self.last_command_raw = self.raw_angle()
+
+        elif cmd == "C":
+            current_deg = self.raw_angle() * 360.0 / 4096.0
+            delta_deg = wrap180(-current_deg)
+            delta_steps = int(delta_deg * STEPS_PER_DEGREE)
+            if not self.blocking:
+                if delta_steps == 0 and not self.stepper.running():
+                    self.stepper.set_current_position(0)
+                    self.target_steps = 0
+                    self.pending_label = None
+                    self.send_feedback("C")
+                    self.last_command_raw = self.raw_angle()
+                    return
+                self.target_steps = self.stepper.current_position() + delta_steps
+                self.home_steps = self.target_steps
+                # posisi di-nol-kan saat sampai (finish_move), kecuali dibatalkan
+                self.pending_home = True
+                self.start_move("C")
+                return
+            self.target_steps += delta_steps
+            self.stepper.move_to(self.target_steps)
+            self.run_to_position()
+            self.stepper.set_current_position(0)
+            self.target_steps = 0
+            self.send_feedback("C")
+            self.last_command_raw = self.raw_angle()
+
+        elif cmd == "X" and not self.blocking:
+            # berhenti dengan deselerasi; [X] dikirim di titik berhenti
+            self.target_steps = self.stepper.stop()
+            self.start_move("X")
+
+        elif cmd.startswith("T") and not self.blocking:
+            hz = min(max(to_int(cmd[1:]), 0), MAX_STREAM_HZ)
+            self.stream_period = 1.0 / hz if hz else 0.0
+            self.send_feedback("T")
+
+        elif cmd == "Q":
+            self.send_feedback("Q")
+            self.last_command_raw = self.raw_angle()
+
+        elif cmd in ("B1", "B0"):
+            self.binary_mode = cmd == "B1"
+            self.send_feedback("B")
+
+    def stream_position(self):
+        now = self.now()
+        if now - self.last_stream < self.stream_period:
+            return
+        need = 13 if self.binary_mode else 17
+        with self._lock:
+            backlog = self._tx.backlog(time.monotonic())
+        if backlog + need > TX_BUFFER:
+            # Serial.availableForWrite() kurang: lewati, jangan tahan stepper.run()
+            self.stream_skipped += 1
+            return
+        self.last_stream = now
+        self.send_feedback("P")
+
+    def send_feedback(self, label, raw=None):
+        if raw is None:
+            raw = self.raw_angle()
+        self.feedbacks += 1
+        if self.binary_mode:
+            self._emit(encode_frame(label, raw, self.stepper.current_position(), self.millis()))
+            return
+        self._emit(f"[{label}],{raw},{raw * 360.0 / 4096.0:.2f}\r\n".encode())
+
+    def check_sensor(self):
+        now = self.now()
+        if now - self.last_sensor_check < SENSOR_INTERVAL:
+            return
+        self.last_sensor_check = now
+
+        raw = self.raw_angle()
+        delta_raw = abs(raw - self.last_raw_angle)
+        delta_deg = abs(wrap180((raw - self.last_command_raw) * 360.0 / 4096.0))
+        if delta_raw > 2 and delta_deg > TOLERANCE_DEG and not self.motor_active:
+            self.send_feedback("SENSOR", raw)
+        self.last_raw_angle = raw
+
+
+class EmulatedSerial:
+    # objek mirip serial.Serial (write/read/readinto/readline/in_waiting)
+    def __init__(self, emulator=None, timeout=None, **kwargs):
+        self.timeout = timeout
+        self._buf = bytearray()
+        self._cond = threading.Condition()
+        self.emulator = emulator or AntTrackEmulator(**kwargs)
+        self.emulator.output = self._on_output
+        self.emulator.start()
+        self.is_open = True
+
+    def _on_output(self, data):
+        with self._cond:
+            self._buf += data
+            self._cond.notify_all()
+
+    @property
+    def in_waiting(self):
+        return len(self._buf)
+
+    def write(self, data):
+        self.emulator.feed(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while len(self._buf) < size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            data = bytes(self._buf[:size])
+            del self._buf[:size]
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def readline(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while b"\n" not in self._buf:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            nl = self._buf.find(b"\n")
+            n = nl + 1 if nl >= 0 else len(self._buf)
+            data = bytes(self._buf[:n])
+            del self._buf[:n]
+        return data
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._buf.clear()
+
+    def close(self):
+        self.is_open = False
+        self.emulator.stop()
+
+
+class PtyEmulator:
+    # emulator di ujung master pty; host membuka slave_name seperti port biasa
+    def __init__(self, emulator=None, **kwargs):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.slave_name = os.ttyname(self.slave)
+        self.emulator = emulator or AntTrackEmulator(**kwargs)
+        self.emulator.output = self._on_output
+        self._thread = None
+
+    def _on_output(self, data):
+        try:
+            os.write(self.master, data)
+        except OSError:
+            pass
+
+    def start(self):
+        self.emulator.start()
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+        return self
+
+    def _reader(self):
+        while True:
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:
+                return
+            if not data:
+                return
+            self.emulator.feed(data)
+
+    def close(self):
+        self.emulator.stop()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AntTrack firmware emulator on a pseudo-terminal")
+    ap.add_argument("--noise", type=float, default=0.5, help="AS5600 noise (raw counts, sigma)")
+    ap.add_argument("--initial-raw", type=int, default=0, help="encoder raw angle at power-up")
+    ap.add_argument("--time-scale", type=float, default=1.0, help="simulation speed factor")
+    ap.add_argument("--baud", type=int, default=115200, help="emulated line rate (0 = unlimited)")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--slip-prob", type=float, default=0.0, help="chance of lost steps per completed move")
+    ap.add_argument("--slip-steps", type=int, default=64, help="steps lost per slip")
+    ap.add_argument("--blocking", action="store_true", help="emulate the old firmware (blocking D/S/C, no X)")
+    args = ap.parse_args()
+
+    pty_emu = PtyEmulator(noise_raw=args.noise, initial_raw=args.initial_raw,
+                          time_scale=args.time_scale, baud=args.baud, seed=args.seed,
+                          slip_prob=args.slip_prob, slip_steps=args.slip_steps,
+                          blocking=args.blocking).start()
+    print(f"[EMU] AntTrack emulator on {pty_emu.slave_name}", flush=True)
+    print(f"[EMU] e.g. STEPTRACK_PORT={pty_emu.slave_name} python ControlTMC2209.py", flush=True)
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("\n[EMU] stopped")
+    finally:
+        pty_emu.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+import math
+import threading
+import time
+from collections import deque
+
+from lead_tracker import MAX_SPEED, ACCELERATION, trapezoid_time, wrap180
+
+# --- Fusi bearing: satu estimasi posisi + rate motor dari semua sumber ---
+# Filter Kalman 2 state [sudut motor absolut (multi-turn, deg), rate sisa
+# (deg/s)], semua update O(1):
+#   - encoder: [SENSOR] dan sudut di setiap feedback (K/S/D/C/Q/...) adalah
+#     pengukuran sudut motor 0..360, di-unwrap ke putaran terdekat estimasi
+#   - command K/S/D/C/X (UI, knob, hub, tracker) adalah input kontrol: tiap
+#     command jadi segmen profil trapezoid AccelStepper, dan predict()
+#     menggeser sudut sebesar perpindahan profil dalam dt. Command baru saat
+#     motor masih jalan mengganti target (kecepatan diteruskan, atau rem dulu
+#     kalau arah berbalik), seperti firmware non-blocking. blocking=True untuk
+#     firmware lama: D/S/C antri di belakang runToPosition
+#   - pengamatan arah antena dari luar (mis. puncak RSSI pada bearing target
+#     yang diketahui) lewat observe_antenna() dengan sigma sendiri
+# Rate state hanya rate yang TIDAK dijelaskan command (slip, putar manual);
+# rate yang dilaporkan = rate profil + rate sisa.
+
+STEPS_PER_REV = 3200
+TOLERANCE_DEG = 1.0            # toleranceDeg firmware: D/S lebih kecil di-SKIP
+BLOCKING = ("S", "D", "C")     # runToPosition di AntTrack.ino versi lama
+DONE_LABELS = ("S", "D", "C", "X")   # non-blocking: dikirim saat motor berhenti ([K] juga ack langsung)
+
+
+def trapezoid_position(steps, t, max_speed=MAX_SPEED, acceleration=ACCELERATION):
+    # (posisi, kecepatan) dalam step setelah t detik, profil trapezoid dari diam ke diam
+    n = abs(steps)
+    if n == 0 or t <= 0:
+        return 0.0, 0.0
+    total = trapezoid_time(n, max_speed, acceleration)
+    sign = 1.0 if steps > 0 else -1.0
+    if t >= total:
+        return sign * n, 0.0
+    t_acc = min(max_speed / acceleration, total / 2.0)
+    v_peak = acceleration * t_acc
+    if t < t_acc:
+        return sign * 0.5 * acceleration * t * t, sign * acceleration * t
+    left = total - t
+    if left < t_acc:
+        return sign * (n - 0.5 * acceleration * left * left), sign * acceleration * left
+    return sign * (0.5 * v_peak * t_acc + v_peak * (t - t_acc)), sign * v_peak
+
+
+class _Segment:
+    __slots__ = ("kind", "steps", "t0", "start", "t_end", "cut", "scale", "pre")
+
+    def __init__(self, kind, steps, t0, scale, pre=0.0, start=None):
+        # pre: step profil "virtual" sebelum start (K retarget saat motor masih
+        # jalan: AccelStepper meneruskan kecepatan, bukan mulai dari diam)
+        self.kind = kind
+        self.steps = steps
+        self.t0 = t0
+        self.start = t0 if start is None else start
+        self.scale = scale
+        self.pre = pre
+        self.t_end = t0 + scale * trapezoid_time(steps)
+        self.cut = self.t_end        # K baru memotong profil K yang sedang jalan
+
+    def shift(self, dt):
+        self.t0 += dt
+        self.start += dt
+        self.t_end += dt
+        self.cut += dt
+
+    def state(self, t):
+        # (posisi, kecepatan) dalam step sejak start; kecepatan per detik nyata
+        t = min(max(t, self.start), self.cut)
+        pos, vel = trapezoid_position(self.steps, (t - self.t0) / self.scale)
+        if t >= self.cut:
+            vel = 0.0
+        return pos - self.pre, vel / self.scale
+
+    def disp(self, t, deg_per_step):
+        pos, vel = self.state(t)
+        return pos * deg_per_step, vel * deg_per_step
+
+
+class BearingFusion:
+    def __init__(self, gear_ratio, steps_per_rev=STEPS_PER_REV, encoder_sigma=0.15,
+                 rate_noise=2.0, rate_tau=0.3, model_error=0.02, latency=0.005,
+                 slew=None, blocking=False, clock=time.perf_counter):
+        self.gear_ratio = gear_ratio
+        self.steps_per_rev = steps_per_rev
+        self.deg_per_step = 360.0 / steps_per_rev
+        self.encoder_var = encoder_sigma ** 2
+        self.rate_noise = rate_noise        # densitas noise percepatan sisa (deg^2/s^3)
+        self.rate_tau = rate_tau            # rate sisa meluruh ke 0 (stepper menahan posisi)
+        self.model_error = model_error      # fraksi perpindahan profil sebagai noise proses
+        self.latency = latency              # write -> mulai gerak (s)
+        self.slew = slew                    # SlewModel opsional: pakai skala durasi terkalibrasi
+        self.blocking = blocking            # firmware lama: D/S/C blocking
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self.angle = 0.0
+        self.rate = 0.0
+        self.p00, self.p01, self.p11 = 1e4, 0.0, 1e2   # belum ada pengukuran
+        self.t = None
+        self.segments = deque()             # profil command yang belum selesai, urut waktu
+        self.acks = deque()                 # per command blocking: segmen atau None (SKIP)
+
+        # statistik
+        self.measurements = 0
+        self.commands = 0
+        self.last_innovation = 0.0
+
+    # --- Profil command ---
+    def _scale(self):
+        return self.slew.scale if self.slew is not None else 1.0
+
+    def _control(self, t0, t1):
+        # perpindahan profil dalam [t0, t1] dan kecepatan profil di t1
+        du = v = 0.0
+        for seg in self.segments:
+            if seg.start >= t1:
+                break
+            d1, v1 = seg.disp(t1, self.deg_per_step)
+            d0, _ = seg.disp(t0, self.deg_per_step)
+            du += d1 - d0
+            v += v1
+        return du, v
+
+    def _pending(self, t):
+        # sisa perpindahan profil setelah t (posisi akhir yang diharapkan)
+        rest = 0.0
+        for seg in self.segments:
+            full, _ = seg.disp(seg.cut, self.deg_per_step)
+            done, _ = seg.disp(t, self.deg_per_step)
+            rest += full - done
+        return rest
+
+    def _start_time(self, kind, now):
+        t0 = now + self.latency
+        if self.blocking and (kind in BLOCKING or self.segments):
+            # firmware memproses serial setelah runToPosition selesai
+            for seg in self.segments:
+                if seg.kind in BLOCKING:
+                    t0 = max(t0, seg.t_end)
+        return t0
+
+    def _add(self, kind, steps, t0, absolute=False):
+        # absolute: steps dihitung dari posisi sekarang (D/C/X), bukan dari target
+        scale = self._scale()
+        rest = v = 0.0
+        for old in list(self.segments):
+            if not (old.kind == "K" or not self.blocking) or t0 >= old.cut:
+                continue
+            if old.start > t0:
+                # belum mulai (mis. sisa setelah rem): seluruhnya ikut ke target baru
+                rest += old.steps - old.pre
+                self.segments.remove(old)
+                continue
+            # retarget: gerak lama dipotong, sisanya ikut ke target baru
+            pos, vel = old.state(t0)
+            old.cut = t0
+            rest += old.steps - old.pre - pos
+            v += vel * scale                             # kecepatan dalam waktu profil
+        if not absolute:
+            steps += rest
+        segs = []
+        pre = math.copysign(v * v / (2.0 * ACCELERATION), v) if v else 0.0
+        if kind == "X":
+            # stepper.stop(): rem penuh sampai berhenti, tidak kembali ke titik X
+            steps = pre
+        t_virtual = t0 - scale * abs(v) / ACCELERATION  # profil "dari diam" yang sampai kecepatan v di t0
+        if v * steps > 0 and abs(steps) > abs(pre):
+            # searah dan cukup jauh: kecepatan diteruskan
+            segs.append(_Segment(kind, steps + pre, t_virtual, scale, pre, t0))
+        else:
+            if v:
+                # berbalik / terlalu dekat: rem penuh dulu, sisanya dari diam
+                stop = _Segment(kind, 2.0 * pre, t_virtual, scale, pre, t0)
+                segs.append(stop)
+                steps -= pre
+                t0 = stop.t_end
+            if abs(steps) >= 0.5:
+                segs.append(_Segment(kind, steps, t0, scale))
+        self.segments.extend(segs)
+        if self.blocking and kind in BLOCKING:
+            self.acks.append(segs[-1] if segs else None)
+        self.commands += 1
+
+    def command(self, cmd, now=None):
+        # cmd seperti yang ditulis ke serial: K<deg>, S<steps>, D<deg>, C, X
+        if now is None:
+            now = self.clock()
+        kind = cmd[:1]
+        if kind not in ("K", "S", "D", "C", "X") or (kind == "X" and self.blocking):
+            return
+        with self.lock:
+            self._predict(now)
+            t0 = self._start_time(kind, now)
+            absolute = kind in ("D", "C", "X") and not self.blocking
+            try:
+                if kind == "K":
+                    steps = int(int(cmd[1:]) * self.steps_per_rev / 360.0)
+                elif kind == "S":
+                    steps = int(cmd[1:])
+                    if abs(steps * self.deg_per_step) < TOLERANCE_DEG:
+                        if not self.blocking:
+                            return          # S-SKIP: gerak yang jalan tidak diubah
+                        steps = 0
+                elif kind == "X":
+                    steps = 0               # diganti jarak rem di _add
+                else:
+                    target = float(cmd[1:]) if kind == "D" else 0.0
+                    if not 0.0 <= target <= 360.0:
+                        if self.blocking:
+                            self.acks.append(None)
+                        return
+                    # firmware menghitung jalur terpendek dari encoder saat command
+                    # diproses (blocking: setelah gerak sebelumnya selesai)
+                    if self.blocking:
+                        start = self.angle + self._pending(t0)
+                    else:
+                        start = self.angle + self._control(now, t0)[0]
+                    delta = wrap180(target - start % 360.0)
+                    if abs(delta) < TOLERANCE_DEG:
+                        if not self.blocking:
+                            return          # D-SKIP
+                        steps = 0
+                    else:
+                        steps = int(delta * self.steps_per_rev / 360.0)
+            except ValueError:
+                return
+            self._add(kind, steps, t0, absolute)
+
+    # dipasang sebagai SerialTransport(on_write=...), bersama tracer
+    def on_write(self, frames, t_write):
+        for cmd, _ in frames:
+            self.command(cmd, t_write)
+
+    def _complete(self, now):
+        # feedback D/S/C: command blocking terlama selesai, apa pun kata profil
+        if not self.acks:
+            return
+        seg = self.acks.popleft()
+        if seg is None or seg not in self.segments:
+            return
+        full, _ = seg.disp(seg.cut, self.deg_per_step)
+        done, _ = seg.disp(now, self.deg_per_step)
+        self.angle += full - done
+        self.segments.remove(seg)
+        late = now - seg.t_end
+        for other in self.segments:
+            if other.t0 >= seg.t_end:
+                other.shift(late)
+
+    def _settle(self, now):
+        # non-blocking: feedback gerak = motor sudah berhenti; semua profil
+        # yang dimulai sebelum feedback ini dianggap selesai
+        for seg in list(self.segments):
+            if seg.start <= now:
+                full, _ = seg.disp(seg.cut, self.deg_per_step)
+                done, _ = seg.disp(now, self.deg_per_step)
+                self.angle += full - done
+                self.segments.remove(seg)
+
+    # --- Filter ---
+    def _predict(self, now):
+        if self.t is None:
+            self.t = now
+            return
+        dt = now - self.t
+        if dt <= 0:
+            return
+        du, _ = self._control(self.t, now)
+        decay = math.exp(-dt / self.rate_tau)
+        self.angle += du + self.rate * self.rate_tau * (1.0 - decay)
+        f = self.rate_tau * (1.0 - decay)
+        # P = F P F' + Q, F = [[1, f], [0, decay]]
+        p00 = self.p00 + 2.0 * f * self.p01 + f * f * self.p11
+        p01 = decay * (self.p01 + f * self.p11)
+        p11 = decay * decay * self.p11
+        q = self.rate_noise
+        self.p00 = p00 + q * dt ** 3 / 3.0 + (self.model_error * du) ** 2
+        self.p01 = p01 + q * dt * dt / 2.0
+        self.p11 = p11 + q * dt
+        self.rate *= decay
+        self.t = now
+        while self.segments and self.segments[0].cut <= now:
+            seg = self.segments.popleft()
+            if seg in self.acks:
+                # profil sudah selesai; feedback-nya tinggal menyinkronkan waktu
+                self.acks[self.acks.index(seg)] = None
+
+    def _update(self, z, var):
+        s = self.p00 + var
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        self.last_innovation = z - self.angle
+        self.angle += k0 * self.last_innovation
+        self.rate += k1 * self.last_innovation
+        p01 = self.p01
+        self.p11 -= k1 * p01
+        self.p01 = (1.0 - k0) * p01
+        self.p00 = (1.0 - k0) * self.p00
+        self.measurements += 1
+
+    def observe_encoder(self, deg, now=None, sigma=None):
+        # sudut encoder motor 0..360 -> putaran terdekat dari estimasi
+        if now is None:
+            now = self.clock()
+        var = self.encoder_var if sigma is None else sigma * sigma
+        with self.lock:
+            self._predict(now)
+            self._update(self.angle + wrap180(deg - self.angle), var)
+
+    def observe_antenna(self, bearing, sigma, now=None):
+        # arah antena 0..360 dari sumber luar; sigma dalam deg antena
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            self._predict(now)
+            antenna = self.angle * self.gear_ratio
+            z = (antenna + wrap180(bearing - antenna)) / self.gear_ratio
+            self._update(z, (sigma / self.gear_ratio) ** 2)
+
+    def on_records(self, records, now=None):
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            self._predict(now)
+            for rec in records:
+                if rec.label is None or rec.deg is None or rec.label == "B":
+                    continue
+                if self.blocking and rec.label in ("S", "S-SKIP", "D", "D-SKIP", "C"):
+                    self._complete(now)
+                elif not self.blocking and rec.label in DONE_LABELS:
+                    self._settle(now)
+                self._update(self.angle + wrap180(rec.deg - self.angle), self.encoder_var)
+
+    def reset(self, angle=0.0):
+        with self.lock:
+            self.angle = angle
+            self.rate = 0.0
+            self.p00, self.p01, self.p11 = 1e4, 0.0, 1e2
+            self.segments.clear()
+            self.acks.clear()
+            self.t = None
+
+    # --- Output ---
+    def estimate(self, now=None):
+        # -> (sudut motor absolut, rate deg/s, sigma deg)
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            self._predict(now)
+            _, v = self._control(now, now)
+            return self.angle, self.rate + v, math.sqrt(max(self.p00, 0.0))
+
+    def antenna(self, now=None):
+        # -> (bearing antena 0..360, rate deg/s, sigma deg)
+        angle, rate, sigma = self.estimate(now)
+        g = self.gear_ratio
+        return (angle * g) % 360.0, rate * g, sigma * g
+
+    def expected(self, now=None):
+        # sudut motor setelah semua command yang sudah dikirim selesai
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            self._predict(now)
+            return self.angle + self._pending(now)
+
+    def moving(self, now=None):
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            self._predict(now)
+            return bool(self.segments) or abs(self.rate) > 0.5
+
+    def snapshot(self, now=None):
+        angle, rate, sigma = self.estimate(now)
+        return {
+            "motor_deg": round(angle, 3),
+            "antenna_deg": round((angle * self.gear_ratio) % 360.0, 3),
+            "rate_dps": round(rate, 2),
+            "sigma_deg": round(sigma, 3),
+            "segments": len(self.segments),
+            "measurements": self.measurements,
+            "commands": self.commands,
+        }
+
+
+def fused_send(fusion, send):
+    # bungkus send(cmd) tracker supaya setiap command juga masuk ke filter
+    def send_and_track(cmd):
+        fusion.command(cmd)
+        return send(cmd)
+    return send_and_track
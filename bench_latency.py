@@ -0,0 +1,356 @@
+import argparse
+import json
+import os
+import platform
+import random
+import threading
+import time
+from collections import deque
+
+from feedback_parser import FeedbackParser
+from knob_input import KnobEngine
+from serial_transport import SerialTransport
+
+# --- Benchmark latensi end-to-end: knob -> K -> [K], D/S/Q round-trip ---
+# Endpoint: rig sebenarnya / pty emulator (--port) atau EmulatedSerial in-process.
+# Hasil (p50/p95/p99, cmd/s, CPU per komponen) ditulis ke file JSON supaya
+# bisa dibandingkan antar build (--compare hasil_lama.json).
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return None
+    k = max(0, min(len(sorted_vals) - 1, int(round(q / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+def summarize(latencies, elapsed, commands):
+    vals = sorted(v * 1000.0 for v in latencies)
+    return {
+        "samples": len(vals),
+        "commands": commands,
+        "p50_ms": percentile(vals, 50),
+        "p95_ms": percentile(vals, 95),
+        "p99_ms": percentile(vals, 99),
+        "mean_ms": sum(vals) / len(vals) if vals else None,
+        "max_ms": vals[-1] if vals else None,
+        "throughput_cmd_s": commands / elapsed if elapsed > 0 else None,
+    }
+
+
+def thread_cpu(native_id):
+    # utime+stime per thread dari /proc (Linux); None kalau tidak tersedia
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _CountingPort:
+    # catat native id thread penulis (writer thread transport)
+    def __init__(self, port):
+        self.port = port
+        self.writer_id = None
+
+    def write(self, data):
+        self.writer_id = threading.get_native_id()
+        return self.port.write(data)
+
+
+class Rig:
+    def __init__(self, port):
+        self.port = port
+        self.counting = _CountingPort(port)
+        self.transport = SerialTransport(self.counting).start()
+        self.parser = FeedbackParser()
+        self.cond = threading.Condition()
+        self.waiters = deque()   # (labels, callback)
+        self.reader_id = None
+        self.records = 0
+        threading.Thread(target=self._reader, daemon=True).start()
+
+    def _reader(self):
+        self.reader_id = threading.get_native_id()
+        while True:
+            try:
+                records = self.parser.read_from(self.port)
+            except Exception:
+                return
+            now = time.perf_counter()
+            with self.cond:
+                for rec in records:
+                    if rec.label is None:
+                        continue
+                    self.records += 1
+                    # waiter pertama yang cocok dengan label ini
+                    for i, (labels, callback) in enumerate(self.waiters):
+                        if rec.label in labels:
+                            del self.waiters[i]
+                            callback(rec, now)
+                            break
+                self.cond.notify_all()
+
+    def expect(self, labels, callback):
+        with self.cond:
+            self.waiters.append((labels, callback))
+
+    def round_trip(self, cmd, labels, timeout=10.0):
+        done = []
+        self.expect(labels, lambda rec, now: done.append(now))
+        t0 = time.perf_counter()
+        self.transport.send(cmd)
+        with self.cond:
+            self.cond.wait_for(lambda: done, timeout)
+        if not done:
+            with self.cond:
+                self.waiters.clear()
+            return None
+        return done[0] - t0
+
+    def settle(self, quiet=0.3, timeout=5.0):
+        # tunggu sampai tidak ada feedback lagi (mis. K-done, SENSOR)
+        deadline = time.perf_counter() + timeout
+        last = self.records
+        while time.perf_counter() < deadline:
+            time.sleep(quiet)
+            if self.records == last:
+                break
+            last = self.records
+        with self.cond:
+            self.waiters.clear()
+
+
+# --- Skenario ---
+def bench_round_trip(rig, make_cmd, labels, count):
+    lat = []
+    t0 = time.perf_counter()
+    for i in range(count):
+        dt = rig.round_trip(make_cmd(i), labels)
+        if dt is not None:
+            lat.append(dt)
+    return summarize(lat, time.perf_counter() - t0, count)
+
+
+def bench_pipelined_q(rig, count):
+    lat = []
+    t_sent = {}
+    lock = threading.Lock()
+    all_done = threading.Event()
+
+    def on_q(i):
+        def cb(rec, now):
+            with lock:
+                lat.append(now - t_sent[i])
+                if len(lat) == count:
+                    all_done.set()
+        return cb
+
+    t0 = time.perf_counter()
+    for i in range(count):
+        rig.expect(("Q",), on_q(i))
+        t_sent[i] = time.perf_counter()
+        rig.transport.send("Q")
+    all_done.wait(30.0)
+    return summarize(lat, time.perf_counter() - t0, count)
+
+
+def spin(on_detent, detents, rate_hz):
+    # putaran bolak-balik tiap 40 detent, jeda detent eksponensial
+    rnd = random.Random(7)
+    for i in range(detents):
+        on_detent(1 if (i // 40) % 2 == 0 else -1, time.perf_counter())
+        time.sleep(rnd.expovariate(rate_hz))
+
+
+def bench_knob(rig, detents, rate_hz, knob_cpu):
+    # KnobEngine (event-driven) seperti di ControlTMC2209.py
+    lat = []
+    sends = [0]
+
+    def emit(deg, stamps):
+        rig.expect(("K",), lambda rec, now: lat.extend(now - t for t in stamps))
+        rig.transport.send(f"K{deg}")
+        sends[0] += 1
+        # CPU worker thread (thread sudah hilang dari /proc setelah stop)
+        knob_cpu[:] = [time.thread_time()]
+
+    engine = KnobEngine(emit).start()
+    t0 = time.perf_counter()
+    spin(engine.on_detent, detents, rate_hz)
+    time.sleep(0.3)
+    engine.stop()
+    return summarize(lat, time.perf_counter() - t0, sends[0])
+
+
+def bench_knob_poll(rig, detents, rate_hz):
+    # send_knob_loop lama (poll 50 ms, scale 1/2) sebagai pembanding
+    lock = threading.Lock()
+    state = {"delta": 0, "stamps": [], "acc": 0}
+    lat = []
+    sends = [0]
+    stop = threading.Event()
+
+    def on_ack(stamps):
+        def cb(rec, now):
+            lat.extend(now - t for t in stamps)
+        return cb
+
+    def send_knob_loop():
+        interval = 0.05
+        while not stop.is_set():
+            time.sleep(interval)
+            with lock:
+                d = state["delta"]
+                stamps = state["stamps"]
+                state["delta"] = 0
+                state["stamps"] = []
+            if d != 0:
+                sign = 1 if d > 0 else -1
+                scale = 1 if abs(d) <= 3 else 2
+                state["acc"] += sign * abs(d) * scale
+                move_steps = int(state["acc"])
+                if move_steps != 0:
+                    rig.expect(("K",), on_ack(stamps))
+                    rig.transport.send(f"K{move_steps}")
+                    sends[0] += 1
+                    state["acc"] -= move_steps
+
+    t = threading.Thread(target=send_knob_loop, daemon=True)
+    t.start()
+    def on_detent(delta, now):
+        with lock:
+            state["delta"] += delta
+            state["stamps"].append(now)
+
+    t0 = time.perf_counter()
+    spin(on_detent, detents, rate_hz)
+    time.sleep(0.3)
+    stop.set()
+    t.join()
+    return summarize(lat, time.perf_counter() - t0, sends[0])
+
+
+def open_endpoint(args):
+    if args.port:
+        import serial
+        port = serial.Serial(args.port, args.baud)
+        time.sleep(args.reset_wait)
+        return port, None
+    from anttrack_emulator import EmulatedSerial
+    port = EmulatedSerial(noise_raw=args.noise, seed=1)
+    return port, port.emulator
+
+
+def compare(result, old_path, tolerance):
+    with open(old_path) as f:
+        old = json.load(f)
+    regressions = []
+    print(f"\n--- compare with {old_path} ---")
+    for name, cur in result["paths"].items():
+        prev = old.get("paths", {}).get(name)
+        if not prev:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            a, b = prev.get(key), cur.get(key)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a * 100.0 if a else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = "  <-- REGRESSION"
+                regressions.append(f"{name}.{key}")
+            print(f"{name:12s} {key:7s} {a:9.2f} -> {b:9.2f} ms ({change:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end latency benchmark for the StepTrack serial paths")
+    ap.add_argument("--port", help="serial port / pty (default: in-process emulator)")
+    ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--reset-wait", type=float, default=2.0, help="Arduino reset wait after open (s)")
+    ap.add_argument("--noise", type=float, default=0.5, help="emulator AS5600 noise")
+    ap.add_argument("--detents", type=int, default=400)
+    ap.add_argument("--knob-rate", type=float, default=40.0, help="mean detents per second")
+    ap.add_argument("--moves", type=int, default=20, help="D and S round-trips")
+    ap.add_argument("--queries", type=int, default=200, help="Q round-trips")
+    ap.add_argument("--out", default="bench_latency.json")
+    ap.add_argument("--compare", help="previous result file")
+    ap.add_argument("--tolerance", type=float, default=20.0, help="regression threshold in percent")
+    args = ap.parse_args()
+
+    port, emulator = open_endpoint(args)
+    rig = Rig(port)
+    rig.settle()
+    cpu0 = time.process_time()
+    t_start = time.perf_counter()
+    rnd = random.Random(3)
+    paths = {}
+    knob_cpu = []
+
+    print("[BENCH] Q round-trip...", flush=True)
+    paths["Q"] = bench_round_trip(rig, lambda i: "Q", ("Q",), args.queries)
+    print("[BENCH] Q pipelined...", flush=True)
+    paths["Q_pipelined"] = bench_pipelined_q(rig, args.queries)
+    rig.settle()
+
+    print("[BENCH] knob -> K...", flush=True)
+    paths["knob"] = bench_knob(rig, args.detents, args.knob_rate, knob_cpu)
+    rig.settle()
+    print("[BENCH] knob (50 ms poll, old) -> K...", flush=True)
+    paths["knob_poll"] = bench_knob_poll(rig, args.detents, args.knob_rate)
+    rig.settle()
+
+    print("[BENCH] D round-trip...", flush=True)
+    paths["D"] = bench_round_trip(rig, lambda i: f"D{rnd.randrange(0, 360)}", ("D", "D-SKIP"), args.moves)
+    rig.settle()
+
+    print("[BENCH] S round-trip...", flush=True)
+    paths["S"] = bench_round_trip(
+        rig, lambda i: f"S{rnd.choice((-1, 1)) * rnd.randrange(100, 3200)}", ("S", "S-SKIP"), args.moves)
+
+    elapsed = time.perf_counter() - t_start
+    cpu = {
+        "process_s": time.process_time() - cpu0,
+        "wall_s": elapsed,
+        "reader_s": thread_cpu(rig.reader_id) if rig.reader_id else None,
+        "writer_s": thread_cpu(rig.counting.writer_id) if rig.counting.writer_id else None,
+        "knob_loop_s": knob_cpu[0] if knob_cpu else None,
+    }
+    if emulator is not None and emulator._thread is not None:
+        cpu["emulator_s"] = thread_cpu(emulator._thread.native_id)
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "endpoint": args.port or "emulator",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "paths": paths,
+        "cpu": cpu,
+        "transport": rig.transport.stats(),
+    }
+
+    for name, p in paths.items():
+        if p["samples"]:
+            print(f"{name:12s} n={p['samples']:4d}  p50 {p['p50_ms']:8.2f}  p95 {p['p95_ms']:8.2f}  "
+                  f"p99 {p['p99_ms']:8.2f} ms  {p['throughput_cmd_s']:8.1f} cmd/s")
+        else:
+            print(f"{name:12s} no samples")
+    print("cpu:", ", ".join(f"{k} {v:.3f}" for k, v in cpu.items() if v is not None))
+
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"[BENCH] results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(result, args.compare, args.tolerance)
+        if regressions:
+            print(f"[BENCH] {len(regressions)} regression(s): {', '.join(regressions)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import io
+import random
+import sys
+import time
+
+from feedback_parser import Feedback, FeedbackParser, encode_frame
+
+# --- Micro-benchmark: parser lama (readline/decode/split) vs FeedbackParser ---
+# Jalankan: python bench_parser.py [jumlah_baris]
+# Semua jalur membaca input yang sama (bytes di memori, per chunk) dan
+# mengambil field yang sama (label, raw, deg -> Feedback). Jumlah baris
+# terparse harus sama dengan jumlah baris input, kalau tidak ditandai LOSSY.
+# pyserial loop:// hanya sebagai referensi biaya readline byte per byte.
+
+
+def make_stream(n_lines, seed=1):
+    rnd = random.Random(seed)
+    labels = ["SENSOR", "SENSOR", "SENSOR", "K", "S", "D", "D-SKIP", "Q"]
+    lines = []
+    for _ in range(n_lines):
+        raw = rnd.randrange(4096)
+        lines.append(f"[{rnd.choice(labels)}],{raw},{raw * 360.0 / 4096.0:.2f}\r\n")
+    return "".join(lines).encode()
+
+
+def make_binary_stream(n_frames, seed=1):
+    rnd = random.Random(seed)
+    labels = ["SENSOR", "SENSOR", "SENSOR", "K", "S", "D", "D-SKIP", "Q"]
+    return b"".join(
+        encode_frame(rnd.choice(labels), rnd.randrange(4096), rnd.randrange(-100000, 100000), i)
+        for i in range(n_frames)
+    )
+
+
+def legacy_parse_line(line):
+    # sama seperti read_arduino sebelumnya, tapi field sama dengan
+    # FeedbackParser (label, raw, deg -> Feedback) supaya adil
+    line = line.decode('utf-8').strip()
+    if not line:
+        return None
+    parts = line.split(",")
+    if len(parts) >= 3:
+        label = parts[0].strip("[]")
+        try:
+            raw = int(parts[1])
+            angle = float(parts[2])
+        except:
+            return None
+        return Feedback(label, raw, angle)
+    return None
+
+
+class _BytesPort:
+    # port palsu dengan in_waiting/readinto: sumber input yang sama untuk
+    # semua jalur, `chunk` byte per read seperti buffer UART
+    def __init__(self, data, chunk):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.chunk = chunk
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, len(self.data) - self.pos)
+
+    def readinto(self, b):
+        n = min(len(b), self.chunk, len(self.data) - self.pos)
+        b[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+class _RawPort(io.RawIOBase):
+    # _BytesPort sebagai stream untuk readline() (io.BufferedReader)
+    def __init__(self, port):
+        self.port = port
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self.port.readinto(b)
+
+
+def bench_legacy_readline(data, chunk=4096):
+    # readline lama di atas sumber yang sama dengan FeedbackParser
+    f = io.BufferedReader(_RawPort(_BytesPort(data, chunk)), chunk)
+    t0 = time.perf_counter()
+    count = 0
+    for line in iter(f.readline, b""):
+        if legacy_parse_line(line) is not None:
+            count += 1
+    return count, time.perf_counter() - t0
+
+
+def bench_legacy_pyserial(data, chunk=4096):
+    # readline() pyserial membaca byte per byte, seperti di rig sebenarnya.
+    # Baris yang terpotong batas chunk disambung ke read berikutnya (lossless)
+    try:
+        import serial
+    except ImportError:
+        return None
+    port = serial.serial_for_url("loop://", timeout=0)
+    count = 0
+    elapsed = 0.0
+    partial = b""
+    for i in range(0, len(data), chunk):     # buffer loop:// hanya 4 KiB
+        port.write(data[i:i + chunk])
+        t0 = time.perf_counter()
+        while port.in_waiting:
+            line = partial + port.readline()
+            if not line.endswith(b"\n"):
+                partial = line
+                break
+            partial = b""
+            if legacy_parse_line(line) is not None:
+                count += 1
+        elapsed += time.perf_counter() - t0
+    port.close()
+    return count, elapsed
+
+
+def bench_parser(data, chunk=4096):
+    parser = FeedbackParser()
+    port = _BytesPort(data, chunk)
+    t0 = time.perf_counter()
+    count = 0
+    while port.pos < len(data):
+        count += len(parser.read_from(port))
+    return count, time.perf_counter() - t0
+
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    data = make_stream(n_lines)
+    print(f"{n_lines} lines, {len(data)} bytes")
+
+    results = [
+        ("legacy readline (4 KiB)", bench_legacy_readline(data, 4096)),
+        ("legacy readline (256 B)", bench_legacy_readline(data, 256)),
+        ("FeedbackParser.read_from (4 KiB)", bench_parser(data, 4096)),
+        ("FeedbackParser.read_from (256 B)", bench_parser(data, 256)),
+        ("legacy pyserial readline (loop://)", bench_legacy_pyserial(data)),
+        ("FeedbackParser binary frames (4 KiB)", bench_parser(make_binary_stream(n_lines), 4096)),
+    ]
+    for name, res in results:
+        if res is None:
+            print(f"{name:38s} skipped (pyserial not installed)")
+            continue
+        count, elapsed = res
+        lossy = "" if count == n_lines else "  LOSSY"
+        print(f"{name:38s} {count / elapsed:12,.0f} lines/s  ({count} parsed, {elapsed:.3f} s){lossy}")
+
+
+if __name__ == "__main__":
+    main()
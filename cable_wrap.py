@@ -0,0 +1,250 @@
+import json
+import math
+import os
+import threading
+
+from lead_tracker import MAX_SPEED, ACCELERATION, trapezoid_time, wrap180
+
+# --- Cable wrap: posisi antena multi-turn + batas lilitan kabel mast ---
+# Encoder AS5600 ada di motor (0..360) dan antena berputar gear_ratio kali
+# motor. D/C di firmware selalu ambil jalur terpendek +-180 motor, dan host
+# meng-unwrap feedback ke putaran terdekat, jadi tidak ada yang tahu antena
+# sudah berapa putaran dari posisi kabel netral -> unwind panjang yang tidak
+# perlu, atau kabel terpuntir. CableWrap:
+#   - posisi: sudut motor multi-turn dari sumber yang sudah ada (BearingFusion,
+#     RigArray, BearingCommander) + offset kelipatan 360, supaya 0 = kabel
+#     netral. Offset diambil dari state file (posisi terakhir saat motor diam)
+#     pada feedback pertama; tanpa state file posisi start dianggap netral
+#   - batas lilitan dalam deg antena dari netral, plus margin untuk planner
+#   - plan(azimuth, rate): dari semua posisi antena azimuth + 360k yang legal,
+#     pilih yang tercepat dicapai (profil trapezoid AccelStepper). Kalau target
+#     (rate dari prediksi tracker) akan menabrak batas dalam `horizon` detik,
+#     posisi itu kena penalti unwind -> antena pindah lilitan lebih dulu, saat
+#     masih murah, bukan di tengah tracking
+#   - guard(cmd): D/S/K operator yang melewati batas dialihkan (D -> S ke
+#     putaran legal dengan sudut encoder yang sama) atau dipotong di batas
+
+D_MAX = 150.0              # deg motor: di atas ini S, jauh dari ambiguitas +-180 D
+MIN_MOVE_DEG = 1.0         # toleranceDeg firmware: D/S lebih kecil di-SKIP
+SAVE_LABELS = ("S", "D", "C", "X", "K", "Q")   # motor diam / posisi pasti
+
+
+class CableWrap:
+    def __init__(self, gear_ratio, steps_per_rev=3200, limits=(-270.0, 270.0), margin=10.0,
+                 horizon=60.0, position=None, state_path=None,
+                 max_speed=MAX_SPEED, acceleration=ACCELERATION):
+        self.gear_ratio = gear_ratio
+        self.steps_per_rev = steps_per_rev
+        self.lo, self.hi = sorted(limits)       # deg antena dari netral
+        self.margin = margin
+        self.horizon = horizon
+        # position() -> (sudut motor sekarang, sudut motor setelah command
+        # terkirim selesai), multi-turn di frame sumbernya
+        self.position = position
+        self.state_path = state_path
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.lock = threading.Lock()
+        self.offset = 0.0          # kelipatan 360: frame sumber -> 0 = netral
+        self.saved = self._load()
+        self.anchored = False
+        self.last_saved = None
+        self.last_plan = None      # posisi antena plan terakhir
+
+        # statistik
+        self.planned = 0
+        self.prepositioned = 0     # plan memilih lilitan lain karena batas di depan
+        self.rerouted = 0          # D operator dialihkan ke putaran lain
+        self.clamped = 0           # command dipotong / dibuang di batas
+
+    # --- Posisi ---
+    def motor(self):
+        # -> (sekarang, target) deg motor dari netral
+        current, target = self.position()
+        return current + self.offset, target + self.offset
+
+    def antenna(self):
+        return self.motor()[0] * self.gear_ratio
+
+    def on_records(self, records):
+        # panggil SETELAH sumber posisi memproses records yang sama
+        labels = [r.label for r in records if r.label is not None and r.deg is not None]
+        if not labels:
+            return
+        with self.lock:
+            if not self.anchored:
+                self.anchored = True
+                if self.saved is not None:
+                    current = self.position()[0]
+                    self.offset = 360.0 * round((self.saved - current) / 360.0)
+        if any(label in SAVE_LABELS for label in labels):
+            self.save()
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path) as f:
+                return float(json.load(f)["motor_deg"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self):
+        if not self.state_path or not self.anchored:
+            return
+        motor = self.motor()[0]
+        if self.last_saved is not None and abs(motor - self.last_saved) < 0.5:
+            return
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"motor_deg": round(motor, 2), "antenna_deg": round(motor * self.gear_ratio, 2)}, f)
+        os.replace(tmp, self.state_path)
+        self.last_saved = motor
+
+    # --- Planner ---
+    def slew_time(self, antenna_delta):
+        steps = abs(antenna_delta) / self.gear_ratio * self.steps_per_rev / 360.0
+        return trapezoid_time(steps, self.max_speed, self.acceleration)
+
+    def candidates(self, azimuth):
+        lo, hi = self.lo + self.margin, self.hi - self.margin
+        a = azimuth + 360.0 * math.ceil((lo - azimuth) / 360.0)
+        out = []
+        while a <= hi:
+            out.append(a)
+            a += 360.0
+        if not out:
+            # rentang < 360 dan azimuth di zona mati -> tepi terdekat
+            out.append(min((lo, hi), key=lambda edge: abs(wrap180(azimuth - edge))))
+        return out
+
+    def plan(self, azimuth, rate=0.0):
+        # azimuth antena 0..360, rate deg/s antena (prediksi target) ->
+        # (command, posisi antena dari netral) atau None kalau sudah di sana
+        current, target = self.motor()
+        here = current * self.gear_ratio
+        options = self.candidates(azimuth)
+        unwind = self.slew_time(360.0)
+
+        def cost(a):
+            t = self.slew_time(a - here)
+            if rate:
+                room = ((self.hi - self.margin if rate > 0 else self.lo + self.margin) - a) / rate
+                if room < self.horizon:
+                    t += 2.0 * unwind
+            return t, abs(a - here)
+
+        best = min(options, key=cost)
+        cmd = self._command(best / self.gear_ratio, current, target)
+        if cmd is None:
+            return None
+        self.planned += 1
+        # hitung sekali per pindah lilitan, bukan tiap update selama unwind
+        if best != min(options, key=lambda a: abs(a - here)) and \
+                (self.last_plan is None or abs(best - self.last_plan) > 180.0):
+            self.prepositioned += 1
+        self.last_plan = best
+        return cmd, best
+
+    def _command(self, motor_target, current, target):
+        # motor diam dan dekat: D (absolut, ikut encoder); selain itu S relatif
+        # ke target firmware, tidak ambigu berapa pun jauhnya
+        if abs(target - current) < MIN_MOVE_DEG and abs(motor_target - current) < D_MAX:
+            if abs(motor_target - current) < MIN_MOVE_DEG:
+                return None
+            return f"D{int(round(motor_target % 360.0)) % 360}"
+        steps = int(round((motor_target - target) * self.steps_per_rev / 360.0))
+        if abs(steps) * 360.0 / self.steps_per_rev < MIN_MOVE_DEG:
+            return None
+        return f"S{steps}"
+
+    # --- Guard command operator ---
+    def guard(self, cmd):
+        # -> command yang tidak melewati batas lilitan, None = dibuang
+        current, target = self.motor()
+        return self._guard(cmd, current, target)[0]
+
+    def guard_many(self, cmds):
+        # batch yang ditulis berurutan (mis. [D, S] dari scheduler): tiap
+        # command dicek terhadap target setelah command sebelumnya, bukan
+        # target yang sudah terkirim saja -> list command aman (tanpa None)
+        current, target = self.motor()
+        out = []
+        for cmd in cmds:
+            cmd, target = self._guard(cmd, current, target)
+            if cmd:
+                out.append(cmd)
+        return out
+
+    def _guard(self, cmd, current, target):
+        # -> (command aman atau None, target motor setelah command itu)
+        kind = cmd[:1]
+        if kind == "C":
+            return cmd, current + wrap180(-current)
+        if kind not in ("D", "S", "K"):
+            return cmd, target
+        try:
+            value = int(cmd[1:])
+        except ValueError:
+            return cmd, target
+        lo, hi = self.lo / self.gear_ratio, self.hi / self.gear_ratio   # deg motor
+        if kind == "D":
+            if not 0 <= value <= 360:
+                return cmd, target          # D-SKIP di firmware
+            m = current + wrap180(value - current)
+            if lo <= m <= hi:
+                return cmd, m
+            turns = range(math.ceil((lo - value) / 360.0), math.floor((hi - value) / 360.0) + 1)
+            legal = [value + 360.0 * k for k in turns]
+            if legal:
+                m = min(legal, key=lambda x: abs(x - current))
+                self.rerouted += 1
+            else:
+                m = min(max(m, lo), hi)
+                self.clamped += 1
+            return self._steps(m - target, target)
+
+        delta = value * 360.0 / self.steps_per_rev if kind == "S" else float(value)
+        m = target + delta
+        # sudah di luar batas: hanya gerak yang tidak menambah lilitan
+        limited = max(min(m, max(hi, target)), min(lo, target))
+        if limited == m:
+            return cmd, m
+        self.clamped += 1
+        if kind == "K":
+            deg = int(limited - target)
+            return (f"K{deg}" if deg else None), target + deg
+        return self._steps(limited - target, target, exact=False)
+
+    def _steps(self, delta, target, exact=True):
+        # delta deg motor -> S<steps> (None kalau di bawah toleransi firmware)
+        raw = delta * self.steps_per_rev / 360.0
+        steps = int(round(raw)) if exact else int(raw)
+        if abs(steps) * 360.0 / self.steps_per_rev < MIN_MOVE_DEG:
+            return None, target
+        return f"S{steps}", target + steps * 360.0 / self.steps_per_rev
+
+    def stats(self):
+        current, target = self.motor()
+        antenna = current * self.gear_ratio
+        return {
+            "antenna_deg": round(antenna, 1),
+            "target_deg": round(target * self.gear_ratio, 1),
+            "turns": round(antenna / 360.0, 2),
+            "limits": [self.lo, self.hi],
+            "room_cw": round(self.hi - antenna, 1),
+            "room_ccw": round(antenna - self.lo, 1),
+            "anchored": self.anchored,
+            "planned": self.planned,
+            "prepositioned": self.prepositioned,
+            "rerouted": self.rerouted,
+            "clamped": self.clamped,
+        }
+
+
+def parse_limits(text):
+    # "-270,270" -> (-270.0, 270.0); "" / "off" -> None
+    if not text or text.strip().lower() in ("off", "none"):
+        return None
+    lo, hi = (float(x) for x in text.split(","))
+    return lo, hi
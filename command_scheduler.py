@@ -0,0 +1,172 @@
+import threading
+import time
+
+# --- Scheduler command gerak: target terbaru menang ---
+# D/S/C dari UI, hub dan tracker tidak lagi ditulis satu per satu apa adanya.
+# Slot pending menyimpan rencana terbaru:
+#   D<deg> / C   mengganti semua D/S/C yang belum terkirim (target absolut)
+#   S<steps>     dijumlahkan ke S pending terakhir (relatif terhadap target);
+#                S setelah C boleh langsung dikirim: firmware menambahkannya ke
+#                target home, homing tetap selesai (offset dari nol yang baru)
+#   X            buang pending, kirim stop sekarang
+# Firmware non-blocking (preempt=True): pending dikirim paling cepat tiap
+# min_interval dan langsung menggantikan gerak yang sedang jalan di firmware.
+# Firmware lama (preempt=False, D/S/C blocking): pending ditahan sampai
+# feedback gerak sebelumnya masuk, jadi tidak ada antrian gerak basi di UART.
+# Command lain (K, Q, B, ...) langsung diteruskan.
+# guard(batch) -> batch (opsional, mis. CableWrap.guard_many) dipanggil saat
+# batch dikirim: S yang dijumlahkan bisa melewati batas walau tiap S lolos.
+# cancel() dan kirim batch diserialkan lewat _send_lock; batch yang diambil
+# sebelum cancel() (generasi berubah) dibuang, tidak menyusul X ke firmware.
+
+MOVE_KINDS = ("D", "S", "C")
+DONE_LABELS = ("D", "D-SKIP", "S", "S-SKIP", "C")
+
+
+class CommandScheduler:
+    def __init__(self, send, preempt=True, min_interval=0.05, reply_timeout=15.0,
+                 guard=None, clock=time.monotonic):
+        self.send = send
+        self.guard = guard
+        self.preempt = preempt
+        self.min_interval = min_interval
+        self.reply_timeout = reply_timeout
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._pending = []            # maksimal [D/C] + [S] setelah dikumpulkan
+        self._in_flight = 0           # feedback gerak yang masih ditunggu
+        self._t_sent = -1e9
+        self._send_lock = threading.Lock()
+        self._generation = 0          # naik tiap cancel()
+        self._thread = None
+        self._stopped = False
+        self.loop_stat = None         # profiling.Stat: durasi kirim per batch
+
+        # statistik
+        self.submitted = 0
+        self.sent = 0
+        self.superseded = 0
+        self.preempted = 0
+        self.stops = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def submit(self, cmd):
+        cmd = cmd.strip().upper()
+        kind = cmd[:1]
+        if kind == "X":
+            return self.cancel()
+        if kind not in MOVE_KINDS:
+            return self.send(cmd)
+        with self._cond:
+            self.submitted += 1
+            if kind == "S":
+                try:
+                    steps = int(cmd[1:])
+                except ValueError:
+                    return False
+                if self._pending and self._pending[-1][:1] == "S":
+                    steps += int(self._pending.pop()[1:])
+                    self.superseded += 1
+                self._pending.append(f"S{steps}")
+            else:
+                self.superseded += len(self._pending)
+                self._pending = [cmd]
+            self._cond.notify_all()
+        return True
+
+    def cancel(self):
+        # buang rencana yang belum terkirim dan hentikan gerak sekarang
+        with self._cond:
+            self.superseded += len(self._pending)
+            self._pending = []
+            self._in_flight = 0
+            self._generation += 1
+            self.stops += 1
+        if not self.preempt:
+            return False
+        with self._send_lock:
+            return self.send("X")
+
+    def busy(self):
+        with self._cond:
+            return bool(self._pending or self._in_flight)
+
+    def on_records(self, records):
+        with self._cond:
+            for rec in records:
+                if rec.label in DONE_LABELS or rec.label == "X":
+                    # firmware non-blocking hanya membalas command terakhir
+                    self._in_flight = 0 if self.preempt else max(0, self._in_flight - 1)
+                    self._cond.notify_all()
+
+    def _wait_time(self, now):
+        # detik sampai pending boleh dikirim (0 = sekarang)
+        wait = self._t_sent + self.min_interval - now
+        if not self.preempt and self._in_flight:
+            if now - self._t_sent >= self.reply_timeout:
+                self._in_flight = 0      # feedback hilang, jangan macet selamanya
+            else:
+                wait = self._t_sent + self.reply_timeout - now
+        return max(0.0, wait)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._pending:
+                        self._cond.wait()
+                        continue
+                    wait = self._wait_time(self.clock())
+                    if wait <= 0.0:
+                        break
+                    # on_records / submit membangunkan lebih awal
+                    self._cond.wait(wait)
+                if self._stopped:
+                    return
+                batch = self._pending
+                self._pending = []
+                gen = self._generation
+                self._t_sent = self.clock()
+            t0 = self.clock()
+            # guard di luar lock (membaca posisi dari sumber lain)
+            if self.guard is not None:
+                batch = self.guard(batch)
+            if not batch:
+                continue
+            with self._send_lock:
+                with self._cond:
+                    if gen != self._generation:
+                        # cancel() masuk saat guard jalan: batch sudah basi
+                        self.superseded += len(batch)
+                        continue
+                    if self._in_flight:
+                        self.preempted += 1
+                    self._in_flight = 1 if self.preempt else self._in_flight + len(batch)
+                for cmd in batch:
+                    if self.send(cmd):
+                        self.sent += 1
+            if self.loop_stat is not None:
+                self.loop_stat.add(self.clock() - t0)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": list(self._pending),
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "sent": self.sent,
+                "superseded": self.superseded,
+                "preempted": self.preempted,
+                "stops": self.stops,
+            }
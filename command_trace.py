@@ -0,0 +1,171 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# --- Tracing latensi per command ---
+# Setiap command yang ditulis SerialTransport dicatat (timestamp monotonic
+# saat masuk antrian), lalu dipasangkan dengan feedback yang menyelesaikannya:
+#   K -> [K] (ack langsung), S -> [S]/[S-SKIP], D -> [D]/[D-SKIP], C -> [C],
+#   X -> [X], T -> [T], Q -> [Q], B -> [B]
+# Latensi masuk ke histogram bergulir per tipe command (slot waktu yang
+# diputar), jadi update O(1) dan snapshot hanya menjumlah beberapa slot.
+# [K] tambahan saat gerak knob selesai (K-done) tidak punya pasangan dan
+# dihitung sebagai "unsolicited".
+# preempt=True (firmware non-blocking): D/S/C yang digantikan command gerak
+# berikutnya tidak pernah dibalas; saat feedback gerak masuk, yang lebih lama
+# dihitung "superseded", bukan timeout.
+
+COMPLETES = {
+    "K": "K", "S": "S", "S-SKIP": "S", "D": "D", "D-SKIP": "D",
+    "C": "C", "X": "X", "T": "T", "Q": "Q", "B": "B",
+}
+MOVES = ("S", "D", "C")
+
+# batas bucket histogram (ms), kira-kira log-scale 0.5 ms .. 30 s
+BUCKETS_MS = [0.5 * 1.25 ** i for i in range(50)]
+
+
+class RollingHistogram:
+    def __init__(self, window=60.0, slots=6):
+        self.slot_len = window / slots
+        self.slots = [[0] * (len(BUCKETS_MS) + 1) for _ in range(slots)]
+        self.slot_ids = [-1] * slots
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _slot(self, now):
+        slot_id = int(now // self.slot_len)
+        idx = slot_id % len(self.slots)
+        if self.slot_ids[idx] != slot_id:
+            # slot lama sudah keluar dari window -> kosongkan
+            self.slot_ids[idx] = slot_id
+            self.slots[idx] = [0] * (len(BUCKETS_MS) + 1)
+        return self.slots[idx]
+
+    def add(self, latency, now):
+        ms = latency * 1000.0
+        self._slot(now)[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def window_counts(self, now):
+        oldest = int(now // self.slot_len) - len(self.slots)
+        merged = [0] * (len(BUCKETS_MS) + 1)
+        for slot_id, counts in zip(self.slot_ids, self.slots):
+            if slot_id > oldest:
+                for i, c in enumerate(counts):
+                    merged[i] += c
+        return merged
+
+    def percentiles(self, now, qs=(50, 95, 99)):
+        counts = self.window_counts(now)
+        n = sum(counts)
+        out = {}
+        for q in qs:
+            if n == 0:
+                out[f"p{q}_ms"] = None
+                continue
+            rank = q / 100.0 * n
+            acc = 0
+            for i, c in enumerate(counts):
+                acc += c
+                if acc >= rank:
+                    # batas atas bucket
+                    out[f"p{q}_ms"] = BUCKETS_MS[i] if i < len(BUCKETS_MS) else BUCKETS_MS[-1]
+                    break
+        out["window_samples"] = n
+        return out
+
+
+class CommandTracer:
+    def __init__(self, window=60.0, slots=6, timeout=30.0, preempt=False, clock=time.perf_counter):
+        self.window = window
+        self.preempt = preempt
+        self.timeout = timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.pending = {t: deque() for t in set(COMPLETES.values())}
+        self.round_trip = {t: RollingHistogram(window, slots) for t in self.pending}
+        self.queue_wait = RollingHistogram(window, slots)
+        self.completed = {t: 0 for t in self.pending}
+        self.skipped = {t: 0 for t in self.pending}
+        self.timeouts = {t: 0 for t in self.pending}
+        self.superseded = {t: 0 for t in self.pending}
+        self.unsolicited = 0
+
+    # dipasang sebagai SerialTransport(on_write=tracer.on_write)
+    def on_write(self, frames, t_write):
+        with self._lock:
+            for cmd, t_enqueue in frames:
+                kind = cmd[:1]
+                if kind in self.pending:
+                    self.pending[kind].append((t_enqueue, cmd))
+                self.queue_wait.add(t_write - t_enqueue, t_write)
+
+    def on_records(self, records, now=None):
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            for rec in records:
+                kind = COMPLETES.get(rec.label)
+                if kind is None:
+                    continue
+                pending = self.pending[kind]
+                if not pending:
+                    self.unsolicited += 1
+                    continue
+                if self.preempt and (kind == "X" or (kind in MOVES and not rec.label.endswith("-SKIP"))):
+                    self._supersede(kind)
+                t_enqueue, _ = pending.popleft()
+                self.round_trip[kind].add(now - t_enqueue, now)
+                self.completed[kind] += 1
+                if rec.label.endswith("-SKIP"):
+                    self.skipped[kind] += 1
+            self._expire(now)
+
+    def _supersede(self, kind):
+        # gerak yang dibalas = yang terbaru; gerak lain yang ditulis sebelumnya
+        # sudah diganti firmware
+        newest = self.pending[kind][-1][0]
+        for other in MOVES:
+            pending = self.pending[other]
+            while pending and pending[0][0] < newest:
+                pending.popleft()
+                self.superseded[other] += 1
+
+    def _expire(self, now):
+        limit = now - self.timeout
+        for kind, pending in self.pending.items():
+            while pending and pending[0][0] < limit:
+                pending.popleft()
+                self.timeouts[kind] += 1
+
+    def snapshot(self):
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            out = {
+                "window_s": self.window,
+                "queue_wait": self.queue_wait.percentiles(now),
+                "unsolicited": self.unsolicited,
+                "commands": {},
+            }
+            for kind, hist in self.round_trip.items():
+                if not (hist.count or self.pending[kind] or self.timeouts[kind] or self.superseded[kind]):
+                    continue
+                entry = {
+                    "completed": self.completed[kind],
+                    "skipped": self.skipped[kind],
+                    "timeouts": self.timeouts[kind],
+                    "superseded": self.superseded[kind],
+                    "pending": len(self.pending[kind]),
+                    "mean_ms": hist.total_ms / hist.count if hist.count else None,
+                    "max_ms": hist.max_ms if hist.count else None,
+                }
+                entry.update(hist.percentiles(now))
+                out["commands"][kind] = entry
+            return out
@@ -1,25 +1,33 @@
+import os
 import time
 import threading
-from pywinusb import hid
-import serial
-
-# Koneksi ke Arduino (pastikan COM port sesuai)
-arduino = serial.Serial('COM5', 115200)
-print("Terhubung ke Arduino...", flush=True)
-
-# Variabel kontrol utama
-knob_dir = 0
-last_knob_event = time.time()
-knob_delay = 0.01
-TIMEOUT = 0.2
+from feedback_parser import FeedbackParser
+from serial_transport import SerialTransport
+from move_planner import MovePlanner, STEPS_PER_REV
+from knob_input import KnobEngine
+from steptrack_core import find_port, open_knob
+
+# Koneksi ke Arduino: STEPTRACK_PORT, atau dicari dari VID/PID USB. Port dan
+# PowerMate baru dibuka di main(), import modul ini tanpa efek samping
+SERIAL_PORT = os.environ.get('STEPTRACK_PORT')
+arduino = None
+transport = None
 
 # Posisi bearing dan stepper
 bearing_deg = 0
-step_pos = 0
-step_per_click = 1.8 / 4  # 0.45 derajat per step (microstepping x4)
+# satu detent = satu microstep planner (STEPS_PER_REV, sama dengan firmware)
+step_per_click = 360.0 / STEPS_PER_REV  # 0.1125 derajat per step (200 x 16)
 lock = threading.Lock()
 stop_event = threading.Event()
 
+# Gerakan manual: satu S<steps> per target, selesai saat [S]/[S-SKIP] masuk
+def on_move_done(move):
+    global bearing_deg
+    bearing_deg = planner.bearing()
+    print(f"[MANUAL] Posisi akhir: {bearing_deg:.2f}° ({move.outcome}, {move.t_done - move.t_start:.2f} s)", flush=True)
+
+planner = None
+
 # Encoder tracking
 last_raw = None
 last_deg = None
@@ -29,15 +37,19 @@ def normalize_bearing(b):
     return b if b >= 0 else b + 360
 
 # Membaca data dari Arduino (encoder)
+feedback_parser = FeedbackParser()
+
 def read_from_arduino():
     global bearing_deg, last_raw, last_deg
     while not stop_event.is_set():
         try:
-            line = arduino.readline().decode('utf-8').strip()
-            if line.startswith("Raw Angle:"):
-                parts = line.split(" | ")
-                raw_val = int(parts[0].split(":")[1].strip())
-                angle = float(parts[1].split(":")[1].strip())
+            records = feedback_parser.read_from(arduino)
+            planner.on_records(records)
+            for rec in records:
+                if rec.label is None:
+                    continue
+                raw_val = rec.raw
+                angle = rec.deg
 
                 if raw_val != last_raw or angle != last_deg:
                     last_raw = raw_val
@@ -46,36 +58,20 @@ def read_from_arduino():
         except Exception as e:
             print(f"[ERROR] Serial read: {e}")
 
-# Kontrol stepper via knob input
-def stepper_loop():
-    global knob_dir, knob_delay, step_pos, bearing_deg
-    while not stop_event.is_set():
-        now = time.time()
-        with lock:
-            if now - last_knob_event > TIMEOUT:
-                knob_dir = 0
-            dir = knob_dir
-            delay = knob_delay
-
-        if dir == 1:
-            arduino.write(b'R')
-            with lock:
-                step_pos += 1
-                bearing_deg = normalize_bearing(step_pos * step_per_click)
-        elif dir == -1:
-            arduino.write(b'L')
-            with lock:
-                step_pos -= 1
-                bearing_deg = normalize_bearing(step_pos * step_per_click)
-
-        if dir != 0:
-            print(f"[KNOB] Bearing: {bearing_deg:.2f}°", flush=True)
-
-        time.sleep(delay)
+# Kontrol stepper via knob input: satu detent = step_per_click x gain
+# (gain naik dengan kecepatan putar), dikirim sebagai K<deg> oleh KnobEngine
+def send_knob(deg, stamps):
+    global bearing_deg
+    transport.send(f"K{deg}")
+    # firmware: steps = deg * stepsPerDegree (dipotong ke long)
+    planner.on_knob(int(deg * STEPS_PER_REV / 360.0))
+    bearing_deg = planner.bearing()
+    print(f"[KNOB] Bearing: {bearing_deg:.2f}°", flush=True)
+
+knob = KnobEngine(send_knob, scale=step_per_click, max_gain=40.0)
 
 # Input manual dari pengguna
 def manual_input_loop():
-    global step_pos, bearing_deg
     while not stop_event.is_set():
         try:
             target = input("Masukkan target bearing (0–359): ")
@@ -86,19 +82,9 @@ def manual_input_loop():
                 print("Input harus antara 0–359.")
                 continue
 
-            with lock:
-                current = normalize_bearing(step_pos * step_per_click)
-                delta = (target - current + 540) % 360 - 180
-                steps = int(round(delta / step_per_click))
-                direction = 'R' if steps > 0 else 'L'
-
-                for _ in range(abs(steps)):
-                    arduino.write(direction.encode())
-                    step_pos += 1 if direction == 'R' else -1
-                    bearing_deg = normalize_bearing(step_pos * step_per_click)
-                    time.sleep(0.005)
-
-                print(f"[MANUAL] Posisi akhir: {bearing_deg:.2f}°")
+            # tidak menunggu gerakan selesai; hasilnya dicetak oleh on_move_done
+            move = planner.move_to(target)
+            print(f"[MANUAL] Target {target}° -> S{move.steps}")
 
         except ValueError:
             print("Input tidak valid.")
@@ -106,52 +92,54 @@ def manual_input_loop():
             stop_event.set()
 
 # Handler knob input
-last_event = time.time()
-
 def knob_handler(data):
-    global knob_dir, last_knob_event, knob_delay, last_event, step_pos, bearing_deg
+    global bearing_deg
 
     delta = data[2]
     button = data[1]
-    now = time.time()
-    interval = now - last_event
-    last_event = now
-
-    if interval > 0:
-        speed = 1.0 / interval
-        knob_delay = max(0.0005, min(0.02, 0.05 / speed))
+    if delta > 127:
+        delta -= 256
 
-    with lock:
-        if delta == 1:
-            knob_dir = 1
-        elif delta == 255:
-            knob_dir = -1
-        last_knob_event = now
+    if delta != 0:
+        if planner.cancel():
+            # knob mendahului gerakan manual yang sedang berjalan
+            print("[KNOB] Gerakan manual dibatalkan", flush=True)
+        knob.on_detent(delta)
 
     if button == 1:
-        arduino.write(b'C')
+        planner.cancel()
+        knob.reset()
+        transport.send("C")
+        planner.reset()
         with lock:
-            knob_dir = 0
             bearing_deg = 0
-            step_pos = 0
             print("[KNOB] Reset ke 0°", flush=True)
-            last_knob_event = time.time()
 
-# Mulai HID PowerMate
-devices = hid.HidDeviceFilter().get_devices()
-powermate = next((dev for dev in devices if "Griffin PowerMate" in dev.product_name), None)
-
-if not powermate:
-    print("PowerMate tidak ditemukan.")
-else:
+def main():
+    global arduino, transport, planner
+    import serial
+    port = SERIAL_PORT or find_port()
+    if port is None:
+        print("Arduino tidak ditemukan (set STEPTRACK_PORT).")
+        return
+    # timeout: thread pembaca bisa keluar saat stop_event
+    arduino = serial.Serial(port, 115200, timeout=0.2)
+    print(f"Terhubung ke Arduino ({port})...", flush=True)
+    transport = SerialTransport(arduino).start()
+    planner = MovePlanner(transport, STEPS_PER_REV, on_done=on_move_done)
+
+    # Mulai PowerMate (pywinusb di Windows, evdev/hidraw di Linux)
+    powermate = open_knob(knob_handler)
+    if not powermate:
+        print("PowerMate tidak ditemukan.")
+        transport.close()
+        arduino.close()
+        return
     print("PowerMate ditemukan. Memulai layanan...", flush=True)
-    powermate.open()
-    powermate.set_raw_data_handler(knob_handler)
 
-    t1 = threading.Thread(target=stepper_loop, daemon=True)
+    knob.start()
     t2 = threading.Thread(target=manual_input_loop, daemon=True)
     t3 = threading.Thread(target=read_from_arduino, daemon=True)
-    t1.start()
     t2.start()
     t3.start()
 
@@ -163,5 +151,11 @@ else:
         stop_event.set()
         time.sleep(0.5)
     finally:
+        knob.stop()
+        transport.close()
         powermate.close()
         arduino.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import math
+import threading
+import time
+
+# --- Deteksi missed step / drift encoder (streaming, O(1) per sampel) ---
+# Frame biner (B1) membawa rawAngle AS5600 DAN stepper.currentPosition() yang
+# diambil pada saat yang sama, jadi residual
+#     r = wrap180(sudut encoder - steps * 360 / steps_per_rev)
+# konstan selama motor mengikuti hitungan step (offset magnet vs posisi nol).
+# Tiap sampel, d = wrap180(r - baseline):
+#   - EWMA mean/var d = noise normal
+#   - lompatan: |d| > k*sigma. Satu sampel saja = transien (frame saat belt
+#     masih berayun); `confirm` sampel berturut-turut yang konsisten = posisi
+#     benar-benar bergeser. Saat diam, sampel konfirmasi diminta dengan satu Q
+#     (tanpa polling terus-menerus)
+#   - geseran pelan di bawah k*sigma dikumpulkan CUSUM dua sisi -> drift
+# Lompatan yang muncul saat step count berubah (ada gerak) = missed steps ->
+# koreksi minimal S<steps> ke arah sebaliknya, lalu baseline digeser
+# (hitungan step sekarang memang beda dengan encoder sebesar step yang hilang).
+# Geseran saat motor diam = drift encoder / antena terdorong -> hanya alert,
+# kecuali correct_drift=True.
+# Mode ASCII tidak membawa steps: monitor diam sampai ada frame biner.
+# Baseline hanya dari balasan Q (Q pertama dari start, berikutnya diminta
+# monitor satu per satu) dan [C], selama step count belum berubah: frame diam
+# setelah gerak bisa sudah membawa step yang hilang. Kalau gerak mulai
+# sebelum warmup penuh, baseline diambil dari sampel sebelum gerak itu.
+
+# dikirim saat motor diam; SKIP dibalas langsung, bisa di tengah gerak
+REST_LABELS = ("SENSOR", "S", "D", "Q", "X")
+WARMUP_LABELS = ("Q", "C")  # diminta saat diam / titik home (step count = 0)
+DONE_LABELS = ("S", "D", "X")
+MIN_MOVE_DEG = 1.0          # toleranceDeg firmware: S lebih kecil di-SKIP
+
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class DriftMonitor:
+    def __init__(self, send=None, steps_per_rev=3200, on_alert=None, alpha=0.05, warmup=3,
+                 sigma_floor=0.15, jump_k=5.0, confirm=2, allowance=0.3, threshold=6.0,
+                 correct=True, correct_drift=False, cooldown=2.0, clock=time.monotonic):
+        self.send = send                    # send(cmd) -> bool, None = hanya monitor
+        self.steps_per_rev = steps_per_rev
+        self.deg_per_step = 360.0 / steps_per_rev
+        self.on_alert = on_alert            # on_alert(kind, info dict)
+        self.alpha = alpha
+        self.warmup = warmup                # sampel diam untuk baseline awal
+        self.sigma_floor = sigma_floor      # noise AS5600 minimal (deg motor)
+        self.jump_k = jump_k
+        self.confirm = confirm
+        self.allowance = allowance          # CUSUM: |d| < allowance dianggap noise (deg)
+        self.threshold = threshold          # CUSUM: ambang (deg * sampel)
+        self.correct = correct
+        self.correct_drift = correct_drift
+        self.cooldown = cooldown
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        # statistik
+        self.samples = 0
+        self.transients = 0
+        self.alerts = 0
+        self.corrections = 0
+        self.corrected_steps = 0
+        self.last_alert = None
+        self.reset()
+
+    def reset(self):
+        self.baseline = None
+        self._warm_n = 0
+        self._warm_sin = self._warm_cos = 0.0
+        self._warm_steps = None
+        self.mean = 0.0
+        self.var = self.sigma_floor ** 2
+        self._last_steps = None
+        self._reset_run()
+        self.g_pos = self.g_neg = 0.0
+        self._drift_sum, self._drift_n = 0.0, 0
+        self.pending = None                 # koreksi menunggu [S]
+        self.owed = 0                       # step hilang yang belum dikoreksi
+        self.last_query = -1e9
+        self.last_correction = -1e9
+        self._homing = False
+
+    def _reset_run(self):
+        self._run_sum = 0.0
+        self._run_n = 0
+        self._run_moved = False
+
+    def on_write(self, frames):
+        # C ditulis: firmware me-nol-kan step count di home, bisa juga tanpa
+        # [C] (S yang datang selama homing -> balasan [S]) -> baseline baru
+        if any(cmd == "C" for cmd, _ in frames):
+            with self.lock:
+                self.reset()
+                self._homing = True
+
+    def residual(self, rec):
+        return wrap180(rec.deg - rec.steps * self.deg_per_step)
+
+    def on_records(self, records):
+        actions = []
+        with self.lock:
+            for rec in records:
+                if rec.label == "C":
+                    # currentPosition di-nol-kan firmware -> baseline baru,
+                    # [C] sendiri sampel warmup pertama
+                    self.reset()
+                if rec.steps is None or rec.label is None or rec.deg is None or rec.label == "P":
+                    # [P] diambil saat gerak: jeda baca I2C vs step count ikut masuk residual
+                    continue
+                if self.pending is not None and rec.label in ("S", "S-SKIP"):
+                    self.pending = None
+                action = self._sample(rec)
+                if action is not None:
+                    actions.append(action)
+        # kirim / callback di luar lock
+        for kind, info, cmd in actions:
+            if cmd is not None and self.send is not None:
+                ok = self.send(cmd)
+                if cmd != "Q":
+                    with self.lock:
+                        if ok:
+                            info["correction"] = cmd
+                            self.corrections += 1
+                            self.corrected_steps += int(cmd[1:])
+                        else:
+                            self.pending = None
+                            self.owed -= int(cmd[1:])
+            if kind is not None and self.on_alert is not None:
+                self.on_alert(kind, info)
+
+    def _sample(self, rec):
+        self.samples += 1
+        r = self.residual(rec)
+        at_rest = rec.label in REST_LABELS
+        moved = self._last_steps is not None and rec.steps != self._last_steps
+        self._last_steps = rec.steps
+        if self.baseline is None:
+            if self._warm_n and rec.steps != self._warm_steps:
+                # gerak mulai sebelum warmup penuh: baseline dari sampel
+                # sebelum gerak, frame ini sudah ikut diperiksa
+                self._finish_warmup()
+            elif rec.label in WARMUP_LABELS:
+                # rata-rata sirkular sampel Q / [C]
+                self._warm_sin += math.sin(math.radians(r))
+                self._warm_cos += math.cos(math.radians(r))
+                self._warm_n += 1
+                self._warm_steps = rec.steps
+                self._homing = False
+                if self._warm_n >= self.warmup:
+                    self._finish_warmup()
+                elif self.send is not None:
+                    return None, {}, "Q"
+                return None
+            else:
+                if self._homing and rec.label in DONE_LABELS and self.send is not None:
+                    # homing selesai bersama S (tanpa [C]) atau dibatalkan
+                    self._homing = False
+                    return None, {}, "Q"
+                return None
+
+        d = wrap180(r - self.baseline)
+        sigma = max(math.sqrt(self.var), self.sigma_floor)
+        now = self.clock()
+
+        if abs(d - self.mean) > self.jump_k * sigma and abs(d) >= self.allowance:
+            # lompatan: harus konsisten dengan run yang sedang berjalan
+            if self._run_n and abs(d - self._run_sum / self._run_n) > self.jump_k * sigma:
+                self.transients += 1
+                self._reset_run()
+            self._run_sum += d
+            self._run_n += 1
+            self._run_moved |= moved
+            if self._run_n < self.confirm or not at_rest:
+                if at_rest and self.send is not None and now - self.last_query >= self.cooldown:
+                    # minta satu sampel lagi untuk konfirmasi
+                    self.last_query = now
+                    return None, {}, "Q"
+                return None
+            shift = self._run_sum / self._run_n
+            kind = "missed-steps" if self._run_moved else "encoder-drift"
+            return self._alert(kind, shift, now)
+
+        if self._run_n:
+            # kembali normal sebelum terkonfirmasi -> transien
+            self.transients += 1
+            self._reset_run()
+        diff = d - self.mean
+        self.mean += self.alpha * diff
+        self.var = (1.0 - self.alpha) * (self.var + self.alpha * diff * diff)
+
+        # drift pelan: CUSUM atas d yang lolos filter lompatan
+        self.g_pos = max(0.0, self.g_pos + d - self.allowance)
+        self.g_neg = max(0.0, self.g_neg - d - self.allowance)
+        if self.g_pos or self.g_neg:
+            self._drift_sum += d
+            self._drift_n += 1
+        else:
+            self._drift_sum, self._drift_n = 0.0, 0
+        if at_rest and max(self.g_pos, self.g_neg) >= self.threshold:
+            return self._alert("encoder-drift", self._drift_sum / self._drift_n, now)
+        if at_rest:
+            # koreksi yang tertunda (cooldown / koreksi sebelumnya belum selesai)
+            cmd = self._correction(now)
+            if cmd is not None:
+                return "correction", {"steps": int(cmd[1:])}, cmd
+        return None
+
+    def _finish_warmup(self):
+        self.baseline = math.degrees(math.atan2(self._warm_sin, self._warm_cos))
+
+    def _correction(self, now):
+        if not self.owed or self.pending is not None or now - self.last_correction < self.cooldown:
+            return None
+        if abs(self.owed) * self.deg_per_step < MIN_MOVE_DEG:
+            return None
+        cmd = f"S{self.owed}"
+        self.owed = 0
+        self.pending = cmd
+        self.last_correction = now
+        return cmd
+
+    def _alert(self, kind, shift, now):
+        info = {
+            "shift_deg": round(shift, 2),
+            "steps": int(round(shift / self.deg_per_step)),
+            "samples": max(self._run_n, self._drift_n, 1),
+            "noise_deg": round(max(math.sqrt(self.var), self.sigma_floor), 3),
+        }
+        self.alerts += 1
+        self.last_alert = (kind, info)
+        cmd = None
+        if self.correct and (kind == "missed-steps" or self.correct_drift):
+            # encoder tertinggal dari hitungan -> gerak sebesar selisihnya;
+            # kalau belum boleh sekarang, ditagih di sampel diam berikutnya
+            self.owed -= info["steps"]
+            cmd = self._correction(now)
+        # hitungan step vs encoder sekarang berbeda tetap sebesar shift
+        self.baseline = wrap180(self.baseline + shift)
+        self.mean = 0.0
+        self.g_pos = self.g_neg = 0.0
+        self._drift_sum, self._drift_n = 0.0, 0
+        self._reset_run()
+        return kind, info, cmd
+
+    def stats(self):
+        with self.lock:
+            return {
+                "baseline_deg": None if self.baseline is None else round(self.baseline, 3),
+                "offset_deg": round(self.mean, 3),
+                "noise_deg": round(max(math.sqrt(self.var), self.sigma_floor), 3),
+                "samples": self.samples,
+                "transients": self.transients,
+                "alerts": self.alerts,
+                "corrections": self.corrections,
+                "corrected_steps": self.corrected_steps,
+                "owed_steps": self.owed,
+                "last_alert": self.last_alert,
+            }
@@ -0,0 +1,182 @@
+import re
+import struct
+from collections import namedtuple
+
+# --- Parser feedback Arduino (streaming, bulk-read) ---
+# Membaca semua byte yang ada di in_waiting ke satu bytearray yang sudah
+# dialokasikan, lalu mengambil frame "[LABEL],raw,deg" yang lengkap tanpa
+# decode/strip/split per baris. Hasilnya list Feedback per batch.
+# Frame biner (mode B1) dan baris ASCII boleh bercampur dalam satu stream;
+# byte sync 0xA5 tidak pernah muncul di teks ASCII.
+
+Feedback = namedtuple("Feedback", "label raw deg steps ms text", defaults=(None, None, None))
+
+# satu baris = satu match: frame "[LABEL],raw,deg" atau teks lain (group 4)
+LINE_RE = re.compile(rb"(?:\[([A-Z][A-Z-]*)\],(-?\d+),(-?\d+(?:\.\d*)?)\r?|([^\n]*))\n")
+# format lama control_stepper: "Raw Angle: 1234 | Angle: 108.46"
+LEGACY_RE = re.compile(rb"Raw Angle:\s*(-?\d+)\s*\|[^:]*:\s*(-?\d+(?:\.\d*)?)")
+
+# --- Frame biner (mode B1 di AntTrack.ino) ---
+# sync(0xA5) | label u8 | raw u16 | steps i32 | millis u32 | crc8
+FRAME_SYNC = 0xA5
+FRAME_LEN = 13
+FRAME_BODY = struct.Struct("<BHiI")
+LABEL_CODES = {
+    1: "SENSOR", 2: "K", 3: "S", 4: "S-SKIP", 5: "D",
+    6: "D-SKIP", 7: "C", 8: "Q", 9: "B", 10: "X",
+    11: "P", 12: "T",
+}
+CODE_LABELS = {label: code for code, label in LABEL_CODES.items()}
+
+
+def _crc8_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for b in data:
+        crc = CRC8_TABLE[crc ^ b]
+    return crc
+
+
+def encode_frame(label, raw, steps=0, ms=0):
+    body = FRAME_BODY.pack(CODE_LABELS[label], raw & 0x0FFF, steps, ms & 0xFFFFFFFF)
+    return bytes((FRAME_SYNC,)) + body + bytes((crc8(body),))
+
+
+_labels = {}
+
+
+def _label(raw_label):
+    label = _labels.get(raw_label)
+    if label is None:
+        label = raw_label.decode("ascii")
+        _labels[bytes(raw_label)] = label
+    return label
+
+
+def format_feedback(rec):
+    if rec.text is not None:
+        return rec.text
+    return f"[{rec.label}],{rec.raw},{rec.deg:.2f}"
+
+
+class FeedbackParser:
+    def __init__(self, size=8192):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
+
+        # statistik
+        self.bytes_in = 0
+        self.frames = 0
+        self.binary_frames = 0
+        self.crc_errors = 0
+        self.text_lines = 0
+        self.overflows = 0
+
+    def _make_room(self):
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.end == len(self.buf) and self.start > 0:
+            # geser sisa (baris belum lengkap) ke depan buffer
+            rem = self.end - self.start
+            self.buf[0:rem] = self.buf[self.start:self.end]
+            self.start, self.end = 0, rem
+        elif self.end == len(self.buf):
+            # satu baris lebih panjang dari buffer -> buang
+            self.overflows += 1
+            self.start = self.end = 0
+        return len(self.buf) - self.end
+
+    def feed(self, data):
+        records = []
+        data = memoryview(data)
+        while len(data):
+            room = self._make_room()
+            n = min(room, len(data))
+            self.buf[self.end:self.end + n] = data[:n]
+            self.end += n
+            self.bytes_in += n
+            data = data[n:]
+            self._parse(records)
+        return records
+
+    def read_from(self, port):
+        # blok sampai minimal 1 byte, lalu ambil semua yang sudah ada
+        n = port.in_waiting or 1
+        room = self._make_room()
+        got = port.readinto(self.view[self.end:self.end + min(n, room)])
+        if got:
+            self.end += got
+            self.bytes_in += got
+        return self._parse([])
+
+    def _parse(self, records):
+        buf = self.buf
+        while True:
+            sync = buf.find(FRAME_SYNC, self.start, self.end)
+            if sync < 0:
+                # jalur cepat: hanya ASCII
+                self._parse_lines(self.start, self.end, records)
+                return records
+            if sync > self.start:
+                # baris ASCII sebelum frame; sisa tanpa newline dibuang
+                self._parse_lines(self.start, sync, records)
+                self.start = sync
+            if self.end - sync < FRAME_LEN:
+                return records
+            self._parse_frame(sync, records)
+
+    def _parse_frame(self, pos, records):
+        view = self.view
+        if crc8(view[pos + 1:pos + FRAME_LEN - 1]) != view[pos + FRAME_LEN - 1]:
+            # bukan frame valid -> geser satu byte dan sinkron ulang
+            self.crc_errors += 1
+            self.start = pos + 1
+            return
+        code, raw, steps, ms = FRAME_BODY.unpack_from(view, pos + 1)
+        label = LABEL_CODES.get(code, str(code))
+        records.append(tuple.__new__(Feedback, (label, raw, raw * 360.0 / 4096.0, steps, ms, None)))
+        self.binary_frames += 1
+        self.frames += 1
+        self.start = pos + FRAME_LEN
+
+    def _parse_lines(self, start, end, records):
+        last_nl = self.buf.rfind(b"\n", start, end)
+        if last_nl < 0:
+            if end < self.end:
+                self.start = end
+            return
+        append = records.append
+        labels = _labels.get
+        new = tuple.__new__
+        for label, raw, deg, other in LINE_RE.findall(self.buf, start, last_nl + 1):
+            if label:
+                append(new(Feedback, (labels(label) or _label(label), int(raw), float(deg), None, None, None)))
+                self.frames += 1
+            elif other:
+                self._parse_other(other, append)
+        self.start = last_nl + 1 if end == self.end else end
+
+    def _parse_other(self, line, append):
+        m = LEGACY_RE.search(line)
+        if m is not None:
+            append(Feedback("ENC", int(m.group(1)), float(m.group(2))))
+            self.frames += 1
+            return
+        text = line.decode("utf-8", "replace").strip()
+        if text:
+            append(Feedback(None, None, None, text=text))
+            self.text_lines += 1
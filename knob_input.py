@@ -0,0 +1,146 @@
+import math
+import threading
+import time
+from collections import deque
+
+# --- Knob input engine: detent HID -> K<deg> ---
+# Handler HID cukup memanggil on_detent(); worker thread bangun lewat
+# Condition (bukan sleep tetap), jadi detent pertama setelah diam langsung
+# dikirim. Detent yang datang lebih cepat dari max_rate dikumpulkan menjadi
+# satu frame, supaya bandwidth serial (K keluar, 2x [K] masuk) tidak pernah
+# terlampaui.
+#
+# Gain mengikuti kecepatan putar (detent/s, dari timestamp detent terakhir):
+#   gain = base_gain * (1 + (v / knee) ** exponent), dibatasi max_gain
+# Putaran pelan -> gain ~1 untuk membidik halus, putaran cepat -> slew kasar.
+
+# satu frame K ~6 byte keluar, tapi dua [K] (ack + done) ~16 byte masuk;
+# 100 frame/s tetap jauh di bawah 115200 baud dan loop firmware
+MAX_RATE_HZ = 100.0
+
+
+def gain_curve(velocity, base_gain=1.0, max_gain=8.0, knee=15.0, exponent=1.5):
+    if velocity <= 0:
+        return base_gain
+    return min(max_gain, base_gain * (1.0 + (velocity / knee) ** exponent))
+
+
+class KnobEngine:
+    def __init__(self, emit, scale=1.0, base_gain=1.0, max_gain=8.0, knee=15.0,
+                 exponent=1.5, window=0.25, max_rate=MAX_RATE_HZ, clock=time.perf_counter):
+        # emit(units, stamps): units = integer (mis. derajat motor untuk K),
+        # stamps = timestamp detent yang tergabung di frame ini
+        self.emit = emit
+        self.scale = scale
+        self.base_gain = base_gain
+        self.max_gain = max_gain
+        self.knee = knee
+        self.exponent = exponent
+        self.window = window
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._stamps = deque(maxlen=16)
+        self._pending = 0.0
+        self._pending_stamps = []
+        self._last_emit = -math.inf
+        self._thread = None
+        self._stopped = False
+        self.loop_stat = None           # profiling.Stat: durasi emit per frame
+
+        # statistik
+        self.detents = 0
+        self.frames = 0
+        self.last_gain = base_gain
+        self.last_velocity = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def velocity(self, now):
+        # detent/s dari timestamp di dalam window; satu detent saja -> 0
+        stamps = self._stamps
+        while stamps and now - stamps[0] > self.window:
+            stamps.popleft()
+        if len(stamps) < 2:
+            return 0.0
+        span = stamps[-1] - stamps[0]
+        return (len(stamps) - 1) / span if span > 0 else 0.0
+
+    # dipanggil dari handler HID (delta = +/- jumlah detent)
+    def on_detent(self, delta, now=None):
+        if delta == 0:
+            return
+        if now is None:
+            now = self.clock()
+        with self._cond:
+            self._stamps.append(now)
+            v = self.velocity(now)
+            gain = gain_curve(v, self.base_gain, self.max_gain, self.knee, self.exponent)
+            amount = delta * self.scale * gain
+            if self._pending * amount < 0:
+                # arah berbalik -> sisa pecahan ke arah lama dibuang
+                self._pending = 0.0
+            self._pending += amount
+            self._pending_stamps.append(now)
+            self.detents += abs(delta)
+            self.last_gain = gain
+            self.last_velocity = v
+            self._cond.notify()
+
+    def reset(self):
+        with self._cond:
+            self._pending = 0.0
+            self._pending_stamps = []
+            self._stamps.clear()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "detents": self.detents,
+                "frames": self.frames,
+                "gain": self.last_gain,
+                "velocity": self.last_velocity,
+            }
+
+    # --- Worker thread ---
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    units = int(self._pending)
+                    if units == 0:
+                        self._cond.wait()
+                        continue
+                    now = self.clock()
+                    wait = self._last_emit + self.min_interval - now
+                    if wait > 0:
+                        # rate limit: detent berikutnya ikut terkumpul
+                        self._cond.wait(wait)
+                        continue
+                    break
+                self._pending -= units
+                stamps = self._pending_stamps
+                self._pending_stamps = []
+                self._last_emit = now
+                self.frames += 1
+            try:
+                self.emit(units, stamps)
+            except Exception as e:
+                print(f"[KNOB-ERROR] emit: {e}")
+            if self.loop_stat is not None:
+                self.loop_stat.add(self.clock() - now)
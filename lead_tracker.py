@@ -0,0 +1,183 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# --- Tracking prediktif: arahkan ke posisi target saat gerakan SELESAI ---
+# Gerak D butuh waktu (profil AccelStepper), ditambah latensi feed dan
+# serial, jadi tanpa lead antena selalu tertinggal dari target. LeadTracker:
+#   1. BearingPredictor: fit polinomial (rate + percepatan) ke bearing
+#      terakhir (unwrapped), extrapolasi ke waktu mana pun
+#   2. SlewModel: durasi gerak dari profil trapezoid AccelStepper (di sisi
+#      motor, jadi selisih antena / gear_ratio), dikalibrasi dari durasi
+#      [D]/[S] yang benar-benar terukur
+#   3. aim(): iterasi titik tetap t_tiba = now + durasi(bearing(t_tiba)),
+#      lalu bidik ke tengah jendela diam berikutnya (dwell) supaya target
+#      melintas di depan antena -> lebih sedikit D koreksi kecil
+
+MAX_SPEED = 15000.0       # steps/s, setMaxSpeed di AntTrack.ino
+ACCELERATION = 30000.0    # steps/s^2, setAcceleration
+
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+def trapezoid_time(steps, max_speed=MAX_SPEED, acceleration=ACCELERATION):
+    steps = abs(steps)
+    if steps == 0:
+        return 0.0
+    ramp = max_speed * max_speed / acceleration     # jarak akselerasi + rem
+    if steps <= ramp:
+        return 2.0 * math.sqrt(steps / acceleration)
+    return 2.0 * max_speed / acceleration + (steps - ramp) / max_speed
+
+
+class SlewModel:
+    def __init__(self, gear_ratio, steps_per_rev=3200, max_speed=MAX_SPEED,
+                 acceleration=ACCELERATION, latency=0.05, alpha=0.3):
+        self.gear_ratio = gear_ratio
+        self.steps_per_rev = steps_per_rev
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.latency = latency      # serial + parsing + loop firmware (s)
+        self.scale = 1.0            # durasi terukur / durasi teori
+        self.alpha = alpha
+        self.samples = 0
+
+    def motor_steps(self, antenna_delta):
+        return abs(antenna_delta) / self.gear_ratio * self.steps_per_rev / 360.0
+
+    def duration(self, antenna_delta):
+        return self.latency + self.scale * trapezoid_time(
+            self.motor_steps(antenna_delta), self.max_speed, self.acceleration)
+
+    def observe(self, antenna_delta, measured):
+        # satu gerakan selesai: SKIP (delta 0) mengkalibrasi latensi,
+        # gerakan nyata mengkalibrasi skala kecepatan
+        theory = trapezoid_time(self.motor_steps(antenna_delta), self.max_speed, self.acceleration)
+        if theory < 0.02:
+            self.latency += self.alpha * (measured - self.latency)
+        else:
+            ratio = max(0.2, (measured - self.latency) / theory)
+            self.scale += self.alpha * (ratio - self.scale)
+        self.samples += 1
+
+    def slew_rate(self):
+        # kecepatan antena puncak efektif (deg/s)
+        return self.max_speed / self.scale * 360.0 / self.steps_per_rev * self.gear_ratio
+
+
+class BearingPredictor:
+    def __init__(self, window=8.0, max_samples=32, accel_span=2.0, tau=2.0):
+        self.window = window
+        self.accel_span = accel_span     # minimal rentang waktu untuk fit percepatan
+        self.tau = tau                   # bobot sampel ~ exp(-umur / tau)
+        self.samples = deque(maxlen=max_samples)
+        self._fit = None
+
+    def reset(self):
+        self.samples.clear()
+        self._fit = None
+
+    def add(self, t, bearing):
+        if self.samples:
+            t_last, b_last = self.samples[-1]
+            if t <= t_last:
+                return
+            bearing = b_last + wrap180(bearing - b_last)   # unwrap
+        self.samples.append((t, bearing))
+        while self.samples and t - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        self._fit = None
+
+    def fit(self):
+        # -> (t_ref, koefisien polinomial dalam (t - t_ref)) atau None
+        if self._fit is None and self.samples:
+            t = np.fromiter((s[0] for s in self.samples), float, len(self.samples))
+            b = np.fromiter((s[1] for s in self.samples), float, len(self.samples))
+            t_ref = t[-1]
+            span = t[-1] - t[0]
+            degree = 2 if len(t) >= 5 and span >= self.accel_span else min(1, len(t) - 1)
+            if degree:
+                w = np.exp((t - t_ref) / (2.0 * self.tau))   # polyfit: bobot pada residual
+                coef = np.polyfit(t - t_ref, b, degree, w=w)
+                if degree == 2 and len(t) >= 2:
+                    # sanity: arah rate di t_ref harus sama dengan dua sampel terakhir
+                    recent = (b[-1] - b[-2]) / (t[-1] - t[-2])
+                    if coef[1] * recent < 0:
+                        degree = 1
+                        coef = np.polyfit(t - t_ref, b, 1, w=w * w)
+            else:
+                coef = np.array([b[-1]])
+            # suku percepatan hanya dipercaya sejauh separuh rentang data, dan
+            # tidak sampai membalik arah (puncak parabola) yang belum teramati
+            horizon = span / 2.0
+            if degree == 2 and coef[0] != 0:
+                vertex = -coef[1] / (2.0 * coef[0])
+                if 0 < vertex < horizon:
+                    horizon = vertex
+            self._fit = (t_ref, coef, horizon)
+        return self._fit
+
+    def predict(self, t):
+        fit = self.fit()
+        if fit is None:
+            return None
+        t_ref, coef, horizon = fit
+        dt = t - t_ref
+        if len(coef) < 3 or dt <= horizon:
+            return float(np.polyval(coef, dt)) % 360.0
+        # lewat horizon: lanjut linear dengan rate di horizon
+        rate = float(np.polyval(np.polyder(coef), horizon))
+        return (float(np.polyval(coef, horizon)) + rate * (dt - horizon)) % 360.0
+
+    def rate(self, t):
+        fit = self.fit()
+        if fit is None or len(fit[1]) < 2:
+            return 0.0
+        t_ref, coef, horizon = fit
+        return float(np.polyval(np.polyder(coef), min(t - t_ref, horizon)))
+
+
+class LeadTracker:
+    def __init__(self, slew, dwell=1.0, deadband=1.5, max_lead=45.0, max_age=3.0, iterations=4):
+        self.slew = slew
+        self.dwell = dwell            # perkiraan jeda sampai command berikutnya (s)
+        self.deadband = deadband      # error tracking (deg antena) sebelum mengirim
+        self.max_lead = max_lead      # batas extrapolasi (deg)
+        self.max_age = max_age        # sampel terakhir lebih tua -> tidak extrapolasi
+        self.iterations = iterations
+        self.predictor = BearingPredictor()
+
+    def reset(self):
+        self.predictor.reset()
+
+    def observe(self, t, bearing):
+        self.predictor.add(t, bearing)
+
+    def fresh(self, now):
+        samples = self.predictor.samples
+        return bool(samples) and now - samples[-1][0] <= self.max_age
+
+    def error(self, now, antenna_bearing):
+        if not self.fresh(now):
+            return None
+        target = self.predictor.predict(now)
+        return abs(wrap180(target - antenna_bearing))
+
+    def aim(self, now, antenna_bearing):
+        # -> (bearing yang dikirim, perkiraan waktu tiba) atau None
+        if not self.fresh(now):
+            return None
+        current = self.predictor.predict(now)
+        t_arrive = now
+        for _ in range(self.iterations):
+            target = self.predictor.predict(t_arrive)
+            t_arrive = now + self.slew.duration(wrap180(target - antenna_bearing))
+        # tengah jendela diam: target lewat di depan antena, bukan tertinggal
+        aim = self.predictor.predict(t_arrive + self.dwell / 2.0)
+        lead = wrap180(aim - current)
+        if abs(lead) > self.max_lead:
+            aim = (current + math.copysign(self.max_lead, lead)) % 360.0
+        return aim, t_arrive
@@ -0,0 +1,101 @@
+import threading
+from collections import deque
+
+from feedback_parser import Feedback, format_feedback
+
+# --- Log pipeline: ring buffer thread-safe + drain batch di Tk main loop ---
+# Thread worker hanya memanggil write()/write_many(); widget Text hanya
+# disentuh dari main loop lewat after(), dengan batas jumlah baris tampil.
+
+
+def format_log(item):
+    # record Feedback baru diformat di main loop, bukan di thread pembaca
+    return format_feedback(item) if isinstance(item, Feedback) else str(item)
+
+
+class LogRing:
+    def __init__(self, capacity=4096):
+        self._buf = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.capacity = capacity
+        self.pushed = 0
+        self.dropped = 0
+
+    def push(self, item):
+        with self._lock:
+            if len(self._buf) == self.capacity:
+                self.dropped += 1  # yang paling lama tertimpa
+            self._buf.append(item)
+            self.pushed += 1
+
+    def push_many(self, items):
+        with self._lock:
+            overflow = len(self._buf) + len(items) - self.capacity
+            if overflow > 0:
+                self.dropped += overflow
+            self._buf.extend(items)
+            self.pushed += len(items)
+
+    def drain(self, max_items):
+        with self._lock:
+            n = min(max_items, len(self._buf))
+            popleft = self._buf.popleft
+            return [popleft() for _ in range(n)]
+
+    def __len__(self):
+        return len(self._buf)
+
+
+class LogView:
+    def __init__(self, root, text, capacity=4096, interval=100,
+                 max_batch=500, max_lines=1000, formatter=format_log):
+        self.root = root
+        self.text = text
+        self.ring = LogRing(capacity)
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_lines = max_lines
+        self.formatter = formatter
+        self.lines = 0
+        self.rendered = 0
+        self.skipped = 0
+
+    def start(self):
+        self.root.after(self.interval, self._drain)
+        return self
+
+    # aman dipanggil dari thread mana pun
+    def write(self, item):
+        self.ring.push(item)
+
+    def write_many(self, items):
+        self.ring.push_many(items)
+
+    def stats(self):
+        return {
+            "pending": len(self.ring),
+            "rendered": self.rendered,
+            "dropped": self.ring.dropped + self.skipped,
+        }
+
+    def _drain(self):
+        items = self.ring.drain(self.max_batch)
+        if items:
+            # yang langsung terpotong retensi tidak perlu dirender
+            if len(items) > self.max_lines:
+                self.skipped += len(items) - self.max_lines
+                items = items[-self.max_lines:]
+            fmt = self.formatter
+            chunk = "\n".join([fmt(item) for item in items]) + "\n"
+            self.text.insert("end", chunk)
+            self.lines += chunk.count("\n")
+            self.rendered += len(items)
+
+            excess = self.lines - self.max_lines
+            if excess > 0:
+                self.text.delete("1.0", f"{excess + 1}.0")
+                self.lines -= excess
+            self.text.see("end")
+
+        # masih ada antrian -> drain lagi secepatnya
+        self.root.after(1 if len(self.ring) else self.interval, self._drain)
@@ -0,0 +1,176 @@
+import threading
+import time
+
+# --- Move planner: target bearing -> satu command S<steps> relatif ---
+# move_to() langsung kembali; gerakan berjalan di firmware dan selesai saat
+# feedback [S]/[S-SKIP] masuk lewat on_records(). Gerakan bisa dibatalkan
+# (mis. didahului knob) tanpa memblokir thread lain.
+#
+# S di AntTrack.ino non-blocking: S baru saat motor masih jalan menambah
+# target, dan hanya S terakhir yang dibalas [S]. Target baru direncanakan
+# dari target firmware (posisi + S yang belum selesai), dan cancel() mengirim
+# X: motor rem dan [X] membawa posisi berhenti (encoder, relatif terhadap
+# [S] terakhir). preempt=False untuk firmware lama (S blocking, tanpa X):
+# satu [S] per S, cancel() hanya melepas host dari gerakan itu.
+
+STEPS_PER_REV = 3200
+MIN_MOVE_DEG = 1.0         # toleranceDeg firmware: S lebih kecil di-SKIP
+
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class Move:
+    def __init__(self, target, steps, t_start):
+        self.target = target
+        self.steps = steps
+        self.t_start = t_start
+        self.t_done = None
+        self.outcome = None      # "done", "skip", "cancelled"
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class MovePlanner:
+    def __init__(self, transport, steps_per_rev=STEPS_PER_REV, on_done=None, preempt=True):
+        self.transport = transport
+        self.steps_per_rev = steps_per_rev
+        self.on_done = on_done
+        self.preempt = preempt
+        self.lock = threading.Lock()
+        self.position = 0          # step, estimasi host
+        self.in_flight = []        # Move yang menunggu [S]/[S-SKIP] (FIFO)
+        self.active = None         # Move manual terakhir yang belum selesai/batal
+        self.stopping = False      # X terkirim, menunggu [X]
+        self.enc_ref = None        # sudut encoder saat position terakhir pasti
+        self.pos_ref = 0
+
+    def bearing(self):
+        with self.lock:
+            return (self.position * 360.0 / self.steps_per_rev) % 360
+
+    def plan(self, target_bearing):
+        # jalur terpendek (-180..180) dari target firmware, dalam step
+        with self.lock:
+            target = self.position + sum(m.steps for m in self.in_flight)
+        current = target * 360.0 / self.steps_per_rev
+        delta = (target_bearing - current + 540) % 360 - 180
+        return int(round(delta * self.steps_per_rev / 360.0))
+
+    def move_to(self, target_bearing):
+        if self.preempt:
+            # S baru menambah target firmware: gerak lama tidak perlu dihentikan
+            self._finish(self.active, "superseded")
+        else:
+            self.cancel()
+        steps = self.plan(target_bearing)
+        move = Move(target_bearing, steps, time.monotonic())
+        with self.lock:
+            self.in_flight.append(move)
+            self.active = move
+        self.transport.send(f"S{steps}")
+        return move
+
+    def cancel(self):
+        with self.lock:
+            move = self.active
+            self.active = None
+            running = move is not None and not move.done.is_set()
+            if running and self.preempt:
+                # sisa S dibuang firmware; posisi baru diketahui dari [X]
+                self.in_flight = []
+                self.stopping = True
+        if running:
+            if self.preempt:
+                self.transport.send("X")
+            self._finish(move, "cancelled")
+            return True
+        return False
+
+    def _finish(self, move, outcome):
+        with self.lock:
+            if self.active is move:
+                self.active = None
+        if move is not None and not move.done.is_set():
+            move.outcome = outcome
+            move.t_done = time.monotonic()
+            move.done.set()
+
+    def busy(self):
+        move = self.active
+        return move is not None and not move.done.is_set()
+
+    # gerak relatif dari knob (K dalam derajat motor)
+    def on_knob(self, steps):
+        with self.lock:
+            self.position += steps
+
+    def reset(self):
+        with self.lock:
+            self.position = 0
+            self.in_flight = []
+            self.stopping = False
+            self.enc_ref = None
+
+    def _take(self, label):
+        # Move yang dibalas feedback ini (dengan lock dipegang)
+        if not self.in_flight:
+            return []
+        if not self.preempt:
+            return [self.in_flight.pop(0)]
+        if label == "S-SKIP":
+            # SKIP langsung dibalas saat diterima: S kecil tertua yang masih menunggu
+            for move in self.in_flight:
+                if abs(move.steps) * 360.0 / self.steps_per_rev < MIN_MOVE_DEG:
+                    self.in_flight.remove(move)
+                    return [move]
+            return [self.in_flight.pop(0)]
+        # [S] hanya untuk S terakhir: semua S sebelumnya ikut selesai
+        moves = [m for m in self.in_flight if abs(m.steps) * 360.0 / self.steps_per_rev >= MIN_MOVE_DEG]
+        self.in_flight = []
+        return moves
+
+    def _stopped_at(self, deg):
+        # setelah X titik berhenti tidak diketahui host: ambil dari encoder,
+        # relatif ke posisi pasti terakhir (dengan lock dipegang)
+        if self.enc_ref is not None and deg is not None:
+            delta = wrap180(deg - self.enc_ref)
+            self.position = self.pos_ref + int(round(delta * self.steps_per_rev / 360.0))
+        self.stopping = False
+
+    # dipanggil dari thread pembaca serial
+    def on_records(self, records):
+        for rec in records:
+            if rec.label == "X":
+                with self.lock:
+                    if self.stopping:
+                        self._stopped_at(rec.deg)
+                    if rec.deg is not None:
+                        self.enc_ref, self.pos_ref = rec.deg, self.position
+                continue
+            if rec.label not in ("S", "S-SKIP"):
+                continue
+            with self.lock:
+                moves = self._take(rec.label)
+                if rec.label == "S" and self.stopping:
+                    # S setelah X menggantikan [X]: posisi akhir dari encoder
+                    self._stopped_at(rec.deg)
+                else:
+                    for move in moves:
+                        if rec.label == "S":
+                            self.position += move.steps
+                for move in moves:
+                    if self.active is move:
+                        self.active = None
+                if rec.label == "S" and rec.deg is not None and not self.in_flight:
+                    self.enc_ref, self.pos_ref = rec.deg, self.position
+            for move in moves:
+                if not move.done.is_set():
+                    move.outcome = "done" if rec.label == "S" else "skip"
+                    move.t_done = time.monotonic()
+                    move.done.set()
+                    if self.on_done is not None:
+                        self.on_done(move)
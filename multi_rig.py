@@ -0,0 +1,490 @@
+import argparse
+import json
+import os
+import selectors
+import sys
+import threading
+import time
+
+import numpy as np
+
+from cable_wrap import CableWrap
+from feedback_parser import FeedbackParser
+from serial_transport import coalesce_commands
+
+# --- Multi-rig: banyak antena (port serial) dari satu proses ---
+# State semua rig disimpan sebagai struct-of-arrays NumPy (RigArray), satu
+# baris per rig dan satu kolom per channel needle:
+#   RED  = bearing motor, ikut feedback sensor ([SENSOR]) dan command
+#   BLUE = bearing motor, hanya ikut feedback command (S/K/D/C/Q)
+# Interpolasi needle (dulu per variabel _red/_blue di update_needles) jalan
+# vectorized untuk semua rig sekaligus.
+#
+# IO semua port ditangani satu event loop (selectors) di satu thread: baca
+# non-blocking -> FeedbackParser per rig, tulis dari buffer keluar per rig.
+# Butuh port dengan fileno() (Linux/macOS); di Windows pakai satu
+# SerialTransport per port seperti ControlTMC2209.py.
+
+RED = 0
+BLUE = 1
+CHANNELS = 2
+
+MOTOR_TEETH = 76
+ANTENNA_TEETH = 228
+STEPS_PER_REV = 3200
+MAX_STEP_PER_FRAME = 20.0
+
+
+def adjust_to_reference(feedback_deg, reference_abs):
+    # feedback 0..360 -> putaran terdekat dari reference (absolut, multi-turn);
+    # reference NaN -> feedback apa adanya
+    k = np.round((reference_abs - feedback_deg) / 360.0)
+    return np.where(np.isnan(reference_abs), feedback_deg, feedback_deg + 360.0 * k)
+
+
+class RigArray:
+    # Semua method dipanggil dengan self.lock dipegang oleh pemanggil, supaya
+    # satu batch feedback / satu frame interpolasi cukup satu kali lock.
+    def __init__(self, n, gear_ratio=MOTOR_TEETH / ANTENNA_TEETH, steps_per_rev=STEPS_PER_REV):
+        self.n = n
+        self.lock = threading.Lock()
+        self.bearing = np.zeros((n, CHANNELS))
+        self.target = np.full((n, CHANNELS), np.nan)      # NaN = belum ada target
+        self.s_direction = np.zeros((n, CHANNELS), dtype=np.int8)
+        self.waiting = np.zeros((n, CHANNELS), dtype=bool)
+        self.gear_ratio = np.broadcast_to(np.asarray(gear_ratio, dtype=float), (n,)).copy()
+        self.steps_per_rev = np.broadcast_to(np.asarray(steps_per_rev, dtype=float), (n,)).copy()
+
+    # --- Command dari UI / operator (rows: index, slice, atau array index) ---
+    def command_d(self, rows, deg):
+        self.target[rows] = adjust_to_reference(float(deg), self.bearing[rows])
+        self.s_direction[rows] = 0
+        self.waiting[rows] = False
+
+    def command_s(self, rows, steps):
+        delta = steps / self.steps_per_rev[rows] * 360.0
+        self.target[rows] = self.bearing[rows] + np.asarray(delta)[..., None]
+        self.s_direction[rows] = 1 if steps > 0 else -1
+        self.waiting[rows] = True
+
+    def command_c(self, rows):
+        self.waiting[rows] = True
+
+    def command_x(self, rows):
+        # stop: target ditahan di posisi sekarang sampai [X] membawa posisi berhenti
+        self.target[rows] = self.bearing[rows]
+        self.s_direction[rows] = 0
+        self.waiting[rows] = True
+
+    def apply_command(self, rows, cmd):
+        # False kalau command tidak mengubah state needle (mis. Q, B1, K)
+        kind = cmd[:1]
+        if kind == "D":
+            deg = int(cmd[1:])
+            if not 0 <= deg <= 360:
+                return False
+            self.command_d(rows, deg)
+        elif kind == "S":
+            self.command_s(rows, int(cmd[1:]))
+        elif kind == "C":
+            self.command_c(rows)
+        elif kind == "X":
+            self.command_x(rows)
+        else:
+            return False
+        return True
+
+    # --- Feedback dari Arduino ---
+    def apply_records(self, row, records):
+        for rec in records:
+            label = rec.label
+            if label is None:
+                continue
+            angle = rec.deg  # 0..360 dari Arduino
+            if label in ("SENSOR", "P"):
+                # [P] = stream posisi saat gerak (T<hz>): red langsung ke posisi terukur
+                adjusted = adjust_to_reference(angle, self.bearing[row, RED])
+                self.bearing[row, RED] = adjusted
+                self.target[row, RED] = adjusted
+                self.s_direction[row, RED] = 0
+            elif label in ("S", "S-SKIP", "K", "D", "D-SKIP", "C", "Q", "X"):
+                target = self.target[row]
+                ref = np.where(np.isnan(target), self.bearing[row], target)
+                adjusted = adjust_to_reference(angle, ref)
+                self.bearing[row] = adjusted
+                self.target[row] = adjusted
+                self.s_direction[row] = 0
+                self.waiting[row] = False
+
+    # --- Interpolasi needle, semua rig sekaligus ---
+    def interpolate(self, max_step=MAX_STEP_PER_FRAME):
+        bearing = self.bearing
+        target = self.target
+        direction = self.s_direction
+        has_target = ~np.isnan(target)
+        remaining = np.where(has_target, target - bearing, 0.0)
+
+        # S: gerak konstan max_step per frame ke arah target (arah dikoreksi bila salah)
+        slewing = has_target & (direction != 0)
+        easing = has_target & (direction == 0) & ~self.waiting
+        np.copyto(direction, np.sign(remaining).astype(np.int8), where=slewing & (remaining != 0))
+        step = np.where(slewing, direction * np.minimum(max_step, np.abs(remaining)), 0.0)
+
+        # D/feedback: mendekat 20% per frame, langsung snap kalau sudah sangat dekat
+        ease = remaining * 0.2
+        ease = np.where(np.abs(ease) < 0.01, remaining, ease)
+        step = np.where(easing, ease, step)
+        bearing += step
+
+        arrived = slewing & (np.abs(bearing - target) < 0.5)
+        np.copyto(bearing, target, where=arrived)
+        direction[arrived] = 0
+
+        # True per rig yang masih bergerak
+        return (has_target & (target != bearing)).any(axis=1)
+
+    def antenna(self):
+        return (self.bearing * self.gear_ratio[:, None]) % 360.0
+
+
+# --- Konfigurasi ---
+def load_config(path):
+    # {"rigs": [{"name": "mast1", "port": "/dev/ttyACM0", "baud": 115200,
+    #            "motor_teeth": 76, "antenna_teeth": 228, "steps_per_rev": 3200,
+    #            "wrap": [-270, 270], "wrap_state": "mast1.wrap.json"}]}
+    # wrap = batas lilitan kabel (deg antena dari netral), opsional
+    with open(path) as f:
+        data = json.load(f)
+    rigs = data["rigs"] if isinstance(data, dict) else data
+    out = []
+    for i, rig in enumerate(rigs):
+        cfg = {
+            "name": rig.get("name", f"rig{i}"),
+            "port": rig["port"],
+            "baud": rig.get("baud", 115200),
+            "motor_teeth": rig.get("motor_teeth", MOTOR_TEETH),
+            "antenna_teeth": rig.get("antenna_teeth", ANTENNA_TEETH),
+            "steps_per_rev": rig.get("steps_per_rev", STEPS_PER_REV),
+            "wrap": rig.get("wrap"),
+            "wrap_state": rig.get("wrap_state"),
+        }
+        out.append(cfg)
+    names = [cfg["name"] for cfg in out]
+    if len(set(names)) != len(names):
+        raise ValueError("rig names must be unique")
+    return out
+
+
+def open_serial(cfg):
+    import serial
+    return serial.Serial(cfg["port"], cfg["baud"], timeout=0)
+
+
+class _RigIO:
+    def __init__(self, index, cfg, port):
+        self.index = index
+        self.name = cfg["name"]
+        self.port = port
+        self.fd = port.fileno()
+        os.set_blocking(self.fd, False)
+        self.parser = FeedbackParser()
+        self.commands = []          # (cmd, t_enqueue) menunggu diencode
+        self.out = bytearray()      # byte yang belum tertulis
+        self.writing = False
+        self.online = True
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.records = 0
+        self.errors = 0
+
+
+class MultiRigController:
+    def __init__(self, configs, on_records=None, open_port=open_serial):
+        # on_records(name, records): dipanggil dari thread event loop
+        self.configs = configs
+        self.names = [cfg["name"] for cfg in configs]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.on_records = on_records
+        self.open_port = open_port
+        self.rigs = RigArray(
+            len(configs),
+            gear_ratio=[cfg["motor_teeth"] / cfg["antenna_teeth"] for cfg in configs],
+            steps_per_rev=[cfg["steps_per_rev"] for cfg in configs],
+        )
+        # CableWrap per rig (None = tanpa batas lilitan), posisi dari RigArray
+        self.wraps = [
+            CableWrap(cfg["motor_teeth"] / cfg["antenna_teeth"], cfg["steps_per_rev"], cfg["wrap"],
+                      position=lambda row=i: self._position(row), state_path=cfg.get("wrap_state"))
+            if cfg.get("wrap") else None
+            for i, cfg in enumerate(configs)
+        ]
+        self._io = []
+        self._sel = selectors.DefaultSelector()
+        self._queue_lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        for i, cfg in enumerate(self.configs):
+            io = _RigIO(i, cfg, self.open_port(cfg))
+            self._io.append(io)
+            self._sel.register(io.fd, selectors.EVENT_READ, io)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stopped = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for io in self._io:
+            try:
+                io.port.close()
+            except Exception:
+                pass
+        self._sel.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def rows(self, target):
+        # None / "*" -> semua rig; nama atau index -> satu rig
+        if target is None or target == "*":
+            return list(range(len(self.names)))
+        if isinstance(target, str):
+            return [self.index[target]]
+        return [target]
+
+    def send(self, target, cmd):
+        cmd = cmd.strip().upper()
+        if not cmd:
+            return False
+        # command per rig bisa beda (guard cable wrap); rig dengan command yang
+        # sama tetap satu apply_command vectorized
+        groups = {}
+        for row in self.rows(target):
+            wrap = self.wraps[row]
+            row_cmd = cmd if wrap is None else wrap.guard(cmd)
+            if row_cmd:
+                groups.setdefault(row_cmd, []).append(row)
+        if not groups:
+            return False
+        with self.rigs.lock:
+            for row_cmd, rows in groups.items():
+                self.rigs.apply_command(rows, row_cmd)
+        now = time.perf_counter()
+        with self._queue_lock:
+            for row_cmd, rows in groups.items():
+                for row in rows:
+                    self._io[row].commands.append((row_cmd, now))
+        self._wake()
+        return True
+
+    def _position(self, row):
+        # (sekarang, target) deg motor multi-turn untuk CableWrap
+        with self.rigs.lock:
+            current = float(self.rigs.bearing[row, RED])
+            target = float(self.rigs.target[row, BLUE])
+            return current, (float(self.rigs.bearing[row, BLUE]) if np.isnan(target) else target)
+
+    def tick(self, max_step=MAX_STEP_PER_FRAME):
+        # satu frame interpolasi; hasil disalin supaya render di luar lock
+        with self.rigs.lock:
+            moving = self.rigs.interpolate(max_step)
+            return self.rigs.bearing.copy(), self.rigs.antenna(), moving
+
+    def stats(self):
+        return {
+            io.name: {
+                "online": io.online,
+                "bytes_in": io.bytes_in,
+                "bytes_out": io.bytes_out,
+                "records": io.records,
+                "errors": io.errors,
+                "pending_out": len(io.out),
+                "wrap": None if self.wraps[io.index] is None else self.wraps[io.index].stats(),
+            }
+            for io in self._io
+        }
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass  # pipe penuh -> loop memang sudah akan bangun
+
+    # --- Event loop ---
+    def _run(self):
+        while not self._stopped:
+            for key, events in self._sel.select():
+                io = key.data
+                if io is None:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                if events & selectors.EVENT_READ:
+                    self._read(io)
+                if events & selectors.EVENT_WRITE and io.online:
+                    self._write(io)
+            self._collect()
+
+    def _collect(self):
+        # pindahkan command antrian -> buffer keluar (K berurutan digabung)
+        with self._queue_lock:
+            pending = [(io, io.commands) for io in self._io if io.commands]
+            for io, _ in pending:
+                io.commands = []
+        for io, commands in pending:
+            if not io.online:
+                continue
+            io.out += "".join([cmd + "\n" for cmd, _ in coalesce_commands(commands)]).encode()
+            self._write(io)
+
+    def _read(self, io):
+        try:
+            data = os.read(io.fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._fail(io, e)
+            return
+        if not data:
+            self._fail(io, "port closed")
+            return
+        io.bytes_in += len(data)
+        records = io.parser.feed(data)
+        if not records:
+            return
+        io.records += len(records)
+        with self.rigs.lock:
+            self.rigs.apply_records(io.index, records)
+        if self.wraps[io.index] is not None:
+            self.wraps[io.index].on_records(records)
+        if self.on_records is not None:
+            self.on_records(io.name, records)
+
+    def _write(self, io):
+        if io.out:
+            try:
+                n = os.write(io.fd, io.out)
+                del io.out[:n]
+                io.bytes_out += n
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                self._fail(io, e)
+                return
+        want = bool(io.out)
+        if want != io.writing:
+            # EVENT_WRITE hanya selama masih ada sisa byte
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if want else 0)
+            self._sel.modify(io.fd, events, io)
+            io.writing = want
+
+    def _fail(self, io, err):
+        print(f"[RIG-ERROR] {io.name}: {err}", flush=True)
+        io.errors += 1
+        io.online = False
+        io.out.clear()
+        try:
+            self._sel.unregister(io.fd)
+        except (KeyError, ValueError):
+            pass
+
+
+# --- CLI: headless, command dari stdin "<nama|*> <CMD>" ---
+def main():
+    ap = argparse.ArgumentParser(description="Drive several AntTrack rigs from one process")
+    ap.add_argument("--config", help="JSON rig list (see rigs.example.json)")
+    ap.add_argument("--emulate", type=int, default=0, help="spawn N emulated rigs on pseudo-terminals")
+    ap.add_argument("--reset-wait", type=float, default=2.0, help="Arduino reset wait after open (s)")
+    ap.add_argument("--status", type=float, default=1.0, help="status print interval (s), 0 = off")
+    ap.add_argument("--frame", type=float, default=0.02, help="interpolation frame (s)")
+    ap.add_argument("--log", help="record commands and feedback to this directory (telemetry_log.py)")
+    ap.add_argument("--stream", type=int, default=0, help="position stream rate during moves (Hz, 0 = off)")
+    args = ap.parse_args()
+
+    emulators = []
+    if args.emulate:
+        from anttrack_emulator import PtyEmulator
+        emulators = [PtyEmulator(noise_raw=0.5, seed=i).start() for i in range(args.emulate)]
+        configs = [{"name": f"emu{i}", "port": e.slave_name, "baud": 115200, "motor_teeth": MOTOR_TEETH,
+                    "antenna_teeth": ANTENNA_TEETH, "steps_per_rev": STEPS_PER_REV}
+                   for i, e in enumerate(emulators)]
+        args.reset_wait = 0.1
+    elif args.config:
+        configs = load_config(args.config)
+    else:
+        ap.error("--config or --emulate is required")
+
+    recorder = None
+    if args.log:
+        from telemetry_log import TelemetryRecorder
+        recorder = TelemetryRecorder(args.log).start()
+    rig_ids = {cfg["name"]: i for i, cfg in enumerate(configs)}
+
+    def on_records(name, records):
+        if recorder is not None:
+            recorder.on_records(records, rig_ids[name])
+        for rec in records:
+            if rec.label not in (None, "SENSOR", "P"):
+                print(f"[{name}] [{rec.label}] {rec.deg:.2f}°", flush=True)
+
+    ctl = MultiRigController(configs, on_records=on_records).start()
+    print(f"[RIG] {len(configs)} rig(s): {', '.join(ctl.names)}", flush=True)
+    time.sleep(args.reset_wait)
+    startup = ["Q"] + ([f"T{args.stream}"] if args.stream else [])
+    for cmd in startup:
+        ctl.send("*", cmd)
+        if recorder is not None:
+            for row in ctl.rows("*"):
+                recorder.command(cmd, row)
+
+    def stdin_loop():
+        for line in sys.stdin:
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                print("usage: <name|*> <command>   e.g. '* D90', 'mast1 S800'", flush=True)
+                continue
+            try:
+                ctl.send(parts[0], parts[1])
+                if recorder is not None:
+                    for row in ctl.rows(parts[0]):
+                        recorder.command(parts[1].strip().upper(), row)
+            except (KeyError, ValueError) as e:
+                print(f"[RIG-ERROR] {e}", flush=True)
+
+    threading.Thread(target=stdin_loop, daemon=True).start()
+
+    next_status = time.perf_counter() + args.status
+    try:
+        while True:
+            _, antenna, _ = ctl.tick()
+            now = time.perf_counter()
+            if args.status and now >= next_status:
+                next_status = now + args.status
+                print("[STATUS] " + "  ".join(f"{name} {antenna[i, RED]:6.1f}°"
+                                              for i, name in enumerate(ctl.names)), flush=True)
+            time.sleep(args.frame)
+    except KeyboardInterrupt:
+        print("\n[RIG] stopped")
+    finally:
+        ctl.stop()
+        if recorder is not None:
+            recorder.close()
+        for e in emulators:
+            e.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import math
+
+# --- Renderer jarum kanvas dengan dirty-tracking ---
+# Endpoint jarum diambil dari tabel sudut yang dihitung sekali di awal;
+# canvas.coords dan StringVar hanya disentuh kalau nilainya berubah.
+
+FRAME_MS = 20    # saat jarum bergerak
+IDLE_MS = 100    # saat diam (hanya cek state, tanpa gambar)
+
+
+class Needle:
+    def __init__(self, canvas, item, cx, cy, r, var=None, fmt="{:.2f}°", resolution=0.1):
+        self.canvas = canvas
+        self.item = item
+        self.cx = cx
+        self.cy = cy
+        self.var = var
+        self.fmt = fmt
+        self.resolution = resolution
+        self.size = int(round(360.0 / resolution))
+        # 0° di atas, searah jarum jam (sama seperti radians(bearing - 90))
+        self.table = [
+            (cx + r * math.cos(math.radians(i * resolution - 90)),
+             cy + r * math.sin(math.radians(i * resolution - 90)))
+            for i in range(self.size)
+        ]
+        self.index = None
+        self.value = None
+        self.text = None
+        self.redraws = 0
+
+    def show(self, bearing):
+        if bearing == self.value:
+            return False
+        self.value = bearing
+        changed = False
+
+        idx = int(round(bearing / self.resolution)) % self.size
+        if idx != self.index:
+            self.index = idx
+            x, y = self.table[idx]
+            self.canvas.coords(self.item, self.cx, self.cy, x, y)
+            self.redraws += 1
+            changed = True
+
+        if self.var is not None:
+            text = self.fmt.format(bearing)
+            if text != self.text:
+                self.text = text
+                self.var.set(text)
+                changed = True
+        return changed
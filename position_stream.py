@@ -0,0 +1,115 @@
+import threading
+import time
+
+# --- Stream posisi saat motor jalan: T<hz> -> [P] ---
+# Firmware mengirim [P] selama motor bergerak (rawAngle, dan di mode biner
+# juga step count + millis). Sudut di [P] masuk ke konsumen yang sama dengan
+# feedback lain (BearingFusion, RigArray), jadi needle dan tracker dikoreksi
+# posisi terukur 10-200 kali per detik, bukan hanya profil gerak.
+# PositionStream memantau stream itu sendiri:
+#   - sudut motor terukur terakhir (multi-turn) dan kecepatan dari selisih
+#     step/millis firmware (frame biner: bebas noise encoder dan jitter USB),
+#     atau encoder + waktu host (ASCII)
+#   - rate terukur vs diminta, jumlah jeda (sampel dilewati firmware saat
+#     buffer TX penuh, atau link lambat)
+# Stream dianggap hidup selama sampel datang dalam `stale_periods` periode.
+
+MAX_HZ = 200                 # maxStreamHz di AntTrack.ino
+STOP_LABELS = ("S", "D", "C", "X", "SENSOR", "Q")   # dikirim saat motor diam
+
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class PositionStream:
+    def __init__(self, rate_hz=50, steps_per_rev=3200, stale_periods=3.0, alpha=0.2,
+                 clock=time.perf_counter):
+        self.rate_hz = min(max(int(rate_hz), 0), MAX_HZ)
+        self.deg_per_step = 360.0 / steps_per_rev
+        self.stale_periods = stale_periods
+        self.alpha = alpha
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.reset()
+
+        # statistik
+        self.samples = 0
+        self.gaps = 0                # jeda > 2 periode saat stream hidup
+        self.interval = None         # EWMA jarak antar sampel (s)
+
+    def reset(self):
+        with self.lock:
+            self.angle = None        # sudut motor terukur (deg, multi-turn)
+            self.velocity = 0.0      # deg/s
+            self.t = None            # waktu host sampel terakhir
+            self.steps = None
+            self.ms = None
+            self.streaming = False
+
+    def command(self):
+        return f"T{self.rate_hz}"
+
+    def set_rate(self, hz, send):
+        self.rate_hz = min(max(int(hz), 0), MAX_HZ)
+        return send(self.command())
+
+    def period(self):
+        return 1.0 / self.rate_hz if self.rate_hz else 0.0
+
+    def on_records(self, records, now=None):
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            for rec in records:
+                if rec.label == "P" and rec.deg is not None:
+                    self._sample(rec, now)
+                elif rec.label in STOP_LABELS:
+                    self.streaming = False
+                    self.velocity = 0.0
+
+    def _sample(self, rec, now):
+        angle = rec.deg if self.angle is None else self.angle + wrap180(rec.deg - self.angle)
+        if self.streaming and self.t is not None:
+            dt_host = now - self.t
+            if rec.steps is not None and self.steps is not None and rec.ms is not None \
+                    and rec.ms != self.ms:
+                dt = ((rec.ms - self.ms) & 0xFFFFFFFF) / 1000.0
+                self.velocity = (rec.steps - self.steps) * self.deg_per_step / dt
+            elif dt_host > 0:
+                self.velocity = (angle - self.angle) / dt_host
+            self.interval = dt_host if self.interval is None else \
+                self.interval + self.alpha * (dt_host - self.interval)
+            if self.rate_hz and dt_host > 2.0 * self.period():
+                self.gaps += 1
+        self.angle = angle
+        self.t = now
+        self.steps = rec.steps
+        self.ms = rec.ms
+        self.streaming = True
+        self.samples += 1
+
+    def fresh(self, now=None):
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            return self._fresh(now)
+
+    def _fresh(self, now):
+        if not self.streaming or self.t is None or not self.rate_hz:
+            return False
+        return now - self.t <= self.stale_periods * self.period()
+
+    def stats(self):
+        now = self.clock()
+        with self.lock:
+            fresh = self._fresh(now)
+            return {
+                "rate_hz": self.rate_hz,
+                "measured_hz": round(1.0 / self.interval, 1) if self.interval else None,
+                "streaming": fresh,
+                "samples": self.samples,
+                "gaps": self.gaps,
+                "velocity_dps": round(self.velocity, 1) if fresh else 0.0,
+                "age_ms": None if self.t is None else round((now - self.t) * 1000.0, 1),
+            }
@@ -0,0 +1,120 @@
+import glob
+import os
+import select
+import struct
+import threading
+
+# --- Backend PowerMate untuk Linux (tanpa pywinusb) ---
+# Driver kernel `powermate` membuat node evdev (/dev/input/eventN): putaran =
+# EV_REL/REL_DIAL, tombol = EV_KEY/BTN_0. Kalau driver itu tidak ada dan
+# usbhid yang memegang device, report mentahnya ada di /dev/hidrawN
+# (byte 0 = tombol, byte 1 = putaran signed). Keduanya diterjemahkan ke format
+# report pywinusb (data[1] = tombol, data[2] = putaran sebagai byte), jadi
+# handler yang sama dengan read_knob / knob_handler dipakai di Windows dan Linux.
+# Akses butuh izin baca node, mis. udev rule:
+#   SUBSYSTEM=="input", ATTRS{idVendor}=="077d", MODE="0660", GROUP="input"
+
+POWERMATE_VID = "077d"
+EVENT = struct.Struct("llHHi")     # struct input_event (timeval native)
+EV_SYN, EV_KEY, EV_REL = 0, 1, 2
+REL_DIAL = 7
+BTN_0 = 0x100
+
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip().lower()
+    except OSError:
+        return ""
+
+
+def find_powermate():
+    # -> (path, "evdev" | "hidraw") atau None
+    for node in sorted(glob.glob("/sys/class/input/event*")):
+        if _read_text(os.path.join(node, "device/id/vendor")) == POWERMATE_VID:
+            return "/dev/input/" + os.path.basename(node), "evdev"
+    for node in sorted(glob.glob("/sys/class/hidraw/hidraw*")):
+        # HID_ID=0003:0000077D:00000410
+        for line in _read_text(os.path.join(node, "device/uevent")).splitlines():
+            if line.startswith("hid_id=") and line.split(":")[1][-4:] == POWERMATE_VID:
+                return "/dev/" + os.path.basename(node), "hidraw"
+    return None
+
+
+class PowerMateLinux:
+    def __init__(self, path, handler, kind="evdev"):
+        self.path = path
+        self.handler = handler
+        self.kind = kind
+        self.fd = None
+        self._thread = None
+        self._stopped = False
+        self.reports = 0
+
+    def start(self):
+        if self._thread is None:
+            self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=1.0):
+        self._stopped = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _emit(self, press, rotation):
+        rotation = max(-128, min(127, rotation))
+        self.reports += 1
+        try:
+            self.handler([0, press, rotation & 0xFF])
+        except Exception as e:
+            print(f"[KNOB-ERROR] handler: {e}")
+
+    def _run(self):
+        rotation, press = 0, 0
+        while not self._stopped:
+            ready, _, _ = select.select([self.fd], [], [], 0.2)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.fd, EVENT.size * 64)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                print(f"[KNOB-ERROR] {self.path}: {e}")
+                return
+            if self.kind == "hidraw":
+                if len(data) >= 2:
+                    self._emit(data[0], struct.unpack("b", data[1:2])[0])
+                continue
+            # evdev: kumpulkan sampai EV_SYN, satu report per paket
+            for i in range(0, len(data) - EVENT.size + 1, EVENT.size):
+                _, _, etype, code, value = EVENT.unpack_from(data, i)
+                if etype == EV_REL and code == REL_DIAL:
+                    rotation += value
+                elif etype == EV_KEY and code == BTN_0 and value == 1:
+                    press = 1
+                elif etype == EV_SYN:
+                    if rotation or press:
+                        self._emit(press, rotation)
+                    rotation, press = 0, 0
+
+
+def open_powermate(handler):
+    # -> PowerMateLinux yang sudah jalan, None kalau tidak ada / tidak bisa dibuka
+    found = find_powermate()
+    if found is None:
+        return None
+    path, kind = found
+    try:
+        return PowerMateLinux(path, handler, kind).start()
+    except PermissionError:
+        print(f"[KNOB-ERROR] {path}: permission denied (udev rule / input group)")
+        return None
@@ -0,0 +1,207 @@
+import json
+import threading
+import time
+
+# --- Profiling runtime: lag event loop, durasi loop worker, kontensi lock ---
+# Semua pengukuran O(1) per sampel (count, total, max + histogram log2 dalam
+# mikrodetik untuk p50/p95/p99), jadi aman dipasang permanen:
+#   - Lag: callback terjadwal (Tk after) vs jadwalnya, schedule() -> tick()
+#   - loop(name): durasi kerja per iterasi thread worker (tanpa waktu tunggu)
+#   - lock(lock, name): TimedLock, waktu tunggu acquire dan lama dipegang
+#   - counter(name, fn): counter kumulatif (mis. byte serial) -> rate per detik
+#   - probe: thread yang tidur probe_ms dan mengukur telatnya bangun. Probe
+#     telat juga -> GIL / CPU penuh; hanya lag Tk yang tinggi -> UI sendiri
+# start(publish) mengirim satu baris "[STATS] {json}" tiap interval (hub) dan
+# menambahkannya ke file dump (JSON per baris) kalau ada; statistik direset
+# tiap laporan, jadi angkanya per jendela interval.
+
+BUCKETS = 26               # 1 us .. 2^25 us (~33 s)
+
+
+class Stat:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.hist = [0] * BUCKETS
+
+    def add(self, seconds):
+        us = int(seconds * 1e6)
+        b = min(max(us, 0).bit_length(), BUCKETS - 1)    # [2^(b-1), 2^b) us
+        with self.lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.hist[b] += 1
+
+    def _percentile(self, q):
+        need = q * self.count
+        seen = 0
+        for b, n in enumerate(self.hist):
+            seen += n
+            if seen >= need:
+                # batas atas bucket (ms), tidak lebih dari max yang terukur
+                return round(min((1 << b) / 1000.0, self.max * 1000.0), 3)
+        return self.max * 1000.0
+
+    def snapshot(self, reset=False):
+        with self.lock:
+            if not self.count:
+                return {"n": 0}
+            out = {
+                "n": self.count,
+                "mean_ms": round(self.total / self.count * 1000.0, 3),
+                "p50_ms": self._percentile(0.50),
+                "p95_ms": self._percentile(0.95),
+                "p99_ms": self._percentile(0.99),
+                "max_ms": round(self.max * 1000.0, 3),
+                "total_ms": round(self.total * 1000.0, 1),
+            }
+            if reset:
+                self.reset()
+            return out
+
+
+class TimedLock:
+    # pengganti threading.Lock: with / acquire / release seperti biasa
+    def __init__(self, lock, wait, hold, clock=time.perf_counter):
+        self._lock = lock
+        self.wait = wait
+        self.hold = hold
+        self.clock = clock
+        self._t_acquired = 0.0     # hanya ditulis pemegang lock
+
+    def acquire(self, blocking=True, timeout=-1):
+        t0 = self.clock()
+        ok = self._lock.acquire(blocking, timeout)
+        if ok:
+            t1 = self.clock()
+            self.wait.add(t1 - t0)
+            self._t_acquired = t1
+        return ok
+
+    def release(self):
+        held = self.clock() - self._t_acquired
+        self._lock.release()
+        self.hold.add(held)
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class Lag:
+    # callback terjadwal: schedule(delay) saat menjadwalkan, tick() saat jalan
+    def __init__(self, stat, clock=time.perf_counter):
+        self.stat = stat
+        self.clock = clock
+        self.due = None
+
+    def schedule(self, delay):
+        self.due = self.clock() + delay
+
+    def tick(self):
+        if self.due is not None:
+            self.stat.add(max(0.0, self.clock() - self.due))
+            self.due = None
+
+
+class Profiler:
+    def __init__(self, interval=5.0, path=None, probe_ms=5.0, clock=time.perf_counter):
+        self.interval = interval       # detik antar [STATS], 0 = tanpa laporan periodik
+        self.path = path               # file dump JSON per baris (opsional)
+        self.probe_ms = probe_ms
+        self.clock = clock
+        self.stats = {}                # nama -> Stat
+        self.counters = {}             # nama -> fn() kumulatif
+        self._last = {}                # nama -> (t, nilai) untuk rate
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self.publish = None
+        self.reports = 0
+
+    # --- Registrasi ---
+    def stat(self, name):
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = Stat()
+            return stat
+
+    def loop(self, name):
+        return self.stat("loop." + name)
+
+    def lag(self, name):
+        return Lag(self.stat("lag." + name), self.clock)
+
+    def lock(self, lock, name):
+        return TimedLock(lock, self.stat(f"lock.{name}.wait"), self.stat(f"lock.{name}.hold"), self.clock)
+
+    def counter(self, name, fn):
+        self.counters[name] = fn
+        self._last[name] = (self.clock(), fn())
+
+    # --- Laporan ---
+    def snapshot(self, reset=False):
+        now = self.clock()
+        with self._lock:
+            stats = dict(self.stats)
+        out = {name: stat.snapshot(reset) for name, stat in sorted(stats.items())}
+        for name, fn in self.counters.items():
+            value = fn()
+            t, last = self._last[name]
+            dt = now - t
+            out["rate." + name] = round((value - last) / dt, 1) if dt > 0 else 0.0
+            if reset:
+                self._last[name] = (now, value)
+        return out
+
+    def report(self):
+        snap = self.snapshot(reset=True)
+        line = "[STATS] " + json.dumps(snap)
+        self.reports += 1
+        if self.publish is not None:
+            self.publish(line)
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"t": round(time.time(), 3), **snap}) + "\n")
+        return line
+
+    def start(self, publish=None):
+        self.publish = publish
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        probe = self.stat("lag.probe")
+        period = self.probe_ms / 1000.0
+        next_report = self.clock() + self.interval if self.interval else None
+        while not self._stopped.is_set():
+            t0 = self.clock()
+            self._stopped.wait(period)
+            probe.add(max(0.0, self.clock() - t0 - period))
+            if next_report is not None and self.clock() >= next_report:
+                next_report += self.interval
+                try:
+                    self.report()
+                except Exception as e:
+                    print(f"[STATS-ERROR] {e}")
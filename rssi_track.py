@@ -0,0 +1,341 @@
+import argparse
+import re
+import socket
+import threading
+import time
+
+import numpy as np
+
+from adsb_feed import open_output
+from bearing_fusion import BearingFusion, fused_send
+
+# --- Auto-tracking dari RSSI: step-track (hill climbing) dengan S<steps> ---
+# Sampel RSSI (serial / UDP / replay file) masuk ke ring buffer ukuran tetap.
+# Ring menyimpan prefix sum (v - ref) dan (v - ref)^2, jadi mean/std antara
+# dua nomor sampel mana pun O(1) tanpa men-scan ulang histori.
+#
+# Tracker tidak bangun per sampel: ia menunggu sampai ring mencapai nomor
+# sampel tertentu (cukup sampel untuk satu keputusan) atau feedback gerak.
+# Satu siklus: ukur di posisi sekarang -> geser +delta -> ukur -> kalau lebih
+# kuat (signifikan) tetap di sana dan lanjut arah yang sama, kalau tidak coba
+# sisi -delta, kalau dua-duanya tidak lebih baik kembali ke tengah dan
+# kecilkan langkah.
+
+NUMBER_RE = re.compile(rb"-?\d+(?:\.\d+)?")
+
+
+class RssiRing:
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.t = np.zeros(capacity)
+        self.v = np.zeros(capacity)
+        self.csum = np.zeros(capacity)     # prefix sum (v - ref) s/d sampel ini
+        self.csum2 = np.zeros(capacity)
+        self.seq = 0                       # jumlah sampel total (nomor sampel berikutnya)
+        self.ref = None
+        self._sum = 0.0
+        self._sum2 = 0.0
+        self._cond = threading.Condition()
+        self._wake_at = None               # seq yang ditunggu tracker
+
+    def push(self, t, value):
+        with self._cond:
+            if self.ref is None:
+                self.ref = value
+            d = value - self.ref
+            self._sum += d
+            self._sum2 += d * d
+            i = self.seq % self.capacity
+            self.t[i] = t
+            self.v[i] = value
+            self.csum[i] = self._sum
+            self.csum2[i] = self._sum2
+            self.seq += 1
+            if self._wake_at is not None and self.seq >= self._wake_at:
+                self._wake_at = None
+                self._cond.notify_all()
+
+    def wait_for(self, seq, timeout=None):
+        # blok sampai ada sampel nomor seq-1; True kalau tercapai
+        with self._cond:
+            if self.seq < seq:
+                self._wake_at = seq if self._wake_at is None else min(self._wake_at, seq)
+                self._cond.wait_for(lambda: self.seq >= seq, timeout)
+            return self.seq >= seq
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self, start, end=None):
+        # (n, mean, var) sampel [start, end); O(1)
+        with self._cond:
+            if end is None:
+                end = self.seq
+            start = max(start, end - self.capacity + 1, 0)
+            n = end - start
+            if n <= 0:
+                return 0, None, None
+            i_end = (end - 1) % self.capacity
+            s, s2 = self.csum[i_end], self.csum2[i_end]
+            if start > 0:
+                i0 = (start - 1) % self.capacity
+                s -= self.csum[i0]
+                s2 -= self.csum2[i0]
+            mean = s / n
+            var = max(0.0, s2 / n - mean * mean)
+            return n, mean + self.ref, var
+
+    def last(self, n):
+        # n sampel terakhir (untuk tampilan)
+        with self._cond:
+            n = min(n, self.seq, self.capacity)
+            idx = np.arange(self.seq - n, self.seq) % self.capacity
+            return self.t[idx].copy(), self.v[idx].copy()
+
+
+# --- Sumber RSSI ---
+def parse_rssi(data):
+    # ambil angka pertama tiap baris ("-72.5", "RSSI:-72", "rssi=-70 dBm")
+    out = []
+    for line in data.splitlines():
+        m = NUMBER_RE.search(line)
+        if m:
+            out.append(float(m.group()))
+    return out
+
+
+def _start(target, *args):
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+
+def serial_source(ring, port, baud=115200):
+    import serial
+
+    def run():
+        ser = serial.Serial(port, baud, timeout=1.0)
+        while True:
+            line = ser.readline()
+            for value in parse_rssi(line):
+                ring.push(time.monotonic(), value)
+    _start(run)
+
+
+def udp_source(ring, host, port):
+    def run():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        while True:
+            data, _ = sock.recvfrom(65536)
+            now = time.monotonic()
+            for value in parse_rssi(data):
+                ring.push(now, value)
+    _start(run)
+
+
+def replay_source(ring, path, rate=50.0, loop=False):
+    # file: satu nilai per baris, atau "t,rssi" (t detik) -> jeda dari t
+    def run():
+        while True:
+            t_prev = None
+            with open(path, "rb") as f:
+                for line in f:
+                    nums = [float(x) for x in NUMBER_RE.findall(line)]
+                    if not nums:
+                        continue
+                    if len(nums) >= 2:
+                        t_rec, value = nums[0], nums[1]
+                        if t_prev is not None and t_rec > t_prev:
+                            time.sleep(t_rec - t_prev)
+                        t_prev = t_rec
+                    else:
+                        value = nums[0]
+                        time.sleep(1.0 / rate)
+                    ring.push(time.monotonic(), value)
+            if not loop:
+                return
+    _start(run)
+
+
+# --- Step-track ---
+class StepTracker:
+    def __init__(self, ring, send, gear_ratio, steps_per_rev=3200, step_deg=2.0, min_step_deg=0.5,
+                 max_step_deg=4.0, samples=20, settle=0.15, sigma=2.0, hold=2.0, reply_timeout=10.0):
+        self.ring = ring
+        self.send = send
+        self.gear_ratio = gear_ratio
+        self.steps_per_rev = steps_per_rev
+        self.step_deg = step_deg           # langkah antena sekarang (deg)
+        # S < 1 deg motor di-SKIP firmware -> langkah antena minimal gear_ratio deg
+        self.min_step_deg = max(min_step_deg, gear_ratio * 1.01)
+        self.max_step_deg = max_step_deg
+        self.samples = samples             # sampel per pengukuran
+        self.settle = settle               # buang sampel selama settle setelah gerak (s)
+        self.sigma = sigma                 # ambang signifikansi beda mean
+        self.hold = hold                   # jeda setelah puncak ditemukan (s)
+        self.reply_timeout = reply_timeout
+        self.offset = 0.0                  # posisi antena relatif start (deg)
+        self._moved = threading.Event()
+        self._moved_label = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.direction = 1
+
+        # statistik
+        self.moves = 0
+        self.timeouts = 0
+        self.cycles = 0
+        self.last_peak = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._moved.set()
+        self.ring.wake()
+
+    def on_records(self, records):
+        for rec in records:
+            if rec.label in ("S", "S-SKIP"):
+                self._moved_label = rec.label
+                self._moved.set()
+
+    def _steps(self, antenna_deg):
+        return int(round(antenna_deg / self.gear_ratio * self.steps_per_rev / 360.0))
+
+    def _move(self, antenna_deg):
+        steps = self._steps(antenna_deg)
+        if steps == 0:
+            return True
+        self._moved.clear()
+        self._moved_label = None
+        if not self.send(f"S{steps}"):
+            return False
+        # [S] dikirim firmware saat motor berhenti: tunggu lalu settle
+        if not self._moved.wait(self.reply_timeout) or self._stop.is_set():
+            if not self._stop.is_set():
+                # posisi tidak diketahui: offset tidak diubah, ukur ulang dari sini
+                self.timeouts += 1
+                print(f"[RSSI] no [S] reply for S{steps} within {self.reply_timeout:.1f}s, offset not updated")
+            return False
+        if self._moved_label == "S":
+            # S-SKIP: firmware tidak bergerak
+            self.offset += steps * 360.0 / self.steps_per_rev * self.gear_ratio
+            self.moves += 1
+        self._stop.wait(self.settle)
+        return not self._stop.is_set()
+
+    def _measure(self):
+        # sampel baru setelah sekarang; tunggu tanpa polling
+        start = self.ring.seq
+        if not self.ring.wait_for(start + self.samples, timeout=max(5.0, self.samples)):
+            return None
+        return self.ring.stats(start, start + self.samples)
+
+    def _better(self, a, b):
+        # True kalau b signifikan lebih kuat dari a
+        n_a, mean_a, var_a = a
+        n_b, mean_b, var_b = b
+        se = (var_a / n_a + var_b / n_b) ** 0.5
+        return mean_b - mean_a > self.sigma * max(se, 1e-6)
+
+    def _run(self):
+        while not self._stop.is_set():
+            center = self._measure()
+            if center is None:
+                continue
+            self.cycles += 1
+            step = self.step_deg * self.direction
+            if not self._move(step):
+                continue
+            first = self._measure()
+            if first is not None and self._better(center, first):
+                # lebih kuat -> tetap di sini, langkah berikutnya sedikit lebih besar
+                self.step_deg = min(self.max_step_deg, self.step_deg * 1.3)
+                continue
+            if not self._move(-2.0 * step):
+                continue
+            second = self._measure()
+            if second is not None and self._better(center, second):
+                self.direction = -self.direction
+                self.step_deg = min(self.max_step_deg, self.step_deg * 1.3)
+                continue
+            # dua sisi tidak lebih baik -> puncak di tengah
+            self._move(step)
+            self.last_peak = (self.offset, center[1])
+            self.step_deg = max(self.min_step_deg, self.step_deg * 0.5)
+            self._stop.wait(self.hold)
+
+    def status(self):
+        n, mean, var = self.ring.stats(self.ring.seq - self.samples)
+        return {
+            "offset_deg": self.offset,
+            "step_deg": self.step_deg,
+            "rssi": mean,
+            "rssi_std": var ** 0.5 if var is not None else None,
+            "moves": self.moves,
+            "timeouts": self.timeouts,
+            "cycles": self.cycles,
+            "peak": self.last_peak,
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="RSSI step-track auto-tracking")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--rssi-serial", help="serial port printing one RSSI value per line")
+    src.add_argument("--rssi-udp", help="HOST:PORT to receive RSSI datagrams on")
+    src.add_argument("--rssi-replay", help="file with RSSI values (or t,rssi) to replay")
+    ap.add_argument("--replay-rate", type=float, default=50.0, help="samples/s for single-column replay")
+    ap.add_argument("--hub", default="127.0.0.1:5000", help="ControlTMC2209 hub HOST:PORT")
+    ap.add_argument("--port", help="talk to the Arduino directly instead of the hub")
+    ap.add_argument("--reset-wait", type=float, default=2.0, help="Arduino reset wait after opening --port (s)")
+    ap.add_argument("--gear", default="76/228", help="motor/antenna teeth")
+    ap.add_argument("--step", type=float, default=2.0, help="initial step (antenna deg)")
+    ap.add_argument("--samples", type=int, default=20, help="samples per measurement")
+    ap.add_argument("--settle", type=float, default=0.15, help="seconds to ignore after a move")
+    ap.add_argument("--sigma", type=float, default=2.0, help="significance threshold for a better reading")
+    ap.add_argument("--status", type=float, default=2.0, help="status print interval (s)")
+    args = ap.parse_args()
+
+    motor_teeth, antenna_teeth = (float(x) for x in args.gear.split("/"))
+    ring = RssiRing()
+    if args.rssi_serial:
+        serial_source(ring, args.rssi_serial)
+    elif args.rssi_udp:
+        host, _, port = args.rssi_udp.rpartition(":")
+        udp_source(ring, host or "0.0.0.0", int(port))
+    else:
+        replay_source(ring, args.rssi_replay, args.replay_rate, loop=True)
+
+    tracker = None
+    fusion = BearingFusion(motor_teeth / antenna_teeth)
+
+    def on_records(records):
+        fusion.on_records(records)
+        if tracker is not None:
+            tracker.on_records(records)
+
+    send = fused_send(fusion, open_output(args, on_records, args.reset_wait))
+    tracker = StepTracker(ring, send, motor_teeth / antenna_teeth, step_deg=args.step,
+                          samples=args.samples, settle=args.settle, sigma=args.sigma).start()
+    try:
+        while True:
+            time.sleep(args.status)
+            st = tracker.status()
+            if st["rssi"] is not None:
+                bearing, _, sigma = fusion.antenna()
+                print(f"[RSSI] {st['rssi']:7.2f} ±{st['rssi_std']:.2f} | offset {st['offset_deg']:+7.2f}° "
+                      f"step {st['step_deg']:.2f}° | antenna {bearing:6.2f}° ±{sigma:.2f} | "
+                      f"moves {st['moves']}", flush=True)
+    except KeyboardInterrupt:
+        print("\n[RSSI] stopped")
+        tracker.stop()
+
+
+if __name__ == "__main__":
+    main()
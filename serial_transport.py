@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+
+# --- Transport serial: satu-satunya penulis ke port Arduino ---
+# Semua thread (UI, knob, socket) cukup memanggil send(); penulisan ke port
+# dilakukan oleh satu writer thread, jadi byte tidak pernah bercampur dan
+# pemanggil tidak pernah ikut terblokir oleh write() yang lambat.
+
+
+def coalesce_commands(items):
+    # items: (cmd, t_enqueue). Gabungkan K<n> yang berurutan menjadi satu
+    # frame (K3, K-1, K2 -> K4) dengan timestamp yang paling awal.
+    out = []
+    pending_k = None
+    pending_t = None
+    for cmd, t in items:
+        if cmd[:1] == "K":
+            try:
+                delta = int(cmd[1:])
+            except ValueError:
+                delta = None
+            if delta is not None:
+                if pending_k is None:
+                    pending_k, pending_t = delta, t
+                else:
+                    pending_k += delta
+                continue
+        if pending_k:
+            out.append((f"K{pending_k}", pending_t))
+        pending_k = None
+        out.append((cmd, t))
+    if pending_k:
+        out.append((f"K{pending_k}", pending_t))
+    return out
+
+
+class SerialTransport:
+    def __init__(self, port, maxsize=256, max_batch=64, on_write=None):
+        self.port = port
+        # on_write(frames, t_write): frames = [(cmd, t_enqueue)] yang akan ditulis;
+        # dipanggil sebelum write() supaya feedback cepat tidak mendahului tracing
+        self.on_write = on_write
+        # loop_stat (profiling.Stat): durasi per batch, dari antrian sampai write selesai
+        self.loop_stat = None
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._stats_lock = threading.Lock()
+
+        # statistik
+        self.frames_queued = 0
+        self.frames_written = 0
+        self.frames_merged = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.write_calls = 0
+        self.write_errors = 0
+        self.last_write_latency = 0.0
+        self.max_write_latency = 0.0
+        self.total_write_latency = 0.0
+        self.last_queue_latency = 0.0
+        self.max_queue_latency = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def send(self, cmd, block=False, timeout=None):
+        cmd = cmd.strip()
+        if not cmd:
+            return False
+        try:
+            self._queue.put((cmd, time.perf_counter()), block, timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self.frames_dropped += 1
+            return False
+        with self._stats_lock:
+            self.frames_queued += 1
+        return True
+
+    def close(self, timeout=1.0):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            avg = self.total_write_latency / self.write_calls if self.write_calls else 0.0
+            return {
+                "queue_depth": self._queue.qsize(),
+                "frames_queued": self.frames_queued,
+                "frames_written": self.frames_written,
+                "frames_merged": self.frames_merged,
+                "frames_dropped": self.frames_dropped,
+                "bytes_written": self.bytes_written,
+                "write_calls": self.write_calls,
+                "write_errors": self.write_errors,
+                "write_latency_last_ms": self.last_write_latency * 1000.0,
+                "write_latency_avg_ms": avg * 1000.0,
+                "write_latency_max_ms": self.max_write_latency * 1000.0,
+                "queue_latency_last_ms": self.last_queue_latency * 1000.0,
+                "queue_latency_max_ms": self.max_queue_latency * 1000.0,
+            }
+
+    # --- Writer thread ---
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            # ambil semua yang sudah antri -> satu write()
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            t_batch = time.perf_counter()
+            frames = coalesce_commands(batch)
+            if frames:
+                data = "".join([cmd + "\n" for cmd, _ in frames]).encode()
+                if self.on_write is not None:
+                    self.on_write(frames, time.perf_counter())
+                t0 = time.perf_counter()
+                try:
+                    self.port.write(data)
+                    ok = True
+                except Exception as e:
+                    ok = False
+                    print(f"[SERIAL-ERROR] write: {e}")
+                t1 = time.perf_counter()
+
+                with self._stats_lock:
+                    self.write_calls += 1
+                    latency = t1 - t0
+                    self.last_write_latency = latency
+                    self.total_write_latency += latency
+                    if latency > self.max_write_latency:
+                        self.max_write_latency = latency
+                    queued = t1 - batch[0][1]
+                    self.last_queue_latency = queued
+                    if queued > self.max_queue_latency:
+                        self.max_queue_latency = queued
+                    self.frames_merged += len(batch) - len(frames)
+                    if ok:
+                        self.frames_written += len(frames)
+                        self.bytes_written += len(data)
+                    else:
+                        self.write_errors += 1
+            if self.loop_stat is not None:
+                self.loop_stat.add(time.perf_counter() - t_batch)
+
+            if stop:
+                return
@@ -0,0 +1,395 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from serial_transport import SerialTransport
+from feedback_parser import FeedbackParser
+from telemetry_hub import TelemetryHub
+from command_trace import CommandTracer
+from knob_input import KnobEngine
+from multi_rig import RigArray
+from bearing_fusion import BearingFusion
+from drift_monitor import DriftMonitor
+from command_scheduler import CommandScheduler
+from position_stream import PositionStream
+from cable_wrap import CableWrap, parse_limits
+from profiling import Profiler
+
+# --- Inti StepTrack tanpa UI: serial, feedback, fusi, scheduler, hub, knob ---
+# Import modul ini tidak membuka port, tidak tidur, tidak bind socket:
+# semuanya di start(), dan stop() menutup lagi. ControlTMC2209.py (Tk) dan
+# service headless (python steptrack_core.py) memakai inti yang sama.
+#   - port serial: STEPTRACK_PORT, atau dicari otomatis dari VID/PID USB
+#   - reset Arduino saat port dibuka ditunggu di thread connect (sampai
+#     "[ARDUINO] READY !" atau reset_wait), sementara hub, scheduler, knob
+#     sudah jalan; command yang masuk selama itu antri di SerialTransport
+#   - dependency opsional (pyserial, pywinusb, recorder) di-import saat dipakai
+
+SERIAL_PORT = os.environ.get('STEPTRACK_PORT')          # None = cari otomatis
+LOG_DIR = os.environ.get('STEPTRACK_LOG', 'logs')       # kosong = tidak merekam
+STREAM_HZ = int(os.environ.get('STEPTRACK_STREAM_HZ', '50'))
+WRAP_LIMITS = os.environ.get('STEPTRACK_WRAP', '-270,270')
+WRAP_STATE = os.environ.get('STEPTRACK_WRAP_STATE', 'wrap_state.json')
+# [STATS] ke hub tiap N detik (0 = hanya "?STATS"), dan file dump opsional
+STATS_INTERVAL = float(os.environ.get('STEPTRACK_STATS', '5'))
+STATS_FILE = os.environ.get('STEPTRACK_STATS_FILE') or None
+
+MOTOR_TEETH = 76
+ANTENNA_TEETH = 228
+STEPS_PER_REV = 3200
+RESET_WAIT = 2.0           # bootloader Arduino setelah DTR reset (s)
+
+# (VID, PID) board Arduino / chip USB-serial, urut prioritas; PID None = semua
+ARDUINO_USB_IDS = [
+    (0x2341, None),        # Arduino
+    (0x2A03, None),        # Arduino (arduino.org)
+    (0x1A86, 0x7523),      # CH340 (clone)
+    (0x0403, 0x6001),      # FTDI FT232
+    (0x10C4, 0xEA60),      # CP210x
+]
+POWERMATE_VID = 0x077D
+
+
+def find_port(usb_ids=ARDUINO_USB_IDS):
+    # port serial pertama yang VID/PID-nya cocok, None kalau tidak ada
+    from serial.tools import list_ports
+    ports = [p for p in list_ports.comports() if p.vid is not None]
+    for vid, pid in usb_ids:
+        for p in ports:
+            if p.vid == vid and (pid is None or p.pid == pid):
+                return p.device
+    return None
+
+
+def knob_handler(on_rotate, on_press):
+    # report PowerMate format pywinusb (data[1] = tombol, data[2] = putaran);
+    # backend Linux (powermate_linux.py) memanggil handler yang sama
+    def handler(data):
+        rotation = data[2]
+        press = data[1]
+        if rotation > 127: rotation -= 256
+        if rotation != 0: on_rotate(rotation)
+        if press != 0: on_press()
+    return handler
+
+
+def open_knob(handler):
+    # -> device dengan close(), None kalau PowerMate tidak ada / backend tidak tersedia
+    if sys.platform.startswith("linux"):
+        from powermate_linux import open_powermate
+        return open_powermate(handler)
+    try:
+        import pywinusb.hid as hid
+    except ImportError:
+        return None
+    devices = hid.HidDeviceFilter(vendor_id=POWERMATE_VID).get_devices()
+    if not devices:
+        return None
+    device = devices[0]
+    device.open()
+    device.set_raw_data_handler(handler)
+    return device
+
+
+class StepTrackCore:
+    def __init__(self, port=SERIAL_PORT, baud=115200, host="127.0.0.1", hub_port=5000,
+                 log_dir=LOG_DIR, binary=True, stream_hz=STREAM_HZ, wrap_limits=WRAP_LIMITS,
+                 wrap_state=WRAP_STATE, motor_teeth=MOTOR_TEETH, antenna_teeth=ANTENNA_TEETH,
+                 steps_per_rev=STEPS_PER_REV, reset_wait=RESET_WAIT, open_port=None,
+                 on_records=None, on_log=None, stats_interval=STATS_INTERVAL, stats_file=STATS_FILE):
+        self.port_name = port
+        self.baud = baud
+        self.host = host
+        self.hub_port = hub_port       # None = tanpa hub
+        self.log_dir = log_dir
+        # feedback biner (B1) untuk rate encoder lebih tinggi; hanya frame
+        # biner yang membawa step count, jadi DriftMonitor butuh B1
+        self.binary = binary
+        self.reset_wait = reset_wait
+        # open_port(nama) -> objek mirip serial.Serial (mis. EmulatedSerial)
+        self.open_port = open_port
+        self.on_records = on_records   # on_records(records): setelah state diperbarui
+        self.on_log = on_log or (lambda line: print(line, flush=True))
+
+        self.gear_ratio = motor_teeth / antenna_teeth   # motor:antenna = 3:1
+        self.steps_per_rev = steps_per_rev
+
+        # State needle red/blue: satu baris RigArray (lihat multi_rig.py)
+        self.rig = RigArray(1, self.gear_ratio, steps_per_rev)
+        self.bearing_lock = self.rig.lock
+        # estimasi posisi (encoder + profil command), dan [P] selama gerak
+        self.fusion = BearingFusion(self.gear_ratio, steps_per_rev)
+        self.stream = PositionStream(stream_hz, steps_per_rev)
+        limits = parse_limits(wrap_limits) if isinstance(wrap_limits, str) else wrap_limits
+        self.wrap = CableWrap(self.gear_ratio, steps_per_rev, limits,
+                              position=lambda: (self.fusion.estimate()[0], self.fusion.expected()),
+                              state_path=wrap_state or None) if limits else None
+        self.tracer = CommandTracer(preempt=True)
+
+        # port diisi saat connect; command sebelum itu antri dan baru ditulis
+        # setelah Arduino selesai reset
+        self.serial = None
+        self.transport = SerialTransport(None, on_write=self._on_write)
+        self.parser = FeedbackParser()
+        # D/S/C/X: target terbaru menang (firmware non-blocking -> preempt)
+        # batas lilitan dicek lagi saat batch dikirim (S pending digabung)
+        self.scheduler = CommandScheduler(self.transport.send, preempt=True,
+                                          guard=self._guard_batch if self.wrap else None)
+        self.drift = DriftMonitor(send=self.transport.send, steps_per_rev=steps_per_rev,
+                                  on_alert=self._on_drift_alert)
+        # detent -> K<deg motor>, gain mengikuti kecepatan putar
+        self.knob = KnobEngine(self._send_knob)
+        self.hub = None
+        self.recorder = None
+        self.device = None             # PowerMate
+
+        # --- Profiling: lag, durasi loop worker, tunggu/pegang lock, byte serial ---
+        # bearing_lock dan lock fusi dipakai bersama thread pembaca dan UI
+        self.profiler = Profiler(stats_interval, stats_file)
+        self.rig.lock = self.bearing_lock = self.profiler.lock(self.rig.lock, "bearing")
+        self.fusion.lock = self.profiler.lock(self.fusion.lock, "fusion")
+        self.read_stat = self.profiler.loop("read")
+        self.transport.loop_stat = self.profiler.loop("write")
+        self.scheduler.loop_stat = self.profiler.loop("scheduler")
+        self.knob.loop_stat = self.profiler.loop("knob")
+        self.profiler.counter("serial_in_bps", lambda: self.parser.bytes_in)
+        self.profiler.counter("serial_out_bps", lambda: self.transport.bytes_written)
+        self.ready = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self.t_start = None
+        self.t_ready = None
+
+    # --- Start / stop ---
+    def start(self, knob=True):
+        if self.t_start is not None:
+            return self
+        self.t_start = time.perf_counter()
+        self._stopped.clear()
+        if self.log_dir:
+            # semua command dan feedback direkam biner (baca dengan telemetry_log.py)
+            from telemetry_log import TelemetryRecorder
+            self.recorder = TelemetryRecorder(self.log_dir).start()
+        # command awal paling depan di antrian, terkirim begitu Arduino siap
+        if self.binary:
+            self.transport.send("B1")
+        if self.stream.rate_hz:
+            self.transport.send(self.stream.command())
+        # Q pertama = sampel baseline DriftMonitor sebelum gerak apa pun
+        self.transport.send("Q")
+        self.scheduler.start()
+        if self.hub_port:
+            self.hub = TelemetryHub(self.host, self.hub_port, on_command=self._hub_command).start()
+            self._add_queries()
+        if knob:
+            self.device = open_knob(knob_handler(self.knob.on_detent, lambda: self.scheduler.submit("C")))
+            if self.device is not None:
+                self.knob.start()
+            else:
+                self.on_log("[PYTHON] PowerMate device tidak ditemukan.")
+        self._spawn(self._connect)
+        self.profiler.start(self._publish_stats)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.profiler.stop()
+        self.knob.stop()
+        self.scheduler.stop()
+        if self.device is not None:
+            self.device.close()
+            self.device = None
+        self.transport.close()
+        if self.hub is not None:
+            self.hub.stop()
+            self.hub = None
+        for t in self._threads:
+            t.join(1.0)
+        self._threads = []
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.wrap is not None:
+            self.wrap.save()
+        self.t_start = None
+
+    def _spawn(self, target):
+        t = threading.Thread(target=target, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _connect(self):
+        name = self.port_name
+        try:
+            if self.open_port is not None:
+                port = self.open_port(name)
+            else:
+                import serial
+                name = name or find_port()
+                if name is None:
+                    self.on_log("[PYTHON-ERROR] Arduino tidak ditemukan (set STEPTRACK_PORT)")
+                    return
+                # timeout supaya thread pembaca bisa berhenti saat stop()
+                port = serial.Serial(name, self.baud, timeout=0.2)
+        except Exception as e:
+            self.on_log(f"[PYTHON-ERROR] {name}: {e}")
+            return
+        self.serial = port
+        self.transport.port = port
+        self._spawn(self._read_loop)
+        # reset Arduino berjalan di sini, bukan sleep di thread utama
+        self.ready.wait(self.reset_wait)
+        if self._stopped.is_set():
+            return
+        self.transport.start()
+        self.t_ready = time.perf_counter()
+        self.on_log(f"[PYTHON] {name or 'port'} siap ({self.t_ready - self.t_start:.2f} s)")
+
+    def _read_loop(self):
+        while not self._stopped.is_set():
+            try:
+                records = self.parser.read_from(self.serial)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    self.on_log(f"[PYTHON-ERROR] serial read: {e}")
+                return
+            if records:
+                t0 = time.perf_counter()
+                self._on_records(records)
+                self.read_stat.add(time.perf_counter() - t0)
+
+    # --- Command ---
+    def guard(self, cmd):
+        # D/S/K yang melewati batas lilitan kabel dialihkan / dipotong
+        if self.wrap is None:
+            return cmd
+        safe = self.wrap.guard(cmd)
+        if safe != cmd:
+            self.on_log(f"[WRAP] {cmd} -> {safe or 'dropped'}")
+        return safe
+
+    def _guard_batch(self, batch):
+        safe = self.wrap.guard_many(batch)
+        if safe != batch:
+            self.on_log(f"[WRAP] {' '.join(batch)} -> {' '.join(safe) or 'dropped'}")
+        return safe
+
+    def command(self, cmd, show=False):
+        # D/S/C/X dari UI / hub -> scheduler. show=True: blue needle ikut
+        # command (entry UI), command yang tidak mengubah needle tidak dikirim
+        # -> command yang dikirim, None kalau tidak ada
+        sent = self.guard(cmd.strip().upper())
+        if not sent:
+            return None
+        if show:
+            with self.bearing_lock:
+                if not self.rig.apply_command(0, sent):
+                    return None
+        self.scheduler.submit(sent)
+        return sent
+
+    def _hub_command(self, cmd):
+        self.command(cmd)
+        self.on_log(f"[UI] {cmd}")
+
+    def _send_knob(self, deg, stamps):
+        # di batas lilitan knob diam saja (tanpa log, bisa 100 frame/s)
+        cmd = f"K{deg}" if self.wrap is None else self.wrap.guard(f"K{deg}")
+        if cmd:
+            self.transport.send(cmd)
+
+    # --- Feedback ---
+    def _on_write(self, frames, t_write):
+        # setiap command dicatat tracer dan masuk ke filter sebagai input kontrol
+        self.tracer.on_write(frames, t_write)
+        self.fusion.on_write(frames, t_write)
+        self.drift.on_write(frames)
+        if self.recorder is not None:
+            self.recorder.on_write(frames, t_write)
+
+    def _on_records(self, records):
+        if not self.ready.is_set() and any(r.text and "READY" in r.text for r in records):
+            self.ready.set()
+        self.tracer.on_records(records)
+        self.scheduler.on_records(records)
+        if self.recorder is not None:
+            self.recorder.on_records(records)
+        if self.hub is not None:
+            self.hub.publish_records(records)
+        # satu kali lock per batch
+        with self.bearing_lock:
+            self.rig.apply_records(0, records)
+        self.fusion.on_records(records)
+        self.stream.on_records(records)
+        if self.wrap is not None:
+            self.wrap.on_records(records)
+        self.drift.on_records(records)
+        if self.on_records is not None:
+            self.on_records(records)
+
+    # --- Missed step / drift encoder: step count vs AS5600, koreksi S otomatis ---
+    def _on_drift_alert(self, kind, info):
+        line = f"[DRIFT] {kind} " + json.dumps(info)
+        self.on_log(line)
+        if self.hub is not None:
+            self.hub.publish((line + "\n").encode())
+
+    def _publish_stats(self, line):
+        if self.hub is not None:
+            self.hub.publish((line + "\n").encode())
+
+    def _add_queries(self):
+        hub = self.hub
+        # "?TRACE": histogram latensi per command
+        hub.add_query("TRACE", lambda: "[TRACE] " + json.dumps(self.tracer.snapshot()))
+        # "?FUSION": estimasi posisi motor/antena, rate dan sigma
+        hub.add_query("FUSION", lambda: "[FUSION] " + json.dumps(self.fusion.snapshot()))
+        # "?SCHED": command digabung / dibatalkan oleh scheduler
+        hub.add_query("SCHED", lambda: "[SCHED] " + json.dumps(self.scheduler.stats()))
+        # "?STREAM": rate [P] yang diminta vs terukur, jeda
+        hub.add_query("STREAM", lambda: "[STREAM] " + json.dumps(self.stream.stats()))
+        hub.add_query("DRIFT", lambda: "[DRIFT] " + json.dumps(self.drift.stats()))
+        # "?STATS": profiling jendela berjalan (lag, loop, lock, byte/s) tanpa reset
+        hub.add_query("STATS", lambda: "[STATS] " + json.dumps(self.profiler.snapshot()))
+        # "?WRAP": posisi antena dari netral, sisa lilitan, command dialihkan/dipotong
+        if self.wrap is not None:
+            hub.add_query("WRAP", lambda: "[WRAP] " + json.dumps(self.wrap.stats()))
+
+
+# --- Service headless: hub + serial + knob, tanpa Tk ---
+def main():
+    ap = argparse.ArgumentParser(description="Headless StepTrack service (serial, hub, knob)")
+    ap.add_argument("--port", default=SERIAL_PORT, help="serial port (default: STEPTRACK_PORT or USB VID/PID scan)")
+    ap.add_argument("--hub", default="127.0.0.1:5000", help="hub HOST:PORT, 'off' = no hub")
+    ap.add_argument("--no-knob", action="store_true", help="do not look for a PowerMate")
+    ap.add_argument("--emulate", action="store_true", help="run against the in-process firmware emulator")
+    args = ap.parse_args()
+
+    open_port = None
+    if args.emulate:
+        from anttrack_emulator import EmulatedSerial
+        open_port = lambda name: EmulatedSerial(timeout=0.2)
+    host, hub_port = "127.0.0.1", None
+    if args.hub != "off":
+        host, _, port = args.hub.rpartition(":")
+        host, hub_port = host or "127.0.0.1", int(port)
+    core = StepTrackCore(args.port, host=host, hub_port=hub_port, open_port=open_port)
+    core.start(knob=not args.no_knob)
+    print(f"[PYTHON] StepTrack service up in {time.perf_counter() - core.t_start:.2f} s", flush=True)
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("\n[INFO] Program dihentikan.")
+    finally:
+        core.stop()
+
+
+if __name__ == "__main__":
+    main()
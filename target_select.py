@@ -0,0 +1,243 @@
+import time
+
+import numpy as np
+
+# --- Seleksi target: index per batch feed + policy + hysteresis ---
+# TargetIndex dibangun satu kali per batch feed (AircraftTable.compute), bukan
+# tiap select(), dan berisi:
+#   - AzimuthIndex: pesawat per bin azimuth (CSR: urutan baris tersortir per
+#     bin + offset awal tiap bin); argsort dilewati kalau tidak ada pesawat
+#     yang pindah bin
+#   - urutan baris per range (naik) dan per signal (turun)
+# select() hanya query: sektor dan "terdekat ke bearing antena" melihat bin
+# yang relevan, nearest / strongest berjalan di urutan tersortir per blok
+# sampai ketemu baris yang lolos filter. Baris pertama yang lolos = terbaik.
+#
+# Policy (skor lebih kecil = lebih baik):
+#   nearest          slant range (km)
+#   strongest        -signal (VRS "Sig"); tanpa signal -> jatuh ke range
+#   closest_bearing  selisih azimuth ke bearing antena sekarang (deg)
+# Hysteresis: target sekarang dipertahankan selama masih valid, kecuali
+# penantang lebih baik minimal `margin` secara terus-menerus selama `hold` s.
+
+POLICIES = ("nearest", "strongest", "closest_bearing")
+DEFAULT_MARGIN = {"nearest": 2.0, "strongest": 3.0, "closest_bearing": 5.0}
+CHUNK = 64                 # baris per blok saat berjalan di urutan tersortir
+
+
+def angle_diff(a, b):
+    # a: array bearing 0..360 (snapshot), b: skalar; tanpa % per elemen
+    d = np.abs(a - b % 360.0)
+    return np.minimum(d, 360.0 - d)
+
+
+class AzimuthIndex:
+    def __init__(self, bin_deg=2.0):
+        self.nbins = max(1, int(round(360.0 / bin_deg)))
+        self.bin_deg = 360.0 / self.nbins
+        self.order = np.empty(0, dtype=np.intp)
+        self.starts = np.zeros(self.nbins + 1, dtype=np.intp)
+        self._rows = self._bins = None
+        self.rebuilds = 0
+
+    def build(self, bearing):
+        # bearing: array per baris snapshot; NaN tidak diindex
+        rows = np.flatnonzero(~np.isnan(bearing))
+        # int16: argsort stable memakai radix sort (nbins <= 360)
+        bins = ((bearing[rows] // self.bin_deg) % self.nbins).astype(np.int16)
+        if self._bins is not None and np.array_equal(rows, self._rows) and np.array_equal(bins, self._bins):
+            return self              # tidak ada yang pindah bin
+        self._rows, self._bins = rows, bins
+        idx = np.argsort(bins, kind="stable")
+        self.order = rows[idx]
+        self.starts = np.searchsorted(bins[idx], np.arange(self.nbins + 1))
+        self.rebuilds += 1
+        return self
+
+    def __len__(self):
+        return len(self.order)
+
+    def bin_of(self, bearing):
+        return int(bearing % 360.0 // self.bin_deg) % self.nbins
+
+    def rows_in_bins(self, first, count):
+        # count bin berurutan mulai dari first (boleh melewati 0/360)
+        count = min(count, self.nbins)
+        last = first + count
+        if last <= self.nbins:
+            return self.order[self.starts[first]:self.starts[last]]
+        return np.concatenate((self.order[self.starts[first]:],
+                               self.order[:self.starts[last - self.nbins]]))
+
+    def sector(self, start, end):
+        # kandidat kasar untuk sektor start..end (searah jarum jam, boleh lewat 0)
+        width = (end - start) % 360.0 or 360.0
+        first = self.bin_of(start)
+        count = int((start % self.bin_deg + width) // self.bin_deg) + 1
+        return self.rows_in_bins(first, count)
+
+
+class TargetIndex:
+    def __init__(self, bin_deg=2.0):
+        self.azimuth = AzimuthIndex(bin_deg)
+        self.by_range = np.empty(0, dtype=np.intp)
+        self.ranges = np.empty(0)      # range per baris by_range (untuk max_range)
+        self.by_signal = np.empty(0, dtype=np.intp)
+        self.signal = np.empty(0)      # signal saat build, skor policy strongest
+
+    def build(self, bearing, rng, signal):
+        # array per baris snapshot; baris tanpa bearing tidak diindex
+        self.azimuth.build(bearing)
+        rows = np.flatnonzero(~np.isnan(bearing))
+        # range kontinu (tie praktis tidak ada) -> argsort biasa, lebih cepat
+        self.by_range = rows[np.argsort(rng[rows])]
+        self.ranges = rng[self.by_range]
+        # signal VRS bulat (banyak tie): stable, baris terkecil menang seperti argmin
+        has = rows[~np.isnan(signal[rows])]
+        self.by_signal = has[np.argsort(-signal[has], kind="stable")]
+        self.signal = signal.copy()
+        return self
+
+
+class TargetSelector:
+    def __init__(self, policy="nearest", sector=None, max_range_km=None, min_elevation=0.0,
+                 margin=None, hold=2.0, icao=None, clock=time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r} (choose from {', '.join(POLICIES)})")
+        self.policy = policy
+        self.sector = sector            # (start, end) deg atau None
+        self.max_range_km = max_range_km
+        self.min_elevation = min_elevation
+        self.margin = DEFAULT_MARGIN[policy] if margin is None else margin
+        self.hold = hold
+        self.icao = icao                # pin ke satu pesawat
+        self.clock = clock
+        self.current = None             # icao target sekarang
+        self.challenger = None          # (icao, sejak)
+        self.switches = 0
+
+    def _valid(self, snap, rows):
+        # filter untuk sebagian baris saja (kandidat dari index)
+        bearing = snap["bearing"][rows]
+        ok = ~np.isnan(bearing) & (snap["elevation"][rows] >= self.min_elevation)
+        if self.max_range_km is not None:
+            ok &= snap["range"][rows] <= self.max_range_km * 1000.0
+        if self.sector is not None:
+            start, end = self.sector
+            width = (end - start) % 360.0 or 360.0
+            d = bearing - start          # bearing snapshot 0..360, start 0..360
+            ok &= np.where(d < 0.0, d + 360.0, d) <= width
+        if self.icao is not None:
+            ok &= snap["icao"][rows] == self.icao
+        return ok
+
+    def _first_valid(self, snap, order):
+        # order tersortir per skor -> baris pertama yang lolos filter
+        for i in range(0, len(order), CHUNK):
+            rows = order[i:i + CHUNK]
+            ok = self._valid(snap, rows)
+            if ok.any():
+                return int(rows[np.argmax(ok)])
+        return None
+
+    def _around(self, snap, index, bearing):
+        # cincin bin melebar sampai ada baris yang lolos, plus satu cincin lagi
+        # (isi cincin k+2 pasti lebih jauh dari yang ditemukan di cincin k)
+        az = index.azimuth
+        center = az.bin_of(bearing)
+        for k in range(az.nbins // 2 + 1):
+            if k == 0:
+                rows = az.rows_in_bins(center, 1)
+            else:
+                rows = np.concatenate((az.rows_in_bins((center - k) % az.nbins, 1),
+                                       az.rows_in_bins((center + k) % az.nbins, 1)))
+            if len(rows) and self._valid(snap, rows).any():
+                ring = az.rows_in_bins((center - k - 1) % az.nbins, 2 * k + 3)
+                return ring[self._valid(snap, ring)]
+        return np.empty(0, dtype=np.intp)
+
+    def _mode(self, index, rows, antenna_bearing):
+        if self.policy == "closest_bearing" and antenna_bearing is not None:
+            return "closest_bearing"
+        if self.policy == "strongest" and not np.isnan(index.signal[rows]).all():
+            return "strongest"
+        return "nearest"
+
+    def _scores(self, snap, index, rows, mode, antenna_bearing):
+        if mode == "closest_bearing":
+            return angle_diff(snap["bearing"][rows], antenna_bearing)
+        if mode == "strongest":
+            signal = index.signal[rows]
+            return np.where(np.isnan(signal), np.inf, -signal)
+        return snap["range"][rows] / 1000.0
+
+    def _best(self, snap, index, antenna_bearing):
+        # -> (baris terbaik, mode skor) atau (None, None)
+        rows = None
+        if self.icao is not None:
+            rows = np.flatnonzero(snap["icao"] == self.icao)
+        elif self.sector is not None:
+            rows = index.azimuth.sector(*self.sector)
+        elif self.policy == "closest_bearing" and antenna_bearing is not None:
+            rows = self._around(snap, index, antenna_bearing)
+        if rows is not None:
+            # kandidat sedikit dari index: skor langsung
+            rows = rows[self._valid(snap, rows)]
+            if not len(rows):
+                return None, None
+            mode = self._mode(index, rows, antenna_bearing)
+            return int(rows[np.argmin(self._scores(snap, index, rows, mode, antenna_bearing))]), mode
+        if self.policy == "strongest":
+            row = self._first_valid(snap, index.by_signal)
+            if row is not None:
+                return row, "strongest"
+        order = index.by_range
+        if self.max_range_km is not None:
+            order = order[:np.searchsorted(index.ranges, self.max_range_km * 1000.0, side="right")]
+        return self._first_valid(snap, order), "nearest"
+
+    def select(self, snap, antenna_bearing=None, now=None):
+        # -> index baris di snap, atau None. snap["index"] dari
+        # AircraftTable.snapshot(); tanpa itu index dibangun di sini
+        if now is None:
+            now = self.clock()
+        index = snap.get("index")
+        if index is None:
+            index = TargetIndex().build(snap["bearing"], snap["range"], snap["signal"])
+        with np.errstate(invalid="ignore"):
+            best_row, mode = self._best(snap, index, antenna_bearing)
+            if best_row is None:
+                self.current = None
+                self.challenger = None
+                return None
+            best_icao = int(snap["icao"][best_row])
+            cur = np.flatnonzero(snap["icao"] == self.current) if self.current is not None else ()
+            if len(cur) and not self._valid(snap, cur[:1])[0]:
+                cur = ()
+            if not len(cur):
+                # target lama hilang / keluar filter -> langsung pindah
+                self._switch(best_icao)
+                return best_row
+            cur = int(cur[0])
+            scores = self._scores(snap, index, np.array([best_row, cur]), mode, antenna_bearing)
+        if best_icao == self.current or scores[0] > scores[1] - self.margin:
+            self.challenger = None
+            return cur
+        if self.challenger is None or self.challenger[0] != best_icao:
+            self.challenger = (best_icao, now)
+        if now - self.challenger[1] >= self.hold:
+            self._switch(best_icao)
+            return best_row
+        return cur
+
+    def _switch(self, icao):
+        if icao != self.current:
+            self.switches += 1
+        self.current = icao
+        self.challenger = None
+
+
+def parse_sector(text):
+    # "300-60" -> (300.0, 60.0)
+    start, _, end = text.partition("-")
+    return float(start) % 360.0, float(end) % 360.0
@@ -0,0 +1,138 @@
+import asyncio
+import random
+import threading
+
+from feedback_parser import FeedbackParser
+
+# --- Client telemetri untuk hub ControlTMC2209 ---
+# Stream byte dari socket dipotong jadi baris utuh oleh FeedbackParser,
+# record terakhir disimpan di slot "latest value" yang dibaca UI tanpa lock,
+# dan koneksi otomatis diulang dengan backoff saat hub mati/restart.
+
+
+class LatestValue:
+    # hanya satu penulis (thread client); assign tuple atomic di CPython
+    def __init__(self):
+        self._slot = (0, None)
+
+    def set(self, value):
+        self._slot = (self._slot[0] + 1, value)
+
+    def get(self):
+        return self._slot
+
+
+class TelemetryClient:
+    def __init__(self, host, port, on_records=None, on_status=None,
+                 min_backoff=0.5, max_backoff=10.0):
+        self.host = host
+        self.port = port
+        self.on_records = on_records
+        self.on_status = on_status
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.latest = LatestValue()
+        self.connected = False
+        self.loop = None
+        self._writer = None
+        self._stop = None
+        self._thread = None
+
+        # statistik
+        self.records = 0
+        self.reconnects = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self.loop is not None and self._stop is not None:
+            self.loop.call_soon_threadsafe(self._shutdown)
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    # thread-safe; False kalau belum terhubung
+    def send(self, cmd):
+        if not self.connected or self.loop is None:
+            return False
+        self.loop.call_soon_threadsafe(self._write, (cmd.strip() + "\n").encode())
+        return True
+
+    def _shutdown(self):
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.transport.abort()
+
+    def _write(self, data):
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(data)
+
+    def _status(self, msg):
+        if self.on_status is not None:
+            self.on_status(msg)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self.loop.close()
+
+    async def _main(self):
+        self._stop = asyncio.Event()
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                self._status(f"[UI-SOCKET-ERROR] {e}, retry in {backoff:.1f}s")
+                await self._sleep(backoff * (1.0 + 0.2 * random.random()))
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = self.min_backoff
+            self._writer = writer
+            self.connected = True
+            self._status(f"[UI] Connected to {self.host}:{self.port}")
+            try:
+                await self._read_loop(reader)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                self._status(f"[UI-SOCKET-ERROR] {e}")
+            finally:
+                self.connected = False
+                self._writer = None
+                writer.close()
+
+            if not self._stop.is_set():
+                self.reconnects += 1
+                self._status("[UI] Disconnected, reconnecting...")
+                await self._sleep(backoff)
+
+    async def _read_loop(self, reader):
+        parser = FeedbackParser()
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            records = parser.feed(data)
+            if not records:
+                continue
+            self.records += len(records)
+            # cukup record posisi terakhir di batch
+            for rec in reversed(records):
+                if rec.deg is not None:
+                    self.latest.set(rec)
+                    break
+            if self.on_records is not None:
+                self.on_records(records)
+
+    async def _sleep(self, delay):
+        try:
+            await asyncio.wait_for(self._stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
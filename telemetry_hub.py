@@ -0,0 +1,167 @@
+import asyncio
+import threading
+
+from feedback_parser import format_feedback
+
+# --- Hub telemetri & command (asyncio, banyak client) ---
+# Setiap record feedback di-encode sekali lalu dikirim ke semua subscriber.
+# Buffer kirim per client dibatasi: client lambat kehilangan data dulu,
+# lalu diputus kalau terus tertinggal, tanpa memperlambat client lain.
+# Baris yang diterima dari client (newline-framed) diteruskan ke on_command,
+# kecuali query "?NAMA" yang dijawab hub sendiri ke client itu saja.
+
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.addr = writer.get_extra_info("peername")
+        self.drops = 0
+
+
+class TelemetryHub:
+    def __init__(self, host="127.0.0.1", port=5000, on_command=None,
+                 max_buffer=64 * 1024, max_drops=100):
+        self.host = host
+        self.port = port
+        self.on_command = on_command
+        self.max_buffer = max_buffer
+        self.max_drops = max_drops
+        self.clients = set()
+        self.queries = {}
+        self._tasks = set()
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+        # statistik
+        self.chunks_published = 0
+        self.bytes_sent = 0
+        self.chunks_dropped = 0
+        self.disconnects = 0
+        self.commands = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            self._ready.wait(5.0)
+        return self
+
+    def stop(self):
+        if self.loop is not None and self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.create_task, self._shutdown())
+            self._thread.join(2.0)
+            self._thread = None
+
+    # handler() mengembalikan satu baris teks, mis. "[TRACE] {...}"
+    def add_query(self, name, handler):
+        self.queries[name.upper()] = handler
+
+    # --- API thread-safe ---
+    def publish(self, data):
+        if self.loop is not None and self.clients:
+            self.loop.call_soon_threadsafe(self._fanout, data)
+
+    def publish_records(self, records):
+        if self.clients:
+            self.publish("".join([format_feedback(rec) + "\n" for rec in records]).encode())
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "chunks_published": self.chunks_published,
+            "bytes_sent": self.bytes_sent,
+            "chunks_dropped": self.chunks_dropped,
+            "disconnects": self.disconnects,
+            "commands": self.commands,
+        }
+
+    # --- Event loop ---
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+        except OSError as e:
+            print(f"[SOCKET-ERROR] {e}")
+            self._ready.set()
+            return
+        print(f"[SOCKET] Hub listening on {self.host}:{self.port}")
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for client in list(self.clients):
+            client.writer.transport.abort()
+        # tunggu handler client selesai (EOF dari abort) sebelum loop berhenti
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=1.0)
+        await self._server.wait_closed()
+        self.loop.stop()
+
+    def _fanout(self, data):
+        self.chunks_published += 1
+        for client in list(self.clients):
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.max_buffer:
+                client.drops += 1
+                self.chunks_dropped += 1
+                if client.drops >= self.max_drops:
+                    print(f"[SOCKET] Client {client.addr} too slow, disconnecting")
+                    self.disconnects += 1
+                    transport.abort()
+                continue
+            client.drops = 0
+            transport.write(data)
+            self.bytes_sent += len(data)
+
+    def _answer_query(self, writer, name):
+        handler = self.queries.get(name)
+        if handler is None:
+            reply = f"[ERROR] unknown query ?{name} (available: {', '.join(sorted(self.queries))})"
+        else:
+            try:
+                reply = handler()
+            except Exception as e:
+                reply = f"[ERROR] ?{name}: {e}"
+        writer.write((reply + "\n").encode())
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer)
+        task = asyncio.current_task()
+        self.clients.add(client)
+        self._tasks.add(task)
+        print(f"[SOCKET] Client connected from {client.addr}")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                cmd = line.decode("utf-8", "replace").strip()
+                if cmd.startswith("?"):
+                    self._answer_query(writer, cmd[1:].strip().upper())
+                elif cmd and self.on_command is not None:
+                    self.commands += 1
+                    try:
+                        self.on_command(cmd)
+                    except Exception as e:
+                        print(f"[SOCKET-ERROR] command {cmd!r}: {e}")
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            self._tasks.discard(task)
+            writer.close()
+            print(f"[SOCKET] Client {client.addr} disconnected")
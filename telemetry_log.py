@@ -0,0 +1,495 @@
+import argparse
+import glob
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from feedback_parser import CODE_LABELS, LABEL_CODES, Feedback, FeedbackParser, encode_frame, format_feedback
+
+# --- Perekam telemetri biner (append-only) + reader mmap + replay ---
+# File segmen "<prefix>-<YYYYmmdd-HHMMSS>-<nnn>.stl":
+#   header  : magic "STLOG\x01\0\0" | waktu buka (f64, epoch)
+#   record  : t f64 (epoch) | rig u8 | code u8 | n u16 | payload n byte
+#     code 1..127  feedback berlabel (LABEL_CODES), payload raw u16
+#                  [+ steps i32 + millis u32 kalau dari frame biner]
+#     code 0       baris teks lain dari Arduino (payload utf-8)
+#     code 0x80    command yang ditulis ke Arduino (payload ascii)
+# Segmen ditutup dan yang baru dibuka setelah max_bytes. Di samping tiap
+# segmen ada "<segmen>.idx": pasangan (t f64, offset u64) setiap index_every
+# byte, jadi reader cukup searchsorted lalu scan pendek, tanpa membaca file
+# dari awal. Index yang hilang / terpotong dibangun ulang dari data.
+#
+# Caller (thread serial, Tk) hanya push ke antrian; satu writer thread yang
+# mengemas, menulis, merotasi dan flush.
+
+MAGIC = b"STLOG\x01\x00\x00"
+FILE_HEADER = struct.Struct("<8sd")
+RECORD_HEADER = struct.Struct("<dBBH")
+INDEX_ENTRY = struct.Struct("<dQ")
+INDEX_DTYPE = np.dtype([("t", "<f8"), ("offset", "<u8")])
+BINARY_PAYLOAD = struct.Struct("<HiI")
+RAW_PAYLOAD = struct.Struct("<H")
+CODE_TEXT = 0
+CODE_COMMAND = 0x80
+SUFFIX = ".stl"
+
+
+def encode_records(records, t, rig=0):
+    # Feedback -> bytes record, satu join per batch
+    out = []
+    pack = RECORD_HEADER.pack
+    for rec in records:
+        code = CODE_LABELS.get(rec.label) if rec.label is not None else None
+        if code is None:
+            payload = format_feedback(rec).encode("utf-8", "replace")[:0xFFFF]
+            code = CODE_TEXT
+        elif rec.steps is not None:
+            payload = BINARY_PAYLOAD.pack(rec.raw & 0xFFFF, rec.steps, (rec.ms or 0) & 0xFFFFFFFF)
+        else:
+            payload = RAW_PAYLOAD.pack(rec.raw & 0xFFFF)
+        out.append(pack(t, rig, code, len(payload)))
+        out.append(payload)
+    return b"".join(out)
+
+
+def encode_command(cmd, t, rig=0):
+    payload = cmd.encode("ascii", "replace")[:0xFFFF]
+    return RECORD_HEADER.pack(t, rig, CODE_COMMAND, len(payload)) + payload
+
+
+def decode_payload(code, payload):
+    # -> ("cmd", str) atau ("fb", Feedback)
+    if code == CODE_COMMAND:
+        return "cmd", bytes(payload).decode("ascii", "replace")
+    if code == CODE_TEXT:
+        return "fb", Feedback(None, None, None, text=bytes(payload).decode("utf-8", "replace"))
+    label = LABEL_CODES.get(code, f"#{code}")
+    if len(payload) >= BINARY_PAYLOAD.size:
+        raw, steps, ms = BINARY_PAYLOAD.unpack_from(payload)
+    else:
+        (raw,), steps, ms = RAW_PAYLOAD.unpack_from(payload), None, None
+    return "fb", Feedback(label, raw, round(raw * 360.0 / 4096.0, 2), steps, ms)
+
+
+# --- Perekam ---
+class TelemetryRecorder:
+    def __init__(self, directory, prefix="steptrack", max_bytes=64 << 20, index_every=64 << 10,
+                 flush_interval=1.0, clock=time.time):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.index_every = index_every
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._file = None
+        self._index = None
+        self._size = 0
+        self._next_index = 0
+        self._seq = 0
+        self.path = None
+
+        # statistik
+        self.records = 0
+        self.bytes = 0
+        self.segments = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=2.0):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Dipanggil dari thread mana pun ---
+    def on_records(self, records, rig=0):
+        if records:
+            self._queue.put((self.clock(), rig, records))
+
+    def command(self, cmd, rig=0):
+        self._queue.put((self.clock(), rig, cmd))
+
+    # dipasang di SerialTransport(on_write=...) bersama tracer / fusion
+    def on_write(self, frames, t_write):
+        t = self.clock()
+        for cmd, _ in frames:
+            self._queue.put((t, 0, cmd))
+
+    # --- Writer thread ---
+    def _open(self, t):
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(t))
+        self._seq += 1
+        self.path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{self._seq:03d}{SUFFIX}")
+        self._file = open(self.path, "ab")
+        self._index = open(self.path + ".idx", "ab")
+        self._file.write(FILE_HEADER.pack(MAGIC, t))
+        self._size = FILE_HEADER.size
+        self._next_index = self._size
+        self.segments += 1
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+
+    def _write(self, t, data, count):
+        if self._file is None or self._size >= self.max_bytes:
+            self._close_segment()
+            self._open(t)
+        if self._size >= self._next_index:
+            self._index.write(INDEX_ENTRY.pack(t, self._size))
+            self._next_index = self._size + self.index_every
+        self._file.write(data)
+        self._size += len(data)
+        self.records += count
+        self.bytes += len(data)
+
+    def _flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._index.flush()
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            try:
+                if item:
+                    t, rig, payload = item
+                    if isinstance(payload, str):
+                        self._write(t, encode_command(payload, t, rig), 1)
+                    else:
+                        self._write(t, encode_records(payload, t, rig), len(payload))
+                now = time.monotonic()
+                if now >= next_flush:
+                    self._flush()
+                    next_flush = now + self.flush_interval
+            except OSError as e:
+                self.errors += 1
+                print(f"[LOG-ERROR] {e}")
+        self._flush()
+        self._close_segment()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "records": self.records,
+            "bytes": self.bytes,
+            "segments": self.segments,
+            "pending": self._queue.qsize(),
+            "errors": self.errors,
+        }
+
+
+# --- Reader ---
+class TelemetryLog:
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, "rb")
+        self.size = os.fstat(self._fh.fileno()).st_size
+        if self.size < FILE_HEADER.size:
+            raise ValueError(f"{path}: not a telemetry log (too short)")
+        self.map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.opened = FILE_HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a telemetry log (bad magic)")
+        self.index = self._load_index()
+
+    def close(self):
+        self.map.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load_index(self):
+        try:
+            index = np.fromfile(self.path + ".idx", dtype=INDEX_DTYPE)
+        except (OSError, ValueError):
+            index = np.empty(0, dtype=INDEX_DTYPE)
+        # index harus menunjuk ke dalam file; entri rusak -> bangun ulang
+        if len(index) and index["offset"][-1] < self.size and (np.diff(index["offset"].astype(np.int64)) > 0).all():
+            return index
+        return self.build_index()
+
+    def build_index(self, every=64 << 10):
+        entries = []
+        next_at = FILE_HEADER.size
+        for t, _, _, _, offset in self.iter_raw():
+            if offset >= next_at:
+                entries.append((t, offset))
+                next_at = offset + every
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def seek(self, t):
+        # offset record pertama yang mungkin >= t (entri index sebelumnya)
+        if t is None or not len(self.index):
+            return FILE_HEADER.size
+        i = int(np.searchsorted(self.index["t"], t, side="left")) - 1
+        return int(self.index["offset"][max(i, 0)]) if i >= 0 else FILE_HEADER.size
+
+    def iter_raw(self, offset=FILE_HEADER.size):
+        # (t, rig, code, payload memoryview, offset); berhenti di record terpotong
+        buf = memoryview(self.map)
+        unpack = RECORD_HEADER.unpack_from
+        hsize = RECORD_HEADER.size
+        end = self.size
+        while offset + hsize <= end:
+            t, rig, code, n = unpack(buf, offset)
+            start = offset + hsize
+            if start + n > end:
+                return
+            yield t, rig, code, buf[start:start + n], offset
+            offset = start + n
+
+    def records(self, t_start=None, t_end=None, rigs=None):
+        # (t, rig, "cmd"|"fb", str|Feedback) dalam [t_start, t_end)
+        for t, rig, code, payload, _ in self.iter_raw(self.seek(t_start)):
+            if t_start is not None and t < t_start:
+                continue
+            if t_end is not None and t >= t_end:
+                return
+            if rigs is not None and rig not in rigs:
+                continue
+            kind, obj = decode_payload(code, payload)
+            yield t, rig, kind, obj
+
+    def span(self):
+        first = last = None
+        for t, _, _, _, _ in self.iter_raw():
+            first = t
+            break
+        # mulai dari entri index terakhir, bukan dari awal file
+        for t, _, _, _, _ in self.iter_raw(self.seek(float("inf"))):
+            last = t
+        return first, last
+
+
+def session_files(path):
+    # direktori -> semua segmen urut nama (= urut waktu), file -> dirinya
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*" + SUFFIX)))
+    return [path]
+
+
+def read_session(path, t_start=None, t_end=None, rigs=None):
+    for name in session_files(path):
+        with TelemetryLog(name) as log:
+            if t_end is not None and log.opened >= t_end:
+                return
+            yield from log.records(t_start, t_end, rigs)
+
+
+# --- Replay ---
+def feedback_bytes(rec):
+    # byte seperti dikirim Arduino: frame biner kalau ada steps, selain itu ASCII
+    if rec.steps is not None and rec.label in CODE_LABELS:
+        return encode_frame(rec.label, rec.raw, rec.steps, rec.ms or 0)
+    return (format_feedback(rec) + "\n").encode("utf-8", "replace")
+
+
+def replay(records, write, speed=1.0, stop=None):
+    # tulis feedback mengikuti jeda aslinya / speed (0 = secepatnya);
+    # record dengan t sama digabung jadi satu write
+    t_first = real_first = None
+    pending = []
+    t_pending = None
+    sent = 0
+    for t, _, kind, rec in records:
+        if kind != "fb":
+            continue
+        if t_pending is not None and t != t_pending:
+            write(b"".join(pending))
+            sent += len(pending)
+            pending.clear()
+        if stop is not None and stop.is_set():
+            return sent
+        if t_first is None:
+            t_first, real_first = t, time.monotonic()
+        if speed > 0 and t != t_pending:
+            delay = real_first + (t - t_first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        t_pending = t
+        pending.append(feedback_bytes(rec))
+    if pending:
+        write(b"".join(pending))
+        sent += len(pending)
+    return sent
+
+
+class PtyReplay:
+    # host membuka slave_name seperti port Arduino; command dari host dibuang
+    def __init__(self):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.slave_name = os.ttyname(self.slave)
+        self.host_bytes = 0
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        while True:
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:
+                return
+            if not data:
+                return
+            self.host_bytes += len(data)
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            n = os.write(self.master, view)
+            view = view[n:]
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def bench(path, t_start=None, t_end=None, rigs=None, chunk=4096):
+    # throughput pipeline host pada trafik asli: parser + RigArray + fusion
+    from bearing_fusion import BearingFusion
+    from multi_rig import RigArray
+
+    t0 = time.perf_counter()
+    data = bytearray()
+    decoded = 0
+    for _, _, kind, rec in read_session(path, t_start, t_end, rigs):
+        decoded += 1
+        if kind == "fb":
+            data += feedback_bytes(rec)
+    t_read = time.perf_counter() - t0
+
+    parser = FeedbackParser()
+    t0 = time.perf_counter()
+    batches = []
+    for i in range(0, len(data), chunk):
+        records = parser.feed(data[i:i + chunk])
+        if records:
+            batches.append(records)
+    t_parse = time.perf_counter() - t0
+    parsed = sum(len(b) for b in batches)
+
+    rig = RigArray(1)
+    fusion = BearingFusion(rig.gear_ratio[0])
+    t0 = time.perf_counter()
+    for records in batches:
+        rig.apply_records(0, records)
+        fusion.on_records(records)
+    t_apply = time.perf_counter() - t0
+
+    def rate(n, dt):
+        return n / dt if dt > 0 else float("inf")
+    return {
+        "records_decoded": decoded,
+        "decode_per_s": rate(decoded, t_read),
+        "feedback_bytes": len(data),
+        "feedback_parsed": parsed,
+        "parse_per_s": rate(parsed, t_parse),
+        "parse_mb_per_s": rate(len(data) / 1e6, t_parse),
+        "apply_per_s": rate(parsed, t_apply),
+    }
+
+
+def _time_arg(value, base):
+    # detik relatif awal sesi ("+12.5" / "12.5") atau epoch absolut
+    if value is None:
+        return None
+    value = float(value)
+    return value if value > 1e9 else base + value
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect and replay StepTrack telemetry logs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name, text in (("info", "summary of a log file or directory"),
+                       ("dump", "print records as text"),
+                       ("replay", "feed recorded feedback to the host over a pseudo-terminal"),
+                       ("bench", "parser / apply throughput on recorded traffic")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("path", help="log directory or .stl segment")
+        p.add_argument("--start", help="seconds from session start (or epoch)")
+        p.add_argument("--end", help="seconds from session start (or epoch)")
+        p.add_argument("--rig", type=int, action="append", help="only this rig id (repeatable)")
+        if name == "replay":
+            p.add_argument("--speed", type=float, default=1.0, help="1 = real time, 100 = 100x, 0 = flat out")
+            p.add_argument("--loop", action="store_true")
+    args = ap.parse_args()
+
+    files = session_files(args.path)
+    if not files:
+        ap.error(f"no {SUFFIX} files in {args.path}")
+    with TelemetryLog(files[0]) as first:
+        base = first.opened
+    t_start, t_end = _time_arg(args.start, base), _time_arg(args.end, base)
+    rigs = set(args.rig) if args.rig else None
+
+    if args.cmd == "info":
+        counts = {}
+        total = 0
+        for name in files:
+            with TelemetryLog(name) as log:
+                first_t, last_t = log.span()
+                n = 0
+                for _, _, code, _, _ in log.iter_raw():
+                    key = "cmd" if code == CODE_COMMAND else LABEL_CODES.get(code, "text" if code == 0 else f"#{code}")
+                    counts[key] = counts.get(key, 0) + 1
+                    n += 1
+                total += n
+                span = f"{last_t - first_t:8.1f} s" if first_t is not None else "   empty"
+                print(f"{os.path.basename(name)}  {log.size:>10} B  {n:>8} records  {span}  "
+                      f"index {len(log.index)}")
+        print(f"total {total} records: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+    elif args.cmd == "dump":
+        for t, rig, kind, obj in read_session(args.path, t_start, t_end, rigs):
+            text = f"> {obj}" if kind == "cmd" else format_feedback(obj)
+            steps = f"  steps={obj.steps} ms={obj.ms}" if kind == "fb" and obj.steps is not None else ""
+            print(f"{t - base:10.3f}  rig{rig}  {text}{steps}")
+    elif args.cmd == "replay":
+        pty = PtyReplay()
+        print(f"[REPLAY] host port: {pty.slave_name}  (e.g. STEPTRACK_PORT={pty.slave_name})", flush=True)
+        try:
+            while True:
+                t0 = time.monotonic()
+                n = replay(read_session(args.path, t_start, t_end, rigs), pty.write, args.speed)
+                dt = time.monotonic() - t0
+                print(f"[REPLAY] {n} feedback records in {dt:.2f} s ({n / max(dt, 1e-9):.0f}/s), "
+                      f"host sent {pty.host_bytes} B", flush=True)
+                if not args.loop:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pty.close()
+    else:
+        for key, value in bench(args.path, t_start, t_end, rigs).items():
+            print(f"{key:18s} {value:,.0f}" if isinstance(value, float) else f"{key:18s} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from anttrack_emulator import StepperModel
+from bearing_fusion import BearingFusion
+
+# --- Regression: X = rem sampai berhenti (stepper.stop()), tidak kembali ---
+
+GEAR = 76 / 228
+
+
+def test_x_stops_at_braking_point():
+    # S32000 di t=0, X di t=1.0 (motor di kecepatan penuh)
+    fusion = BearingFusion(GEAR, latency=0.0, clock=lambda: 0.0)
+    fusion.command("S32000", now=0.0)
+    fusion.command("X", now=1.0)
+
+    stepper = StepperModel()
+    stepper.move_to(32000)
+    stepper.advance(1.0)
+    stepper.stop()
+    stepper.advance(3.0)
+    motor = stepper.current_position() * 360.0 / 3200
+
+    assert abs(fusion.estimate(5.0)[0] - motor) < 2.0
+    assert abs(fusion.expected(5.0) - motor) < 2.0
+    # profil selesai di titik rem, tidak ada segmen balik yang masih jalan
+    assert not fusion.moving(5.0)
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from cable_wrap import CableWrap
+from command_scheduler import CommandScheduler
+
+# --- Regression: burst S digabung scheduler tidak boleh melewati batas lilitan ---
+# Tiap S400 (45 deg motor = 15 deg antena) lolos guard sendiri-sendiri, tapi
+# scheduler menjumlahkannya jadi S1200 sebelum ditulis.
+
+GEAR = 76 / 228
+
+
+def make_wrap(limits=(-20.0, 20.0)):
+    # posisi diam di netral; target tidak berubah sampai ada feedback
+    return CableWrap(GEAR, 3200, limits, position=lambda: (0.0, 0.0))
+
+
+def test_guard_many_limits_burst():
+    wrap = make_wrap()
+    assert all(wrap.guard("S400") == "S400" for _ in range(3))
+    steps = int(wrap.guard_many(["S1200"])[0][1:])
+    assert steps * 360.0 / 3200 * GEAR <= 20.0
+    assert wrap.clamped == 1
+
+
+def test_guard_many_uses_running_target():
+    # [D, S]: S relatif ke target D, bukan ke target yang sudah terkirim
+    wrap = make_wrap()
+    out = wrap.guard_many(["D45", "S400"])
+    assert out[0] == "D45"
+    total = 45.0 + int(out[1][1:]) * 360.0 / 3200 if len(out) > 1 else 45.0
+    assert total * GEAR <= 20.0
+
+
+def test_scheduler_guards_merged_burst():
+    wrap = make_wrap()
+    sent = []
+    done = threading.Event()
+
+    def send(cmd):
+        sent.append(cmd)
+        done.set()
+        return True
+
+    scheduler = CommandScheduler(send, guard=wrap.guard_many)
+    for _ in range(3):
+        scheduler.submit(wrap.guard("S400"))
+    scheduler.start()
+    try:
+        assert done.wait(2.0)
+    finally:
+        scheduler.stop()
+    assert len(sent) == 1
+    steps = int(sent[0][1:])
+    assert steps * 360.0 / 3200 * GEAR <= 20.0
+    assert scheduler.stats()["superseded"] == 2
+
+
+def test_scheduler_drops_batch_cancelled_during_guard():
+    # cancel() masuk saat guard jalan di luar lock: batch basi tidak boleh
+    # menyusul X ke firmware
+    sent = []
+    in_guard = threading.Event()
+    cancelled = threading.Event()
+
+    def guard(batch):
+        in_guard.set()
+        cancelled.wait(2.0)
+        return batch
+
+    scheduler = CommandScheduler(lambda cmd: sent.append(cmd) or True, guard=guard)
+    scheduler.submit("S400")
+    scheduler.start()
+    try:
+        assert in_guard.wait(2.0)
+        scheduler.cancel()
+        cancelled.set()
+        time.sleep(0.2)
+    finally:
+        scheduler.stop()
+    assert sent == ["X"]